@@ -0,0 +1,125 @@
+"""Compare the Selenium and Playwright browser backends on recorded fixtures.
+
+Serves the saved Blinkit/Zepto pages from tests/fixtures on a local HTTP
+server, points the scrapers at it and times a search + detail fetch per
+iteration on each backend. Needs Chrome (Selenium) and/or
+`playwright install chromium`.
+
+    python benchmarks/bench_backends.py --iterations 20 --backends selenium playwright
+"""
+import argparse
+import http.server
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from scrapers.blinkit_scraper import BlinkatScraper  # noqa: E402
+from scrapers.zepto_scraper import ZeptoScraper  # noqa: E402
+from scrapers.session_state import session_store  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "tests", "fixtures")
+
+# URL path prefix -> fixture file served for it
+ROUTES = {
+    "/search/": "blinkit_search.html",
+    "/prn/": "blinkit_product.html",
+    "/search?q=": "zepto_search.html",
+    "/pn/": "zepto_product.html",
+}
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        for prefix, fixture in ROUTES.items():
+            if self.path.startswith(prefix):
+                with open(os.path.join(FIXTURES_DIR, fixture), "rb") as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+        self.send_error(404)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def point_at(scraper, base_url, search_path):
+    scraper.base_url = base_url
+    scraper.search_url = f"{base_url}{search_path}"
+    return scraper
+
+
+def bench(backend, base_url, iterations):
+    scrapers = [
+        point_at(BlinkatScraper(backend=backend), base_url, "/search/"),
+        point_at(ZeptoScraper(backend=backend), base_url, "/search?q="),
+    ]
+    results = {}
+    try:
+        for scraper in scrapers:
+            # First call pays browser startup; keep it out of the steady-state numbers
+            start = time.perf_counter()
+            scraper.search_product("Patanjali Kesh Kanti Advance Herbal Hair Expert Oil", "100ml")
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            found = 0
+            for _ in range(iterations):
+                url = scraper.search_product("Patanjali Kesh Kanti Advance Herbal Hair Expert Oil", "100ml")
+                if url and scraper.extract_product_details(url):
+                    found += 1
+            elapsed = time.perf_counter() - start
+            results[type(scraper).__name__] = {
+                "cold_start_s": cold,
+                "ms_per_sku": elapsed / iterations * 1000,
+                "found": found,
+            }
+    finally:
+        for scraper in scrapers:
+            scraper.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=["selenium", "playwright"])
+    args = parser.parse_args()
+
+    # Keep sessions bootstrapped against the fixture server out of the real store
+    session_store.directory = tempfile.mkdtemp(prefix="bench_sessions_")
+    server, base_url = start_server()
+    try:
+        for backend in args.backends:
+            try:
+                results = bench(backend, base_url, args.iterations)
+            except Exception as e:
+                print(f"{backend}: unavailable ({e})")
+                continue
+            for scraper_name, stats in results.items():
+                print(
+                    f"{backend:<10} {scraper_name:<15} cold start {stats['cold_start_s']:.2f}s  "
+                    f"{stats['ms_per_sku']:.1f} ms/SKU  found {stats['found']}/{args.iterations}"
+                )
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
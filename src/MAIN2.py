@@ -1,27 +1,31 @@
 import pandas as pd
 from concurrent.futures import ThreadPoolExecutor
+import importlib
+import threading
 import time
 import random
 import logging
-from typing import Dict, Any, Optional, List, Tuple
+import os
+import tempfile
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from dataclasses import dataclass
 
-from scrapers.amazon_scraper import AmazonScraper
-from scrapers.blinkit_scraper import BlinkatScraper
-# from scrapers.Blinkit import BlinkatScraper
-from scrapers.zepto_scraper import ZeptoScraper
-# from scrapers.Zepto import ZeptoScraper
-from utils import load_data, save_data
+from scrapers.session_manager import session_manager
+from scrapers.adaptive_wait import wait_timings
+from utils import load_data
+from negative_cache import NegativeCache, DAY
+from id_map import ProductIdMap
+from query_plan import build_query_plans, plan_summary
+from clustering import batch_groups, cluster_plans, cluster_summary
+from matching import best_candidate, CONFIDENCE_THRESHOLD, MIN_CONFIDENCE
+from health import HealthMonitor, CircuitOpenError, OK, EMPTY, search_outcome, search_outcomes
+from alerts import AlertEngine, PriceSnapshot
+from scheduler import ChangeStats, DEFERRED, plan_checks
+from scrapers.base_scraper import CaptchaError, ProductNotFoundError
+from scrapers.replay import Archive, activate, deactivate
+from log_config import log_context
+from config import PipelineConfig, load_config
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("product_matcher.log"),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger("ProductMatcher")
 
 @dataclass
@@ -32,28 +36,140 @@ class ScraperResult:
     quantity: Optional[str] = None
     uom: Optional[str] = None
 
+# Scraper modules are imported on first use so a run that only needs Amazon
+# never loads selenium/webdriver_manager.
+SCRAPER_CLASSES = {
+    'amazon': ('scrapers.amazon_scraper', 'AmazonScraper'),
+    'blinkit': ('scrapers.blinkit_scraper', 'BlinkatScraper'),
+    'zepto': ('scrapers.zepto_scraper', 'ZeptoScraper'),
+}
+BROWSER_PLATFORMS = {'blinkit', 'zepto'}
+
 class ProductMatcher:
     # Constants
-    PLATFORMS = ['amazon', 'blinkit', 'zepto']
-    # PLATFORMS = ['amazon']
-    FIELDS = ['url', 'mrp', 'sale_price', 'quantity', 'uom']
-    MAX_WORKERS = 10
-    MIN_DELAY = 2
-    MAX_DELAY = 5
+    FIELDS = ['url', 'mrp', 'sale_price', 'quantity', 'uom', 'match_confidence']
+    # Stop escalating to broader queries at CONFIDENCE_THRESHOLD; reject matches below MIN_CONFIDENCE
+    CONFIDENCE_THRESHOLD = CONFIDENCE_THRESHOLD
+    MIN_CONFIDENCE = MIN_CONFIDENCE
     
-    def __init__(self, max_retries: int = 3, retry_delay: int = 5):
+    def __init__(self, max_retries: Optional[int] = None, retry_delay: Optional[float] = None,
+                 platforms: Optional[List[str]] = None, prewarm: bool = True,
+                 negative_cache: Optional[NegativeCache] = None,
+                 id_map: Optional[ProductIdMap] = None,
+                 locations: Optional[List[str]] = None,
+                 health: Optional[HealthMonitor] = None,
+                 alerts: Optional[AlertEngine] = None,
+                 cluster_variants: Optional[bool] = None,
+                 archive: Optional[Archive] = None,
+                 config: Optional[PipelineConfig] = None,
+                 progress: Optional[Callable[[str, int, int], None]] = None,
+                 change_stats: Optional[ChangeStats] = None):
         """
         Initialize the ProductMatcher with scrapers and configuration.
         
+        Worker counts, batch sizes, per-platform concurrency, delays, timeouts,
+        retries, pool sizes and browser backends come from config; the
+        arguments below that are also settings override it for this matcher.
+        
         Args:
             max_retries: Maximum number of retries for failed requests
             retry_delay: Delay between retries in seconds
+            platforms: Platforms to search (defaults to the config's enabled platforms)
+            prewarm: Start browsers for browser-based platforms before the first SKU
+            negative_cache: Registry of known misses to skip (defaults to the on-disk cache)
+            id_map: SPIN ID -> platform product id map for direct lookups (defaults to the on-disk map)
+            locations: Pincodes or cities to price location-dependent platforms in; each SKU
+                is searched once and only its product page is fetched per location
+            health: Per-platform health tracking and circuit breakers (defaults to a fresh monitor)
+            alerts: Engine that compares results with the previous run and streams price alerts
+                (defaults to the on-disk snapshot and data/alerts.jsonl, with our price read from
+                the config's reference_column)
+            cluster_variants: Let near-duplicate rows (shades, sizes, pack counts of one product)
+                share a first search page before trying their own queries
+            archive: Record every response and browser page of the run to this archive, or
+                replay a recorded run from it without network (see scrapers.replay). Both start
+                from empty caches unless caches are passed, so a replay repeats the recorded
+                run's requests; a replay also adds no delays and saves no learned state.
+            config: Pipeline settings (defaults to load_config(): PIPELINE_CONFIG, PIPELINE_PRESET
+                and PIPELINE__* overrides from the environment)
+            progress: Called from the worker threads as progress(platform, rows, matched) each
+                time a platform batch finishes, with the number of SKU rows it held and matched
+            change_stats: Per (SKU, platform) price-change statistics that schedule() ranks SKUs
+                by (defaults to data/cache/change_stats.sqlite)
         """
-        self.amazon_scraper = AmazonScraper()
-        self.blinkit_scraper = BlinkatScraper()
-        self.zepto_scraper = ZeptoScraper()
-        self.max_retries = max_retries
-        self.retry_delay = retry_delay
+        self.config = config if config is not None else load_config()
+        if platforms is None:
+            platforms = self.config.enabled_platforms()
+        unknown = set(platforms) - set(SCRAPER_CLASSES)
+        if unknown:
+            raise ValueError(f"Unknown platforms: {sorted(unknown)}")
+        self.PLATFORMS = list(platforms)
+        self.max_workers = self.config.max_workers
+        self.batch_size = self.config.batch_size
+        self.max_retries = self.config.max_retries if max_retries is None else max_retries
+        self.retry_delay = self.config.retry_delay if retry_delay is None else retry_delay
+        self.prewarm = prewarm
+        self.progress = progress
+        self.archive = archive
+        self.offline = archive is not None and archive.replaying
+        if archive is not None:
+            # Learned state would make a replay request different pages than its recording
+            scratch = tempfile.mkdtemp(prefix=f"{archive.mode}-")
+            negative_cache = negative_cache or NegativeCache(os.path.join(scratch, "negative_cache.json"))
+            id_map = id_map or ProductIdMap(os.path.join(scratch, "id_map.json"))
+            alerts = alerts or AlertEngine(os.path.join(scratch, "alerts.jsonl"),
+                                           PriceSnapshot(os.path.join(scratch, "price_snapshot.json")),
+                                           reference_column=self.config.reference_column)
+            change_stats = change_stats or ChangeStats(os.path.join(scratch, "change_stats.sqlite"))
+            if archive.replaying:
+                self.retry_delay = 0
+        if negative_cache is None:
+            negative_cache = NegativeCache(base_ttl=self.config.cache.miss_ttl_days * DAY,
+                                           max_ttl=self.config.cache.miss_max_ttl_days * DAY)
+        self.negative_cache = negative_cache
+        self.id_map = id_map if id_map is not None else ProductIdMap()
+        if locations is None:
+            locations = self.config.locations
+        self.locations = list(dict.fromkeys(locations)) if locations else []
+        self.query_plans = None
+        self.health = health if health is not None else HealthMonitor()
+        self.alerts = alerts if alerts is not None else AlertEngine(reference_column=self.config.reference_column)
+        self.change_stats = change_stats if change_stats is not None else ChangeStats()
+        # (spin_id, platform) pairs to check this run; None checks everything (see schedule())
+        self.due = None
+        self._scheduled = False
+        self.cluster_variants = self.config.cluster_variants if cluster_variants is None else cluster_variants
+        http = self.config.http
+        session_manager.configure(http.pool_connections, http.pool_maxsize, http.max_retries, http.backoff_factor)
+        self.search_pages = {platform: 0 for platform in self.PLATFORMS}
+        # Product pages fetched, and matches whose details came from their search result card instead
+        self.product_pages = {platform: 0 for platform in self.PLATFORMS}
+        self.card_details = {platform: 0 for platform in self.PLATFORMS}
+        self.deferred = {platform: 0 for platform in self.PLATFORMS}
+        self._stats_lock = threading.Lock()
+        self._scrapers = {}
+        self._scrapers_lock = threading.Lock()
+    
+    def _get_scraper(self, platform: str):
+        """Return the scraper for a platform, importing its module on first use."""
+        scraper = self._scrapers.get(platform)
+        if scraper is None:
+            with self._scrapers_lock:
+                scraper = self._scrapers.get(platform)
+                if scraper is None:
+                    module_name, class_name = SCRAPER_CLASSES[platform]
+                    scraper_class = getattr(importlib.import_module(module_name), class_name)
+                    settings = self.config.platforms[platform]
+                    kwargs = {'backend': settings.backend} if settings.backend and platform in BROWSER_PLATFORMS else {}
+                    scraper = scraper_class(**kwargs).configure(settings)
+                    self._scrapers[platform] = scraper
+        return scraper
+    
+    def _prewarm_browsers(self) -> None:
+        """Resolve chromedriver and start a browser per browser platform in the background."""
+        for platform in self.PLATFORMS:
+            if platform in BROWSER_PLATFORMS:
+                self._get_scraper(platform).prewarm()
     
     def process_skus(self, input_file: str) -> pd.DataFrame:
         """
@@ -66,153 +182,472 @@ class ProductMatcher:
             DataFrame with collected data from all platforms
         """
         logger.info(f"Starting to process SKUs from {input_file}")
+        try:
+            return self.process_frame(load_data(input_file))
+        finally:
+            self.close()
+    
+    def process_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Process the SKUs of an already loaded input frame.
+        
+        Unlike process_skus this leaves browsers running and learned state
+        unsaved, so a long run can call it once per chunk; call save_state()
+        between chunks and close() at the end.
+        """
+        if self.archive is not None:
+            activate(self.archive)
         
         try:
-            # Load SKUs data
-            df = load_data(input_file)
+            if not self._scheduled:
+                # The configured request budget applies to every caller, not only the CLI's schedule()
+                self.due = self._due_checks(df)
+            self.alerts.load_reference_prices(df)
             
-            # Initialize result columns
-            self._initialize_result_columns(df)
+            # Plan every search up front; rows with identical plans share one search
+            self.query_plans = build_query_plans(df, self.PLATFORMS)
+            if self.cluster_variants:
+                clustered = cluster_plans(self.query_plans, self.PLATFORMS)
+                logger.info(f"Variant clusters: {cluster_summary(self.query_plans, clustered, self.PLATFORMS, self.batch_size)}")
+                self.query_plans = clustered
+            for platform, summary in plan_summary(self.query_plans, self.PLATFORMS).items():
+                logger.info(f"Query plan for {platform}: {summary}")
+            
+            if self.prewarm:
+                self._prewarm_browsers()
             
             # Process SKUs in parallel
-            results = self._process_skus_in_parallel(df)
+            results = self._process_skus_in_parallel(df, self.query_plans)
+            sku_count = len(df)
+            
+            # One output row per (SKU, location) in multi-location mode
+            df, row_labels = self._expand_locations(df)
+            
+            # Initialize result columns
+            self._initialize_result_columns(df)
             
             # Update DataFrame with results
-            self._update_dataframe_with_results(df, results)
+            self._update_dataframe_with_results(df, results, row_labels)
             
-            logger.info(f"Successfully processed {len(df)} SKUs")
+            logger.info(f"Successfully processed {sku_count} SKUs in {len(self._locations())} location(s)")
+            logger.info(f"Skipped {self.negative_cache.skipped} searches known to be missing")
+            logger.info(f"Fetched {self.id_map.direct_lookups} products directly by known id")
+            logger.info(f"HTTP connection stats: {session_manager.stats()}")
+            logger.info(f"Platform health: {self.health.snapshot()}")
+            logger.info(f"Alerts raised: {self.alerts.counts}")
+            logger.info(f"Search pages fetched: {self.search_pages}")
+            logger.info(f"Product pages fetched: {self.product_pages}; read from search results instead: {self.card_details}")
+            if self.due is not None:
+                logger.info(f"Deferred as unlikely to have changed: {self.deferred}")
             return df
             
         except Exception as e:
             logger.error(f"Failed to process SKUs: {str(e)}", exc_info=True)
             raise
     
+    def close(self) -> None:
+        """Shut down browsers held by the scrapers and persist learned wait timings."""
+        for scraper in self._scrapers.values():
+            try:
+                scraper.close()
+            except Exception as e:
+                logger.warning(f"Error closing scraper: {str(e)}")
+        if self.archive is not None:
+            logger.info(f"Scraper archive: {self.archive.stats()}")
+            try:
+                self.archive.save()
+            except OSError as e:
+                logger.warning(f"Could not save scraper archive: {str(e)}")
+            deactivate()
+        self.save_state()
+    
+    def save_state(self) -> None:
+        """Persist learned wait timings, known misses, product ids and the price snapshot (not on replays)."""
+        if self.offline:
+            return
+        wait_timings.save()
+        for store in (self.negative_cache, self.id_map, self.alerts, self.change_stats):
+            try:
+                store.save()
+            except OSError as e:
+                logger.warning(f"Could not save {type(store).__name__}: {str(e)}")
+    
+    def schedule(self, df: pd.DataFrame, budget: Optional[int] = None) -> Optional[int]:
+        """
+        Limit the next runs to the SKUs most likely to have changed price, within a request budget.
+        
+        budget defaults to the config's daily_request_budget split over its
+        runs_per_day; without one every SKU stays due. SKUs on a platform that
+        are not picked have their `{platform}_status` set to DEFERRED in the
+        output, so they are not read as unavailable. Without a call to this,
+        process_frame applies the configured budget to each frame it is given;
+        call it once over the whole input to spread the budget over a run
+        processed in chunks. Returns the number of (SKU, platform) checks
+        scheduled, or None if everything is due.
+        """
+        self.due = self._due_checks(df, budget)
+        self._scheduled = True
+        return None if self.due is None else len(self.due)
+    
+    def _due_checks(self, df: pd.DataFrame, budget: Optional[int] = None) -> Optional[set]:
+        """The (spin_id, platform) checks to make within budget (default: the configured one), or None if there is none."""
+        if budget is None and self.config.daily_request_budget is not None:
+            budget = self.config.daily_request_budget // self.config.runs_per_day
+        if budget is None:
+            return None
+        spin_ids = df['SPIN ID'] if 'SPIN ID' in df.columns else pd.Series(df.index, index=df.index)
+        keys = [(str(spin_id), platform) for spin_id in spin_ids for platform in self.PLATFORMS]
+        due = set(plan_checks(self.change_stats, keys, budget))
+        logger.info(f"Scheduled {len(due)} of {len(keys)} SKU checks within {budget} requests")
+        return due
+    
+    def _locations(self) -> List[Optional[str]]:
+        """Locations to fetch prices in; [None] means each scraper's default location."""
+        return self.locations or [None]
+    
+    def _expand_locations(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[Tuple[Any, Optional[str]], Any]]:
+        """Repeat each SKU row once per location and map (index, location) keys to output rows."""
+        if not self.locations:
+            return df, {(index, None): index for index in df.index}
+        
+        expanded = df.loc[df.index.repeat(len(self.locations))]
+        keys = list(zip(expanded.index, self.locations * len(df)))
+        expanded = expanded.reset_index(drop=True)
+        expanded['Location'] = [location for _, location in keys]
+        return expanded, {key: row for row, key in enumerate(keys)}
+    
     def _initialize_result_columns(self, df: pd.DataFrame) -> None:
         """Initialize result columns in the DataFrame."""
         for platform in self.PLATFORMS:
             for field in self.FIELDS:
                 df[f"{platform}_{field}"] = ""
+            df[f"{platform}_status"] = ""
     
-    def _process_skus_in_parallel(self, df: pd.DataFrame) -> List[Tuple[int, Dict[str, Any]]]:
-        """Process SKUs in parallel using ThreadPoolExecutor."""
-        results = []
+    def _process_skus_in_parallel(self, df: pd.DataFrame, plans: pd.DataFrame) -> Dict[Tuple[Any, Optional[str]], Dict[str, Any]]:
+        """Process SKUs in parallel, as per-platform batches of distinct query plans searched on one page each."""
+        rows = [
+            (index, row.get('SPIN ID', index), row['Item Name'], row['UOM'])
+            for index, row in df.iterrows()
+        ]
+        results = {
+            (index, location): {platform: None for platform in self.PLATFORMS}
+            for index, *_ in rows for location in self._locations()
+        }
+        
+        # Group rows by their planned queries per platform, then batch the groups
+        # so plans sharing a first query (a variant cluster) search it once
+        platform_batches = {}
+        for platform in self.PLATFORMS:
+            groups = {}
+            for row, queries in zip(rows, plans[f"{platform}_queries"]):
+                groups.setdefault(queries, []).append(row)
+            platform_batches[platform] = batch_groups(list(groups.items()), self.batch_size)
+        
+        # Interleave platforms so no single site gets every early batch
+        batch_count = max((len(batches) for batches in platform_batches.values()), default=0)
+        tasks = [
+            (platform, platform_batches[platform][i])
+            for i in range(batch_count) for platform in self.PLATFORMS
+            if i < len(platform_batches[platform])
+        ]
         
-        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+        # Each platform runs its batches in its own pool sized to its concurrency,
+        # so a slow site only queues its own batches and never holds another's workers
+        executors = {
+            platform: ThreadPoolExecutor(
+                max_workers=min(self.config.platforms[platform].concurrency, self.max_workers),
+                thread_name_prefix=f"{platform}-batch",
+            )
+            for platform in self.PLATFORMS
+        }
+        try:
             futures = []
             
-            for index, row in df.iterrows():
-                # Submit task to executor
-                future = executor.submit(self._process_single_sku_with_retry, row, index)
-                futures.append((future, index))
+            for platform, batch in tasks:
+                # Submit task to the platform's executor
+                future = executors[platform].submit(self._process_platform_batch_with_retry, platform, batch)
+                futures.append((future, platform, batch))
                 
-                # Add jitter to prevent rate limiting
-                time.sleep(random.uniform(self.MIN_DELAY, self.MAX_DELAY))
+                # Add jitter to prevent rate limiting; batches for a tripped platform are rejected without a request
+                settings = self.config.platforms[platform]
+                if not self.offline and not self.health.get(platform).is_open():
+                    time.sleep(random.uniform(settings.min_delay, settings.max_delay))
             
             # Collect results
-            for future, index in futures:
+            for future, platform, batch in futures:
                 try:
-                    result = future.result()
-                    results.append((index, result))
+                    for index, by_location in future.result().items():
+                        for location, details in by_location.items():
+                            # Location-independent platforms answer once for every location
+                            targets = self._locations() if location is None else [location]
+                            for target in targets:
+                                results[(index, target)][platform] = details
                 except Exception as e:
-                    logger.error(f"Failed to get result for index {index}: {str(e)}")
-                    results.append((index, {platform: None for platform in self.PLATFORMS}))
+                    indices = [index for _, group in batch for index, *_ in group]
+                    logger.error(f"Failed to get {platform} results for indices {indices}: {str(e)}")
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
         
         return results
     
-    def _update_dataframe_with_results(self, df: pd.DataFrame, results: List[Tuple[int, Dict[str, Any]]]) -> None:
-        """Update DataFrame with collected results."""
-        for index, result in results:
+    def _update_dataframe_with_results(self, df: pd.DataFrame, results: Dict[Tuple[Any, Optional[str]], Dict[str, Any]],
+                                       row_labels: Dict[Tuple[Any, Optional[str]], Any]) -> None:
+        """Update DataFrame with collected results, marking the checks schedule() deferred."""
+        for key, result in results.items():
+            row = row_labels[key]
+            spin_id = df.at[row, 'SPIN ID'] if 'SPIN ID' in df.columns else key[0]
             for platform in self.PLATFORMS:
+                if self.due is not None and (str(spin_id), platform) not in self.due:
+                    df.at[row, f"{platform}_status"] = DEFERRED
+                    continue
                 platform_result = result.get(platform)
                 if platform_result:
                     for field in self.FIELDS:
-                        df.at[index, f"{platform}_{field}"] = platform_result.get(field, "N/A")
+                        df.at[row, f"{platform}_{field}"] = platform_result.get(field, "N/A")
+    
+    def _process_platform_batch_with_retry(self, platform: str, batch: List[Tuple]) -> Dict[Any, Dict[Optional[str], Any]]:
+        """Process a batch of SKUs on one platform with retry mechanism, reporting progress when it ends."""
+        found = {}
+        try:
+            found = self._retry_platform_batch(platform, batch)
+            return found
+        finally:
+            if self.progress is not None:
+                self.progress(platform, sum(len(rows) for _, rows in batch), len(found))
     
-    def _process_single_sku_with_retry(self, row: pd.Series, index: int) -> Dict[str, Any]:
-        """Process a single SKU with retry mechanism."""
+    def _retry_platform_batch(self, platform: str, batch: List[Tuple]) -> Dict[Any, Dict[Optional[str], Any]]:
+        """Process a batch, retrying all of it after retry_delay on failure."""
         retries = 0
         while retries <= self.max_retries:
             try:
-                return self._process_single_sku(row, index)
+                with log_context(platform=platform, stage="batch"):
+                    return self._process_platform_batch(platform, batch)
             except Exception as e:
                 retries += 1
-                logger.warning(f"Retry {retries}/{self.max_retries} for {row['Item Name']}: {str(e)}")
+                logger.warning(f"Retry {retries}/{self.max_retries} for {platform} batch of {len(batch)} plans: {str(e)}")
                 if retries <= self.max_retries:
                     time.sleep(self.retry_delay)
                 else:
-                    logger.error(f"Failed to process {row['Item Name']} after {self.max_retries} retries")
+                    logger.error(f"Failed to process {platform} batch after {self.max_retries} retries")
                     raise
     
-    def _process_single_sku(self, row: pd.Series, index: int) -> Dict[str, Dict[str, Any]]:
+    def _process_platform_batch(self, platform: str, batch: List[Tuple]) -> Dict[Any, Dict[Optional[str], Any]]:
         """
-        Process a single SKU by searching on all platforms.
+        Search a batch of query plans on one platform.
+        
+        SKUs with a known product id are fetched directly and recent misses are
+        skipped; the remaining plans go to the scraper's batch search so browser
+        platforms reuse one page and its search box for the whole batch. Each
+        plan is searched once for all of its rows, and each product is found
+        once; only its product page is fetched again per location. Calls go
+        through the platform's circuit breaker; once it trips, the rest of the
+        batch is left unsearched.
         
         Args:
-            row: DataFrame row containing product information
-            index: Row index for logging purposes
+            platform: Platform to search
+            batch: (queries, rows) groups, rows being (index, spin_id, product_name, uom) tuples
             
         Returns:
-            Dictionary with results from all platforms
+            Dictionary of row index -> {location: product details} for the rows that matched;
+            location is None for platforms whose prices do not depend on location
         """
-        logger.info(f"Processing {index}: {row['Item Name']}")
-        product_name = row['Item Name']
-        uom = row['UOM']
+        found = {}
+        try:
+            self._search_platform_batch(platform, batch, found)
+        except (CircuitOpenError, CaptchaError) as e:
+            # The breaker has (just) tripped: keep what was found and leave the rest of the batch alone
+            skipped = sum(len(rows) for _, rows in batch) - len(found)
+            logger.warning(f"Skipping {skipped} SKUs on {platform}: {str(e)}")
+        return found
+    
+    def _search_platform_batch(self, platform: str, batch: List[Tuple], found: Dict[Any, Dict[Optional[str], Any]]) -> None:
+        """Fill found with the batch's direct lookups and search results (see _process_platform_batch)."""
+        scraper = self._get_scraper(platform)
+        pending = []
+        for queries, rows in batch:
+            pending_rows = []
+            for index, spin_id, product_name, uom in rows:
+                if self.due is not None and (str(spin_id), platform) not in self.due:
+                    with self._stats_lock:
+                        self.deferred[platform] += 1
+                    continue
+                with log_context(sku=spin_id, stage="lookup"):
+                    details = self._lookup_known_product(platform, spin_id)
+                    if details:
+                        found[index] = details
+                        self._observe_prices(platform, spin_id, details)
+                        continue
+                    if self.negative_cache.is_known_missing(spin_id, platform, f"{product_name} {uom}"):
+                        logger.info(f"Skipping {platform} for {spin_id}: known missing")
+                        continue
+                pending_rows.append((index, spin_id, product_name, uom))
+            if pending_rows:
+                pending.append((queries, pending_rows))
         
-        result = {platform: None for platform in self.PLATFORMS}
+        if not pending:
+            return
         
-        # Process each platform in sequence
-        self._search_on_amazon(product_name, uom, result)
-        self._search_on_blinkit(product_name, uom, result)
-        self._search_on_zepto(product_name, uom, result)
+        logger.info(f"Searching {len(pending)} query plans on {platform}")
+        # Search results come from the first location's session
+        searcher = scraper.for_location(self._locations()[0])
+        with log_context(stage="search"):
+            matches = self._run_query_plans(searcher, pending)
         
-        return result
+        for (queries, rows), (url, confidence, card, conclusive) in zip(pending, matches):
+            with log_context(sku=",".join(str(spin_id) for _, spin_id, *_ in rows), stage="fetch"):
+                if not url and not conclusive:
+                    # A search that failed or could not be read says nothing about the product
+                    logger.info(f"No match on {platform} for {queries}, but a search failed or was unreadable; not caching the miss")
+                    continue
+                if not url:
+                    for index, spin_id, product_name, uom in rows:
+                        self.negative_cache.record_miss(spin_id, platform, f"{product_name} {uom}")
+                    logger.info(f"No match on {platform} for {queries} (best confidence {confidence})")
+                    continue
+                
+                details = self._fetch_in_locations(scraper, url, confidence, card)
+                product_id = scraper.extract_product_id(url)
+                for index, spin_id, product_name, uom in rows:
+                    self.negative_cache.record_hit(spin_id, platform, f"{product_name} {uom}")
+                    if any(details.values()) and product_id:
+                        self.id_map.set(spin_id, platform, product_id, confidence)
+                    found[index] = details
+                    self._observe_prices(platform, spin_id, details)
+                logger.info(f"Found product on {platform.capitalize()}: {url} (confidence {confidence})")
     
-    def _search_on_amazon(self, product_name: str, uom: str, result: Dict[str, Any]) -> None:
-        """Search for product on Amazon and update result."""
-        try:
-            amazon_url = self.amazon_scraper.search_product(product_name, uom)
-            if amazon_url:
-                result['amazon'] = self.amazon_scraper.extract_product_details(amazon_url)
-                logger.info(f"Found product on Amazon: {amazon_url}")
-            else:
-                logger.info("URL not found on amazon")
-        except Exception as e:
-            logger.error(f"Error with Amazon for {product_name}: {str(e)}")
+    def _run_query_plans(self, scraper, plans: List[Tuple]) -> List[Tuple[Optional[str], float, Optional[Dict[str, Any]], bool]]:
+        """
+        Run each plan's queries tier by tier and return (url, match confidence, card details, conclusive) per plan.
+        
+        Every candidate a tier returns is scored against the plan's product; a
+        plan stops escalating to broader queries once its best candidate reaches
+        CONFIDENCE_THRESHOLD. The best candidate over all tiers is returned, or
+        None for the URL if it stayed below MIN_CONFIDENCE. Card details are the
+        product details its search result already showed, if the scraper read
+        them (otherwise None). conclusive is False if any of the plan's search
+        pages failed or could not be parsed (see SearchResults), so a miss may
+        not be real.
+        """
+        best = [(None, 0.0, None)] * len(plans)
+        done = [False] * len(plans)
+        conclusive = [True] * len(plans)
+        tier = 0
+        while True:
+            # Plans still escalating that have a query at this tier, grouped by that query
+            by_query = {}
+            for i, (queries, rows) in enumerate(plans):
+                if not done[i] and tier < len(queries):
+                    by_query.setdefault(queries[tier], []).append(i)
+            if not by_query:
+                break
+            
+            entries = []
+            for query, members in by_query.items():
+                _, _, product_name, uom = plans[members[0]][1][0]
+                entries.append((product_name, uom, query))
+            with self._stats_lock:
+                self.search_pages[scraper.platform] += len(entries)
+            batch_candidates = self.health.get(scraper.platform).call(
+                scraper.search_products, entries, outcome=search_outcomes
+            )
+            for members, candidates in zip(by_query.values(), batch_candidates):
+                readable = search_outcome(candidates) == OK
+                for i in members:
+                    conclusive[i] = conclusive[i] and readable
+                    _, _, product_name, uom = plans[i][1][0]
+                    candidate, confidence = best_candidate(product_name, uom, candidates)
+                    if candidate and confidence > best[i][1]:
+                        best[i] = (candidate['url'], confidence, candidate.get('details'))
+                    done[i] = best[i][1] >= self.CONFIDENCE_THRESHOLD
+            tier += 1
+        
+        return [
+            (url, confidence, card, ok) if confidence >= self.MIN_CONFIDENCE else (None, confidence, None, ok)
+            for (url, confidence, card), ok in zip(best, conclusive)
+        ]
     
-    def _search_on_blinkit(self, product_name: str, uom: str, result: Dict[str, Any]) -> None:
-        """Search for product on Blinkit and update result."""
-        try:
-            blinkit_url = self.blinkit_scraper.search_product(product_name, uom)
-            if blinkit_url:
-                result['blinkit'] = self.blinkit_scraper.extract_product_details(blinkit_url)
-                logger.info(f"Found product on Blinkit: {blinkit_url}")
-            else:
-                logger.info("URL not found on blinkit")
-        except Exception as e:
-            logger.error(f"Error with Blinkit for {product_name}: {str(e)}")
+    def _fetch_in_locations(self, scraper, url: str, confidence: Optional[float] = None,
+                            card: Optional[Dict[str, Any]] = None) -> Dict[Optional[str], Any]:
+        """
+        Fetch a product page once per location (once in total if the platform ignores location).
+        
+        card holds the details the product's search result already showed; for a
+        platform that ignores location they are used instead of the product page.
+        Locations whose page says the product does not exist map to None;
+        locations whose fetch failed are left out.
+        """
+        locations = self._locations() if scraper.location_dependent else [None]
+        health = self.health.get(scraper.platform)
+        details = {}
+        for location in locations:
+            try:
+                if card is not None and location is None:
+                    result = dict(card)
+                    with self._stats_lock:
+                        self.card_details[scraper.platform] += 1
+                else:
+                    with self._stats_lock:
+                        self.product_pages[scraper.platform] += 1
+                    result = health.call(scraper.for_location(location).extract_product_details, url,
+                                         outcome=lambda found: OK if found else EMPTY)
+                if not result:
+                    # The page never loaded: a failed fetch, left out like the errors below
+                    logger.info(f"No {scraper.platform.capitalize()} details for {url} in {location}")
+                    continue
+                # Stored as text like the scraped fields; typed output formats parse it back
+                result["match_confidence"] = "N/A" if confidence is None else str(confidence)
+                details[location] = result
+            except ProductNotFoundError as e:
+                # The site says the product is gone: a definite "not available" here
+                logger.info(str(e))
+                details[location] = None
+            except (CircuitOpenError, CaptchaError):
+                raise
+            except Exception as e:
+                # Left out rather than stored as None so a failed fetch is not taken for a stock-out
+                logger.error(f"Error with {scraper.platform.capitalize()} for {url} in {location}: {str(e)}")
+        return details
     
-    def _search_on_zepto(self, product_name: str, uom: str, result: Dict[str, Any]) -> None:
-        """Search for product on Zepto and update result."""
-        try:
-            zepto_url = self.zepto_scraper.search_product(product_name, uom)
-            if zepto_url:
-                result['zepto'] = self.zepto_scraper.extract_product_details(zepto_url)
-                logger.info(f"Found product on Zepto: {zepto_url}")
-            else:
-                logger.info("URL not found on zepto")
-        except Exception as e:
-            logger.error(f"Error with Zepto for {product_name}: {str(e)}")
+    def _observe_prices(self, platform: str, spin_id: str, details: Dict[Optional[str], Any]) -> None:
+        """Feed fetched product pages to the alert engine, once per location, and to the change statistics."""
+        for location, result in details.items():
+            self.alerts.observe(spin_id, platform, location, result)
+        self.change_stats.observe(spin_id, platform, details)
+    
+    def _lookup_known_product(self, platform: str, spin_id: str) -> Optional[Dict[Optional[str], Any]]:
+        """
+        Fetch a previously matched product straight from its id; return details per location, or None.
+        
+        The id is only forgotten when every location's page says the product
+        does not exist; a failed fetch (timeout, network error) keeps it for
+        the next run and falls back to searching for this one.
+        """
+        product_id = self.id_map.get(spin_id, platform)
+        if not product_id:
+            return None
+        
+        scraper = self._get_scraper(platform)
+        confidence = self.id_map.confidence(spin_id, platform)
+        details = self._fetch_in_locations(scraper, scraper.product_url(product_id), confidence)
+        
+        if not details:
+            logger.info(f"Could not fetch known {platform} id {product_id} for {spin_id}; searching instead")
+            return None
+        if not any(details.values()):
+            # Listing is gone; fall back to searching and re-learn the id
+            logger.info(f"Known {platform} id {product_id} for {spin_id} no longer resolves")
+            self.id_map.forget(spin_id, platform)
+            return None
+        
+        with self._stats_lock:
+            self.id_map.direct_lookups += 1
+        logger.info(f"Fetched {platform} product {product_id} directly for {spin_id}")
+        return details
+
 
 
 if __name__ == "__main__":
-    try:
-        input_file = "data/sample_input.csv"
-        output_file = "data/result.csv"
-        
-        matcher = ProductMatcher(max_retries=3, retry_delay=5)
-        result_df = matcher.process_skus(input_file)
-        save_data(result_df, output_file)
-        
-        logger.info(f"Processing complete. Results saved to {output_file}")
-    except Exception as e:
-        logger.critical(f"Program failed: {str(e)}", exc_info=True)
+    # The batch runner lives in cli.py; without arguments it processes data/sample_input.csv
+    from cli import main
+    raise SystemExit(main())
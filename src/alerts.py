@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+SNAPSHOT_FILE = "data/cache/price_snapshot.json"
+ALERTS_FILE = "data/alerts.jsonl"
+
+logger = logging.getLogger("ProductMatcher.alerts")
+# Column holding our own (Instamart) price in the input, if it has one
+REFERENCE_COLUMN = "instamart_sale_price"
+
+PRICE_DROP = "price_drop"
+UNDERCUT = "undercut"
+STOCK_OUT = "stock_out"
+
+
+def _price(details):
+    """Sale price from a scraped result as a float, or None if there is no usable price"""
+    if not details:
+        return None
+    try:
+        price = float(details.get("sale_price"))
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+
+class PriceSnapshot:
+    """Persisted last observation per (SPIN ID, platform, location).
+
+    Entries are kept in a dict keyed by that triple, so comparing a new
+    result with the previous run is a single lookup.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def key(spin_id, platform, location=None):
+        return f"{spin_id}|{platform}|{location or ''}"
+
+    def get(self, spin_id, platform, location=None):
+        with self._lock:
+            return self._entries.get(self.key(spin_id, platform, location))
+
+    def put(self, spin_id, platform, location, entry):
+        with self._lock:
+            self._entries[self.key(spin_id, platform, location)] = entry
+
+    def __len__(self):
+        return len(self._entries)
+
+    def save(self):
+        """Write the snapshot atomically so an interrupted run never leaves it half-written"""
+        with self._lock:
+            data = dict(self._entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+
+class AlertEngine:
+    """Compares each scraped result with the previous snapshot and streams alerts as JSONL.
+
+    Alert types:
+    - price_drop: the platform's sale price fell by at least drop_threshold
+      (a fraction) since the last run
+    - undercut: the platform sells below our reference price by at least
+      undercut_threshold; raised when the undercut starts or deepens, not on
+      every run it persists
+    - stock_out: a product page that had a price last run has none now
+
+    Each alert is appended to output_path and flushed as soon as the result
+    is observed, so consumers can tail the file during the run.
+    """
+
+    def __init__(self, output_path=ALERTS_FILE, snapshot=None, drop_threshold=0.05,
+                 undercut_threshold=0.05, reference_column=REFERENCE_COLUMN):
+        self.output_path = output_path
+        self.snapshot = snapshot if snapshot is not None else PriceSnapshot()
+        self.drop_threshold = drop_threshold
+        self.undercut_threshold = undercut_threshold
+        self.reference_column = reference_column
+        self.reference_prices = {}
+        self._warned_missing = False
+        self.counts = {PRICE_DROP: 0, UNDERCUT: 0, STOCK_OUT: 0}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def load_reference_prices(self, df):
+        """Index our own price per SPIN ID from the input frame, if it has a reference column"""
+        if self.reference_column not in df.columns or 'SPIN ID' not in df.columns:
+            if not self._warned_missing:
+                # Once per engine; the CLI loads every chunk
+                logger.warning(f"Input has no {self.reference_column!r} column; undercut alerts are off")
+                self._warned_missing = True
+            self.reference_prices = {}
+            return
+        prices = pd.to_numeric(df[self.reference_column], errors='coerce')
+        valid = prices > 0
+        self.reference_prices = dict(zip(df.loc[valid, 'SPIN ID'].astype(str), prices[valid]))
+
+    def observe(self, spin_id, platform, location, details):
+        """Check one fetched product page against the snapshot; returns the alerts raised"""
+        price = _price(details)
+        previous = self.snapshot.get(spin_id, platform, location) or {}
+        previous_price = previous.get("sale_price")
+        reference = self.reference_prices.get(str(spin_id))
+        url = details.get("url") if details else None
+        base = {"spin_id": spin_id, "platform": platform, "location": location, "url": url}
+
+        alerts = []
+        if price is not None and previous_price and price <= previous_price * (1 - self.drop_threshold):
+            alerts.append({**base, "type": PRICE_DROP, "price": price, "previous_price": previous_price,
+                           "change": round(price / previous_price - 1, 4)})
+        undercut = price is not None and reference is not None and price <= reference * (1 - self.undercut_threshold)
+        if undercut and (not previous.get("undercut") or (previous_price and price < previous_price)):
+            alerts.append({**base, "type": UNDERCUT, "price": price, "reference_price": reference,
+                           "change": round(price / reference - 1, 4)})
+        if price is None and previous_price:
+            alerts.append({**base, "type": STOCK_OUT, "previous_price": previous_price})
+
+        self.snapshot.put(spin_id, platform, location, {
+            "sale_price": price,
+            "undercut": undercut,
+            "seen_at": time.time(),
+        })
+        if alerts:
+            self._emit(alerts)
+        return alerts
+
+    def _emit(self, alerts):
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.output_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.output_path, "a")
+            for alert in alerts:
+                self.counts[alert["type"]] += 1
+                self._file.write(json.dumps({"time": now, **alert}) + "\n")
+            self._file.flush()
+
+    def save(self):
+        """Close the alert stream and persist the snapshot for the next run"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        self.snapshot.save()
@@ -1,6 +1,16 @@
+import hashlib
+import os
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from scheduler import DEFERRED
+
+
+def dataset_hash(df):
+    """Content hash of a result set; cached analyses and charts are keyed by it"""
+    hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha1(hashes.tobytes() + ",".join(map(str, df.columns)).encode()).hexdigest()
+
 
 class ProductAnalyzer:
     def __init__(self, data):
@@ -47,19 +57,25 @@ class ProductAnalyzer:
         return pd.DataFrame(best_deals)
     
     def generate_availability_stats(self):
-        """Generate availability statistics across platforms"""
+        """Generate availability statistics across platforms, over the rows checked this run"""
         platforms = ['amazon', 'blinkit', 'zepto']
         availability = {}
         
         for platform in platforms:
             url_col = f"{platform}_url"
             if url_col in self.data.columns:
+                # Rows the request budget deferred were not looked up, so they say nothing about availability
+                status_col = f"{platform}_status"
+                checked = self.data
+                if status_col in self.data.columns:
+                    checked = self.data[self.data[status_col].astype(str) != DEFERRED]
                 # available = self.data[url_col].notna().sum()
-                available = self.data[url_col].astype(str).str.strip().ne('').sum()
+                available = checked[url_col].astype(str).str.strip().ne('').sum()
                 availability[platform] = {
                     'available': available,
-                    'not_available': len(self.data) - available,
-                    'percentage': (available / len(self.data)) * 100
+                    'not_available': len(checked) - available,
+                    'deferred': len(self.data) - len(checked),
+                    'percentage': (available / len(checked)) * 100 if len(checked) else 0.0
                 }
         
         return availability
@@ -86,25 +102,68 @@ class ProductAnalyzer:
         
         return category_analysis
     
-    def plot_price_comparison(self, output_path='price_comparison.png'):
-        """Generate price comparison chart"""
-        # platforms = ['instamart', 'amazon', 'blinkit', 'zepto']
-        platforms = ['amazon', 'blinkit', 'zepto']
-        price_data = []
-        
-        for platform in platforms:
-            price_col = f"{platform}_sale_price"
-            if platform == 'instamart' or price_col in self.data.columns:
-                prices = self.data[price_col].dropna().astype(float).tolist()
-                price_data.extend([{'platform': platform, 'price': price} for price in prices])
-        
-        df = pd.DataFrame(price_data)
-        
-        plt.figure(figsize=(10, 6))
-        sns.boxplot(x='platform', y='price', data=df)
-        plt.title('Price Distribution Across Platforms')
-        plt.ylabel('Price (INR)')
-        plt.xlabel('Platform')
-        plt.savefig(output_path)
-        
-        return output_path
\ No newline at end of file
+    def price_summary(self, platforms=('amazon', 'blinkit', 'zepto')):
+        """Box-plot statistics of sale prices per platform.
+
+        Prices are coerced column-wise, so "N/A" and other unparsable values
+        become NaN and are ignored. Returns a frame indexed by platform with
+        count, whislo, q1, med, q3, whishi (whiskers at 1.5 IQR, clipped to the
+        data) and mean; platforms without any price are left out.
+        """
+        columns = {f"{platform}_sale_price": platform for platform in platforms
+                   if f"{platform}_sale_price" in self.data.columns}
+        prices = self.data[list(columns)].apply(pd.to_numeric, errors='coerce').rename(columns=columns)
+        quartiles = prices.quantile([0.25, 0.5, 0.75])
+        q1, med, q3 = quartiles.loc[0.25], quartiles.loc[0.5], quartiles.loc[0.75]
+        iqr = q3 - q1
+        summary = pd.DataFrame({
+            'count': prices.count(),
+            'whislo': prices.where(prices >= q1 - 1.5 * iqr).min(),
+            'q1': q1,
+            'med': med,
+            'q3': q3,
+            'whishi': prices.where(prices <= q3 + 1.5 * iqr).max(),
+            'mean': prices.mean(),
+        })
+        return summary[summary['count'] > 0]
+
+    def plot_price_comparison(self, output_path='price_comparison.png', cache_dir=None, data_hash=None):
+        """Generate price comparison chart from the price summaries.
+
+        The chart is drawn on a pyplot-free Figure, so it works on headless
+        servers. The format follows output_path's extension (.png or .svg).
+        With cache_dir, the chart is written there under the dataset hash and
+        an existing file for the same data is returned without redrawing.
+        Outliers beyond the whiskers are not drawn.
+        """
+        extension = os.path.splitext(output_path)[1] or '.png'
+        if cache_dir:
+            data_hash = data_hash or dataset_hash(self.data)
+            output_path = os.path.join(cache_dir, f"price_comparison-{data_hash}{extension}")
+            if os.path.exists(output_path):
+                return output_path
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # Plotting stack is only imported when a chart is actually drawn
+        from matplotlib.figure import Figure
+
+        summary = self.price_summary()
+        stats = [
+            {'label': platform, **{key: row[key] for key in ('whislo', 'q1', 'med', 'q3', 'whishi', 'mean')}}
+            for platform, row in summary.iterrows()
+        ]
+
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        if stats:
+            ax.bxp(stats, showfliers=False, showmeans=True)
+        ax.set_title('Price Distribution Across Platforms')
+        ax.set_ylabel('Price (INR)')
+        ax.set_xlabel('Platform')
+
+        # Written under a temporary name so a concurrent reader never sees a partial file
+        tmp_path = f"{output_path}.tmp"
+        fig.savefig(tmp_path, format=extension.lstrip('.'))
+        os.replace(tmp_path, output_path)
+
+        return output_path
@@ -1,20 +1,78 @@
 import streamlit as st
 import pandas as pd
-# import io
-import base64
+import io
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
 from MAIN2 import ProductMatcher
-from analyzer import ProductAnalyzer
-import matplotlib.pyplot as plt
+from cli import Progress
+from config import load_config
+from analyzer import ProductAnalyzer, dataset_hash
+from log_config import setup_logging
 # import seaborn as sns
 
 st.set_page_config(page_title="Product Matcher", layout="wide")
 
-def get_download_link(df, filename, text):
-    """Generate a download link for a DataFrame"""
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">{text}</a>'
-    return href
+@st.cache_resource
+def init_logging():
+    """Start the logging listener once per server process, not on every rerun"""
+    return setup_logging()
+
+init_logging()
+
+# Rows shown in on-page tables; the full result set is in the download
+PREVIEW_ROWS = 1000
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "product_matcher_exports")
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def read_upload(data, name):
+    """Parse an uploaded file once per distinct content"""
+    if name.lower().endswith(".parquet"):
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data))
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def availability_stats(data_hash, _df):
+    """Availability per platform for the result set with this hash"""
+    return ProductAnalyzer(_df).generate_availability_stats()
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def availability_chart(data_hash, availability):
+    """Availability bar chart as PNG bytes, drawn without pyplot so no GUI backend is needed"""
+    from matplotlib.figure import Figure
+
+    platforms = list(availability.keys())
+    available = [availability[p]['available'] for p in platforms]
+    not_available = [availability[p]['not_available'] for p in platforms]
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+
+    x = range(len(platforms))
+    width = 0.35
+
+    ax.bar([i - width/2 for i in x], available, width, label='Available')
+    ax.bar([i + width/2 for i in x], not_available, width, label='Not Available')
+
+    ax.set_ylabel('Number of Products')
+    ax.set_title('Product Availability Across Platforms')
+    ax.set_xticks(x)
+    ax.set_xticklabels(platforms)
+    ax.legend()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+def export_csv(data_hash, df):
+    """Write the result set to a CSV file once per hash and return its path"""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"{data_hash}.csv")
+    if not os.path.exists(path):
+        tmp_path = f"{path}.tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return path
 
 def main():
     st.title("E-commerce Product Matcher & Analyzer")
@@ -24,11 +82,11 @@ def main():
     Upload a CSV containing Swiggy Instamart SKUs to find matching products on Amazon, Blinkit, and Zepto.
     """)
     
-    uploaded_file = st.file_uploader("Choose a CSV file", type="csv")
+    uploaded_file = st.file_uploader("Choose a CSV or Parquet file", type=["csv", "parquet"])
     
     if uploaded_file is not None:
         # Display uploaded data
-        df = pd.read_csv(uploaded_file)
+        df = read_upload(uploaded_file.getvalue(), uploaded_file.name)
         st.write("### Uploaded Data Preview")
         st.dataframe(df.head())
         
@@ -39,82 +97,79 @@ def main():
             
             status_text.text("Processing SKUs... This may take several minutes.")
             
-            # Save temp file for processing
-            temp_file = "temp_input.csv"
-            df.to_csv(temp_file, index=False)
-            
-            # Process SKUs
-            matcher = ProductMatcher()
-            result_df = matcher.process_skus(temp_file)
-            
-            # Display results
-            st.write("### Results")
-            st.dataframe(result_df)
-            
-            # Analysis section
-            st.write("## Data Analysis")
-            
-            analyzer = ProductAnalyzer(result_df)
-            
-            # Calculate price differences
-            # analysis_df = analyzer.calculate_price_differences()
-            
-            # Platform availability
-            st.write("### Product Availability Across Platforms")
-            availability = analyzer.generate_availability_stats()
-            
-            # Create availability chart
-            platforms = list(availability.keys())
-            available = [availability[p]['available'] for p in platforms]
-            not_available = [availability[p]['not_available'] for p in platforms]
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            x = range(len(platforms))
-            width = 0.35
-            
-            ax.bar([i - width/2 for i in x], available, width, label='Available')
-            ax.bar([i + width/2 for i in x], not_available, width, label='Not Available')
-            
-            ax.set_ylabel('Number of Products')
-            ax.set_title('Product Availability Across Platforms')
-            ax.set_xticks(x)
-            ax.set_xticklabels(platforms)
-            ax.legend()
-            
-            st.pyplot(fig)
-            
-            # Best deals
-            # st.write("### Best Deals (Largest Price Differences)")
-            # best_deals = analyzer.find_best_deals()
-            # st.dataframe(best_deals)
-            
-            # Price comparison
-            # st.write("### Price Distribution Comparison")
-            # price_chart = analyzer.plot_price_comparison()
-            # st.image(price_chart)
-            
-            # Category analysis
-            st.write("### Category Analysis")
-            # category_analysis = analyzer.generate_category_analysis()
-            
-            # for category, data in category_analysis.items():
-            #     st.write(f"**{category}** (Products: {data['count']})")
-                
-            #     avg_diffs = data['avg_price_diff']
-            #     if avg_diffs:
-            #         st.write("Average price differences:")
-            #         for platform, diff in avg_diffs.items():
-            #             if diff is not None:
-            #                 st.write(f"- {platform.capitalize()}: ₹{diff:.2f}")
-            
-            # Download links
-            st.markdown("### Download Results")
-            st.markdown(get_download_link(result_df, "product_matches.csv", "Download Matching Results (CSV)"), unsafe_allow_html=True)
-            # st.markdown(get_download_link(analysis_df, "price_analysis.csv", "Download Price Analysis (CSV)"), unsafe_allow_html=True)
+            # Process SKUs; the progress callback runs on worker threads, so only
+            # count there and redraw the bar from this script thread
+            config = load_config()
+            progress = Progress(len(df), config.enabled_platforms(), show=False)
+            matcher = ProductMatcher(config=config, progress=progress)
+            try:
+                with ThreadPoolExecutor(max_workers=1) as runner:
+                    future = runner.submit(matcher.process_frame, df)
+                    while not wait([future], timeout=0.5).done:
+                        progress_bar.progress(min(1.0, progress.done() / max(len(df), 1)))
+                        status_text.text(progress.line())
+                    result_df = future.result()
+            finally:
+                matcher.close()
+            
+            # Keep the results across reruns so later interactions reuse them
+            st.session_state["result_df"] = result_df
+            st.session_state["result_hash"] = dataset_hash(result_df)
             
             status_text.text("Processing complete!")
             progress_bar.progress(100)
+    
+    if "result_df" in st.session_state:
+        show_results(st.session_state["result_df"], st.session_state["result_hash"])
+
+def show_results(result_df, data_hash):
+    """Results, analysis and downloads; everything derived from result_df is cached by data_hash"""
+    # Display results
+    st.write("### Results")
+    if len(result_df) > PREVIEW_ROWS:
+        st.caption(f"Showing the first {PREVIEW_ROWS} of {len(result_df)} rows; download the CSV for all of them.")
+    st.dataframe(result_df.head(PREVIEW_ROWS))
+    
+    # Analysis section
+    st.write("## Data Analysis")
+    
+    # Calculate price differences
+    # analysis_df = analyzer.calculate_price_differences()
+    
+    # Platform availability
+    st.write("### Product Availability Across Platforms")
+    availability = availability_stats(data_hash, result_df)
+    st.image(availability_chart(data_hash, availability))
+    
+    # Best deals
+    # st.write("### Best Deals (Largest Price Differences)")
+    # best_deals = analyzer.find_best_deals()
+    # st.dataframe(best_deals)
+    
+    # Price comparison
+    st.write("### Price Distribution Comparison")
+    price_chart = ProductAnalyzer(result_df).plot_price_comparison(cache_dir=EXPORT_DIR, data_hash=data_hash)
+    st.image(price_chart)
+    
+    # Category analysis
+    st.write("### Category Analysis")
+    # category_analysis = analyzer.generate_category_analysis()
+    
+    # for category, data in category_analysis.items():
+    #     st.write(f"**{category}** (Products: {data['count']})")
+        
+    #     avg_diffs = data['avg_price_diff']
+    #     if avg_diffs:
+    #         st.write("Average price differences:")
+    #         for platform, diff in avg_diffs.items():
+    #             if diff is not None:
+    #                 st.write(f"- {platform.capitalize()}: ₹{diff:.2f}")
+    
+    # Downloads are served from a file rather than inlined into the page
+    st.markdown("### Download Results")
+    with open(export_csv(data_hash, result_df), "rb") as f:
+        st.download_button("Download Matching Results (CSV)", f, file_name="product_matches.csv", mime="text/csv")
+    # st.download_button("Download Price Analysis (CSV)", ...)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
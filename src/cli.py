@@ -0,0 +1,349 @@
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+import zlib
+
+import pandas as pd
+
+from config import PLATFORM_NAMES, ConfigError, add_config_arguments, config_from_args, describe
+from log_config import setup_logging
+from query_plan import build_query_plans, plan_summary, save_plans
+from clustering import cluster_plans, cluster_rows
+from scrapers.replay import RECORD, REPLAY, Archive, archive_from_env
+from utils import load_data, save_data
+
+logger = logging.getLogger("ProductMatcher.cli")
+
+DEFAULT_INPUT = "data/sample_input.csv"
+DEFAULT_OUTPUT = "data/result.csv"
+# Rows matched per chunk; each finished chunk is checkpointed so --resume can pick up after it
+CHUNK_SIZE = 200
+
+
+class Progress:
+    """Live SKUs/min, ETA and per-platform match rates, fed by ProductMatcher's progress callback.
+
+    On a terminal the line is redrawn at most once a second; otherwise (cron,
+    CI) it is logged every `interval` seconds. With show=False it only counts,
+    for the final summary.
+    """
+
+    def __init__(self, skus, platforms, stream=None, interval=30.0, show=True):
+        self.skus = skus
+        self.show = show
+        self.platforms = list(platforms)
+        self.stream = stream or sys.stderr
+        self.live = self.stream.isatty()
+        self.interval = 1.0 if self.live else interval
+        self.rows = {platform: 0 for platform in self.platforms}
+        self.matched = {platform: 0 for platform in self.platforms}
+        self.start = time.monotonic()
+        self._last = self.start
+        self._lock = threading.Lock()
+
+    def __call__(self, platform, rows, matched):
+        with self._lock:
+            self.rows[platform] += rows
+            self.matched[platform] += matched
+            now = time.monotonic()
+            if now - self._last < self.interval:
+                return
+            self._last = now
+            line = self.line()
+        self._write(line)
+
+    def _write(self, line):
+        if not self.show:
+            return
+        if self.live:
+            self.stream.write(f"\r\033[K{line}")
+            self.stream.flush()
+        else:
+            logger.info(line)
+
+    def done(self):
+        """SKUs finished on every platform so far"""
+        return sum(self.rows.values()) / len(self.platforms) if self.platforms else 0
+
+    def rate(self):
+        elapsed = time.monotonic() - self.start
+        return self.done() / elapsed * 60 if elapsed > 0 else 0.0
+
+    def match_rates(self):
+        return {
+            platform: (self.matched[platform] / self.rows[platform]) if self.rows[platform] else None
+            for platform in self.platforms
+        }
+
+    def line(self):
+        rate = self.rate()
+        remaining = self.skus - self.done()
+        eta = _duration(remaining / rate * 60) if rate else "?"
+        rates = " ".join(
+            f"{platform} {'-' if value is None else f'{value:.0%}'}" for platform, value in self.match_rates().items()
+        )
+        return f"{self.done():.0f}/{self.skus} SKUs | {rate:.1f} SKUs/min | ETA {eta} | matched: {rates}"
+
+    def finish(self):
+        if self.show and self.live:
+            self.stream.write(f"\r\033[K{self.line()}\n")
+            self.stream.flush()
+
+
+def _duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+def parse_shard(value):
+    """"i/N" -> (i, N) with 1 <= i <= N"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, e.g. 2/4, got {value!r}")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"shard {value} is out of range (1 <= i <= N)")
+    return index, count
+
+
+def _row_keys(df):
+    return df['SPIN ID'].astype(str) if 'SPIN ID' in df.columns else pd.Series(df.index.astype(str), index=df.index)
+
+
+def select_shard(df, index, count, platforms):
+    """Rows of shard index out of count.
+
+    Rows are assigned by a hash of their variant cluster's first SPIN ID, so
+    every machine computes the same split from the same input and variants
+    that share a search (see clustering) stay on one machine.
+    """
+    if count == 1:
+        return df
+    keys = _row_keys(df)
+    clusters = cluster_rows(build_query_plans(df, platforms))
+    cluster_keys = keys.iloc[clusters.to_numpy()].to_numpy()
+    shard = [zlib.crc32(str(key).encode('utf-8')) % count for key in cluster_keys]
+    return df[[value == index - 1 for value in shard]]
+
+
+def cluster_chunks(df, chunk_size, platforms):
+    """Split df into chunks of about chunk_size rows without splitting a variant cluster.
+
+    Cluster members share their first-tier search only within one
+    process_frame call, so each cluster goes whole into one chunk (a cluster
+    larger than chunk_size gets a chunk of its own). Clusters follow the
+    order of their first row.
+    """
+    members = {}
+    for position, cluster in enumerate(cluster_rows(build_query_plans(df, platforms)) if len(df) else []):
+        members.setdefault(cluster, []).append(position)
+    chunks, chunk = [], []
+    for positions in members.values():
+        if chunk and len(chunk) + len(positions) > chunk_size:
+            chunks.append(df.iloc[chunk])
+            chunk = []
+        chunk.extend(positions)
+    if chunk:
+        chunks.append(df.iloc[chunk])
+    return chunks
+
+
+def _partial_path(output):
+    return f"{output}.partial.csv"
+
+
+def _read_partial(path):
+    # Everything as text so "N/A" and ids survive the round trip unchanged
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def dry_run(df, platforms, config, stream=None):
+    """Print the query plans (and variant clusters) the run would use, without fetching anything"""
+    stream = stream or sys.stdout
+    plans = build_query_plans(df, platforms)
+    if config.cluster_variants:
+        plans = cluster_plans(plans, platforms)
+    keys = _row_keys(df)
+    for index, row in plans.iterrows():
+        # A cluster is named after its first row
+        cluster = f" [cluster {keys.iloc[row['cluster']]}]" if row.get('cluster_size', 1) > 1 else ""
+        stream.write(f"{keys.loc[index]}  {df.at[index, 'Item Name']}{cluster}\n")
+        for platform in platforms:
+            stream.write(f"    {platform}: {' | '.join(row[f'{platform}_queries'])}\n")
+    for platform, summary in plan_summary(plans, platforms).items():
+        stream.write(f"{platform}: {summary}\n")
+    return plans
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Match Instamart SKUs on Amazon, Blinkit and Zepto",
+        epilog="Split a catalog across machines with --shard 1/3, --shard 2/3 and --shard 3/3.",
+    )
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT, help=f"input CSV/Parquet (default: {DEFAULT_INPUT})")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help=f"result file; .parquet/.arrow/.feather for typed output (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("--platforms", type=lambda value: [p.strip() for p in value.split(',') if p.strip()],
+                        help="comma-separated platforms (default: the config's enabled platforms)")
+    parser.add_argument("--locations", type=lambda value: [p.strip() for p in value.split(',') if p.strip()],
+                        help="comma-separated pincodes or cities to price location-dependent platforms in")
+    parser.add_argument("--shard", type=parse_shard, default=(1, 1), metavar="i/N",
+                        help="process only the i-th of N deterministic slices of the input")
+    parser.add_argument("--limit", type=int, help="process at most this many SKUs (after sharding)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                        help=f"SKUs per checkpointed chunk (default: {CHUNK_SIZE})")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip SKUs already checkpointed by an interrupted run with the same output")
+    parser.add_argument("--dry-run", action="store_true", help="print the query plans and exit without scraping")
+    parser.add_argument("--daily-budget", type=int, metavar="REQUESTS",
+                        help="check only the SKUs most likely to have changed, within this many requests a day "
+                             "(shorthand for --set daily_request_budget=REQUESTS)")
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument("--record", metavar="ARCHIVE", help="record every response to a .har.gz archive")
+    archive.add_argument("--replay", metavar="ARCHIVE", help="replay a recorded archive without network")
+    parser.add_argument("--no-progress", action="store_true", help="no progress line")
+    parser.add_argument("-v", "--verbose", action="store_true", help="also log to the terminal while the progress line is shown")
+    return add_config_arguments(parser)
+
+
+def _archive(args):
+    if args.record:
+        return Archive(args.record, RECORD)
+    if args.replay:
+        return Archive(args.replay, REPLAY)
+    # SCRAPER_ARCHIVE / SCRAPER_ARCHIVE_MODE still work for scripts that set them
+    return archive_from_env()
+
+
+def run(args, config, stream=None):
+    """Process the selected SKUs chunk by chunk; return the run summary"""
+    # Imported here so --help and --dry-run never load the scraper stack
+    from MAIN2 import ProductMatcher
+
+    started = time.monotonic()
+    platforms = args.platforms or config.enabled_platforms()
+    df = load_data(args.input)
+    total = len(df)
+    df = select_shard(df, *args.shard, platforms)
+    if args.limit is not None:
+        df = df.head(args.limit)
+    selected = df
+
+    partial = _partial_path(args.output)
+    resumed = 0
+    if args.resume and os.path.exists(partial):
+        finished = set(_read_partial(partial).get('SPIN ID', []))
+        remaining = df[~_row_keys(df).isin(finished)]
+        resumed, df = len(df) - len(remaining), remaining
+        logger.info(f"Resuming from {partial}: {resumed} SKUs already done, {len(df)} to go")
+    elif os.path.exists(partial):
+        logger.info(f"Discarding checkpoint {partial} of an earlier run (use --resume to continue it)")
+        os.remove(partial)
+
+    progress = Progress(len(df), platforms, stream, show=not args.no_progress)
+    matcher = ProductMatcher(platforms=platforms, locations=args.locations, archive=_archive(args),
+                             config=config, progress=progress)
+    # With a request budget only the SKUs most likely to have changed are checked, chosen across all chunks
+    matcher.schedule(df)
+    plans = []
+    try:
+        for frame in cluster_chunks(df, args.chunk_size, platforms):
+            chunk = matcher.process_frame(frame)
+            plans.append(matcher.query_plans)
+            chunk.to_csv(partial, mode='a', header=not os.path.exists(partial), index=False)
+            matcher.save_state()
+    finally:
+        matcher.close()
+        progress.finish()
+
+    if os.path.exists(partial):
+        result = _read_partial(partial)
+        if 'SPIN ID' in result.columns:
+            # Chunks follow clusters; put the rows back in input order
+            order = {key: position for position, key in enumerate(_row_keys(selected))}
+            result = result.sort_values('SPIN ID', key=lambda keys: keys.map(order), kind='stable', ignore_index=True)
+        save_data(result, args.output)
+        os.remove(partial)
+    else:
+        result = pd.DataFrame()
+    if plans:
+        save_plans(pd.concat(plans), f"{os.path.splitext(args.output)[0]}_query_plan.json")
+
+    elapsed = time.monotonic() - started
+    processed = len(df)
+    return {
+        'input_rows': total,
+        'shard': f"{args.shard[0]}/{args.shard[1]}",
+        'processed': processed,
+        'resumed': resumed,
+        'output_rows': len(result),
+        'seconds': round(elapsed, 1),
+        'skus_per_minute': round(processed / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        'match_rates': {platform: None if rate is None else round(rate, 3)
+                        for platform, rate in progress.match_rates().items()},
+        'search_pages': matcher.search_pages,
+        'product_pages': matcher.product_pages,
+    }
+
+
+def print_summary(summary, output, stream=None):
+    stream = stream or sys.stdout
+    stream.write(
+        f"Processed {summary['processed']} SKUs (shard {summary['shard']} of {summary['input_rows']} input rows) "
+        f"in {_duration(summary['seconds'])}: {summary['skus_per_minute']} SKUs/min\n"
+    )
+    if summary['resumed']:
+        stream.write(f"  {summary['resumed']} SKUs were already done by an earlier run\n")
+    for platform, pages in summary['search_pages'].items():
+        rate = summary['match_rates'].get(platform)
+        stream.write(f"  {platform}: {'-' if rate is None else f'{rate:.0%}'} matched, {pages} search pages, "
+                     f"{summary['product_pages'][platform]} product pages\n")
+    stream.write(f"Wrote {summary['output_rows']} rows to {output}\n")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.daily_budget is not None:
+        args.overrides.append(f"daily_request_budget={args.daily_budget}")
+    try:
+        config = config_from_args(args)
+    except ConfigError as e:
+        parser.error(str(e))
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.limit is not None and args.limit < 0:
+        parser.error("--limit must not be negative")
+    unknown = set(args.platforms or []) - set(PLATFORM_NAMES)
+    if unknown:
+        parser.error(f"unknown platforms: {', '.join(sorted(unknown))} (expected {', '.join(PLATFORM_NAMES)})")
+
+    if args.dry_run:
+        platforms = args.platforms or config.enabled_platforms()
+        df = select_shard(load_data(args.input), *args.shard, platforms)
+        dry_run(df if args.limit is None else df.head(args.limit), platforms, config)
+        return 0
+
+    # The progress line owns the terminal; log records still go to the log file
+    setup_logging(console=args.verbose or args.no_progress or not sys.stderr.isatty())
+    logger.info(f"Pipeline settings ({config.preset or 'no preset'}): {describe(config)}")
+    try:
+        summary = run(args, config)
+    except KeyboardInterrupt:
+        logger.warning(f"Interrupted; rerun with --resume to continue from {_partial_path(args.output)}")
+        return 130
+    except Exception as e:
+        logger.critical(f"Run failed: {str(e)}", exc_info=True)
+        return 1
+    logger.info(f"Run summary: {summary}")
+    print_summary(summary, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import re
+
+import pandas as pd
+
+from query_plan import PLATFORM_TIERS, TIERS, is_variant_token
+
+# Minimum Jaccard similarity of two names' core tokens to put them in one cluster
+SIMILARITY_THRESHOLD = 0.8
+
+
+def core_tokens(clean_name):
+    """A cleaned name's tokens without the colour/size/number tokens that tell variants apart"""
+    return tuple(token for token in re.split(r'[\s_]+', clean_name) if token and not is_variant_token(token))
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def cluster_rows(plans, threshold=SIMILARITY_THRESHOLD):
+    """Cluster id per plan row: rows whose core tokens are at least `threshold` Jaccard-similar.
+
+    Only rows with the same brand are compared, and rows with identical core
+    tokens are compared once, so the pairwise work stays small even for large
+    catalogs. Clusters are transitive (single linkage); a cluster's id is the
+    position of its first row.
+    """
+    cores = plans['clean_name'].map(core_tokens)
+    parent = {}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    first_row = {}
+    for position, (brand, core) in enumerate(zip(plans['brand'], cores)):
+        key = (brand, frozenset(core))
+        if key not in parent:
+            parent[key] = key
+            first_row[key] = position
+
+    by_brand = {}
+    for brand, core in parent:
+        by_brand.setdefault(brand, []).append(core)
+    for brand, distinct in by_brand.items():
+        for i, a in enumerate(distinct):
+            for b in distinct[i + 1:]:
+                if _jaccard(a, b) >= threshold:
+                    root_a, root_b = find((brand, a)), find((brand, b))
+                    if root_a != root_b:
+                        # Keep the root that appears first so cluster ids follow input order
+                        if first_row[root_b] < first_row[root_a]:
+                            root_a, root_b = root_b, root_a
+                        parent[root_b] = root_a
+
+    return pd.Series(
+        [first_row[find((brand, frozenset(core)))] for brand, core in zip(plans['brand'], cores)],
+        index=plans.index,
+    )
+
+
+def _shared_tiers(members):
+    """Cluster-level versions of the tiers: the words all members' names share and, if they agree, their UOM"""
+    first = re.split(r'[\s_]+', members['clean_name'].iloc[0])
+    common = set(first)
+    for name in members['clean_name'].iloc[1:]:
+        common &= set(re.split(r'[\s_]+', name))
+    shared_name = ' '.join(token for token in dict.fromkeys(first) if token in common)
+    uoms = members['uom_query'].unique()
+    uom = uoms[0] if len(uoms) == 1 else ''
+    brand_type = members['brand_type'].iloc[0]
+    return {
+        'exact': ' '.join(part for part in (shared_name, uom) if part),
+        'brand_type_uom': ' '.join(part for part in (brand_type, uom) if part),
+        'brand_type': brand_type,
+    }
+
+
+def cluster_plans(plans, platforms, threshold=SIMILARITY_THRESHOLD):
+    """Share one search across variant rows of the same product.
+
+    Rows are clustered with cluster_rows(). Every member of a multi-row
+    cluster starts from the cluster's version of the platform's first tier
+    (e.g. the name without the shade and size that differ between members),
+    followed by its own queries. All members
+    then share that one search page and each scores the candidates against
+    its own name and UOM; only members that are not confident yet go on to
+    their own, more specific queries. Adds `cluster` and `cluster_size`
+    columns.
+    """
+    plans = plans.copy()
+    plans['cluster'] = cluster_rows(plans, threshold)
+    plans['cluster_size'] = plans.groupby('cluster')['cluster'].transform('size')
+
+    clustered = plans[plans['cluster_size'] > 1]
+    shared = {cluster: _shared_tiers(members) for cluster, members in clustered.groupby('cluster')}
+    for platform in platforms:
+        column = f"{platform}_queries"
+        first_tier = PLATFORM_TIERS.get(platform, TIERS)[0]
+        for index, cluster in clustered['cluster'].items():
+            queries = plans.at[index, column]
+            query = shared[cluster][first_tier]
+            if query and queries[:1] != (query,):
+                plans.at[index, column] = (query,) + tuple(q for q in queries if q != query)
+    return plans
+
+
+def batch_groups(groups, batch_size):
+    """Split (queries, rows) groups into batches of up to batch_size groups, keeping groups that share a first query together.
+
+    A cluster's members all start with its shared query, so keeping them in one
+    batch lets that search run once. Groups are ordered by the first
+    appearance of their first query; a cluster with more than batch_size
+    distinct plans is split over batches of its own.
+    """
+    bundles = {}
+    for queries, rows in groups:
+        bundles.setdefault(queries[:1], []).append((queries, rows))
+
+    batches, batch = [], []
+    for bundle in bundles.values():
+        if batch and len(batch) + len(bundle) > batch_size:
+            batches.append(batch)
+            batch = []
+        while len(bundle) > batch_size:
+            batches.append(bundle[:batch_size])
+            bundle = bundle[batch_size:]
+        batch.extend(bundle)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def first_tier_searches(queries, batch_size):
+    """First-tier search pages for a platform's plan queries: one per distinct first query within each batch"""
+    groups = [(plan, None) for plan in dict.fromkeys(queries)]
+    return sum(len({plan[0] for plan, _ in batch if plan}) for batch in batch_groups(groups, batch_size))
+
+
+def cluster_summary(plans, clustered, platforms, batch_size):
+    """Cluster count and first-tier search pages saved per platform, from the plans before and after clustering"""
+    summary = {
+        'rows': len(clustered),
+        'clusters': int(clustered['cluster'].nunique()),
+        'clustered_rows': int((clustered['cluster_size'] > 1).sum()),
+    }
+    for platform in platforms:
+        before = first_tier_searches(plans[f"{platform}_queries"], batch_size)
+        after = first_tier_searches(clustered[f"{platform}_queries"], batch_size)
+        summary[platform] = {'first_tier_searches': after, 'saved': before - after}
+    return summary
@@ -0,0 +1,363 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field, is_dataclass
+from typing import Dict, List, Optional, Union, get_args, get_origin, get_type_hints
+
+# Pipeline settings file, preset and per-setting overrides read from the environment
+CONFIG_ENV = "PIPELINE_CONFIG"
+PRESET_ENV = "PIPELINE_PRESET"
+# PIPELINE__MAX_WORKERS=4, PIPELINE__PLATFORMS__AMAZON__CONCURRENCY=2, ...
+OVERRIDE_PREFIX = "PIPELINE__"
+
+PLATFORM_NAMES = ('amazon', 'blinkit', 'zepto')
+BACKENDS = ('selenium', 'playwright')
+WAIT_STAGES = ('home', 'search', 'product')
+
+_TRUE = ('1', 'true', 'yes', 'on')
+_FALSE = ('0', 'false', 'no', 'off')
+
+
+class ConfigError(ValueError):
+    """A pipeline setting is unknown, has the wrong type or an invalid value"""
+    pass
+
+
+@dataclass
+class PlatformSettings:
+    """How hard, and how patiently, one platform is scraped"""
+
+    enabled: bool = True
+    # Batches searched on this platform at the same time, in the platform's own worker pool
+    concurrency: int = 10
+    # Random pause before each batch is submitted
+    min_delay: float = 2.0
+    max_delay: float = 5.0
+    # Pause after every plain HTTP page fetch
+    request_delay: float = 2.0
+    request_timeout: float = 30.0
+    page_load_timeout: float = 30.0
+    # Attempts at loading a browser page before giving up on it
+    load_retries: int = 3
+    # Upper bound per page-state wait (home/search/product) until learned timings take over;
+    # stages left out keep the scraper's own default
+    wait_timeouts: Dict[str, float] = field(default_factory=dict)
+    # Browser backend for browser platforms; None keeps SCRAPER_BROWSER_BACKEND (selenium)
+    backend: Optional[str] = None
+
+    def errors(self, prefix):
+        errors = []
+        if self.concurrency < 1:
+            errors.append(f"{prefix}concurrency must be at least 1")
+        if not 0 <= self.min_delay <= self.max_delay:
+            errors.append(f"{prefix}min_delay must be between 0 and max_delay")
+        if self.request_delay < 0:
+            errors.append(f"{prefix}request_delay must not be negative")
+        for name in ('request_timeout', 'page_load_timeout'):
+            if getattr(self, name) <= 0:
+                errors.append(f"{prefix}{name} must be positive")
+        if self.load_retries < 1:
+            errors.append(f"{prefix}load_retries must be at least 1")
+        for stage, timeout in self.wait_timeouts.items():
+            if stage not in WAIT_STAGES:
+                errors.append(f"{prefix}wait_timeouts has unknown stage {stage!r} (expected one of {WAIT_STAGES})")
+            elif timeout <= 0:
+                errors.append(f"{prefix}wait_timeouts.{stage} must be positive")
+        if self.backend is not None and self.backend not in BACKENDS:
+            errors.append(f"{prefix}backend must be one of {BACKENDS}")
+        return errors
+
+
+@dataclass
+class HttpSettings:
+    """Connection pool and transport retries of the per-thread HTTP sessions"""
+
+    pool_connections: int = 4
+    pool_maxsize: int = 2
+    max_retries: int = 3
+    backoff_factor: float = 0.5
+
+    def errors(self, prefix):
+        errors = [f"{prefix}{name} must be at least 1" for name in ('pool_connections', 'pool_maxsize')
+                  if getattr(self, name) < 1]
+        errors += [f"{prefix}{name} must not be negative" for name in ('max_retries', 'backoff_factor')
+                   if getattr(self, name) < 0]
+        return errors
+
+
+@dataclass
+class CacheSettings:
+    """How long a search that found nothing is skipped (see negative_cache)"""
+
+    miss_ttl_days: float = 1.0
+    miss_max_ttl_days: float = 30.0
+
+    def errors(self, prefix):
+        if not 0 < self.miss_ttl_days <= self.miss_max_ttl_days:
+            return [f"{prefix}miss_ttl_days must be positive and at most miss_max_ttl_days"]
+        return []
+
+
+def _default_platforms():
+    return {platform: PlatformSettings() for platform in PLATFORM_NAMES}
+
+
+@dataclass
+class PipelineConfig:
+    """Every throughput setting of a ProductMatcher run.
+
+    Built by load_config() from the defaults, an optional preset, a JSON file,
+    PIPELINE__* environment variables and command-line overrides, in that
+    order, and validated once before the run starts.
+    """
+
+    preset: Optional[str] = None
+    # Upper bound on any one platform's batch workers (see PlatformSettings.concurrency)
+    max_workers: int = 10
+    batch_size: int = 10
+    # Retries of a whole platform batch, and the pause between them
+    max_retries: int = 3
+    retry_delay: float = 5.0
+    cluster_variants: bool = True
+    locations: List[str] = field(default_factory=list)
+    # Requests a day to spend on the SKUs most likely to have changed (see scheduler); None checks every SKU
+    daily_request_budget: Optional[int] = None
+    runs_per_day: int = 1
+    # Input column holding our own price, which undercut alerts compare against
+    reference_column: str = "instamart_sale_price"
+    http: HttpSettings = field(default_factory=HttpSettings)
+    cache: CacheSettings = field(default_factory=CacheSettings)
+    platforms: Dict[str, PlatformSettings] = field(default_factory=_default_platforms)
+
+    def enabled_platforms(self):
+        return [platform for platform, settings in self.platforms.items() if settings.enabled]
+
+    def validate(self):
+        """Raise ConfigError listing every invalid setting"""
+        errors = [f"{name} must be at least 1" for name in ('max_workers', 'batch_size', 'runs_per_day')
+                  if getattr(self, name) < 1]
+        if self.daily_request_budget is not None and self.daily_request_budget < 1:
+            errors.append("daily_request_budget must be at least 1")
+        errors += [f"{name} must not be negative" for name in ('max_retries', 'retry_delay') if getattr(self, name) < 0]
+        if not self.reference_column.strip():
+            errors.append("reference_column must not be empty")
+        if self.preset is not None and self.preset not in PRESETS:
+            errors.append(f"unknown preset {self.preset!r} (expected one of {sorted(PRESETS)})")
+        if not self.enabled_platforms():
+            errors.append("at least one platform must be enabled")
+        errors += self.http.errors("http.")
+        errors += self.cache.errors("cache.")
+        for platform, settings in self.platforms.items():
+            errors += settings.errors(f"platforms.{platform}.")
+        if errors:
+            raise ConfigError("Invalid pipeline config: " + "; ".join(errors))
+        return self
+
+    def to_dict(self):
+        return asdict(self)
+
+
+# Named starting points; a file, the environment and the command line can still change any setting
+PRESETS = {
+    # One machine on a home connection: short pauses and timeouts, fail fast
+    "fast-local": {
+        "max_workers": 16,
+        "batch_size": 20,
+        "max_retries": 1,
+        "retry_delay": 1,
+        "http": {"pool_maxsize": 4, "max_retries": 1, "backoff_factor": 0.2},
+        "platforms": {
+            "amazon": {"concurrency": 8, "min_delay": 0, "max_delay": 0.5, "request_delay": 0.2,
+                       "request_timeout": 15},
+            "blinkit": {"concurrency": 4, "min_delay": 0, "max_delay": 0.5, "page_load_timeout": 20,
+                        "load_retries": 2},
+            "zepto": {"concurrency": 4, "min_delay": 0, "max_delay": 0.5, "page_load_timeout": 20,
+                      "load_retries": 2},
+        },
+    },
+    # Scheduled production runs: few requests in flight per site, long pauses, patient retries
+    "polite-production": {
+        "max_workers": 6,
+        "batch_size": 10,
+        "max_retries": 3,
+        "retry_delay": 15,
+        "http": {"max_retries": 5, "backoff_factor": 1.0},
+        "cache": {"miss_ttl_days": 2},
+        "platforms": {
+            "amazon": {"concurrency": 2, "min_delay": 3, "max_delay": 8, "request_delay": 4,
+                       "request_timeout": 45},
+            "blinkit": {"concurrency": 2, "min_delay": 3, "max_delay": 8, "page_load_timeout": 45},
+            "zepto": {"concurrency": 2, "min_delay": 3, "max_delay": 8, "page_load_timeout": 45},
+        },
+    },
+}
+
+
+def _convert(value, kind, name):
+    """value (from JSON or an environment/command-line string) as a kind, or ConfigError"""
+    if get_origin(kind) is Union:
+        if value is None or (isinstance(value, str) and value.lower() in ('', 'none', 'null')):
+            return None
+        kind = next(arg for arg in get_args(kind) if arg is not type(None))
+    if get_origin(kind) is list:
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(',') if item.strip()]
+        if not isinstance(value, list):
+            raise ConfigError(f"{name} must be a list")
+        return [_convert(item, get_args(kind)[0], name) for item in value]
+    if kind is bool:
+        if isinstance(value, str) and value.lower() in _TRUE + _FALSE:
+            return value.lower() in _TRUE
+        if isinstance(value, bool):
+            return value
+    elif kind in (int, float):
+        if isinstance(value, str):
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            try:
+                if kind is float or float(value).is_integer():
+                    return kind(value)
+            except (OverflowError, ValueError) as e:
+                raise ConfigError(f"{name} must be {kind.__name__}, got {value!r}: {e}") from e
+    elif kind is str and isinstance(value, str):
+        return value
+    raise ConfigError(f"{name} must be {getattr(kind, '__name__', kind)}, got {value!r}")
+
+
+def _apply(target, data, prefix=""):
+    """Set the settings in a (nested) mapping on a config dataclass, converting each value"""
+    if isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except ValueError:
+            pass
+    if not isinstance(data, dict):
+        raise ConfigError(f"{prefix.rstrip('.') or 'config'} must be a mapping")
+    hints = get_type_hints(type(target))
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if key not in hints:
+            raise ConfigError(f"Unknown setting: {name}")
+        kind = hints[key]
+        current = getattr(target, key)
+        if is_dataclass(current):
+            _apply(current, value, f"{name}.")
+        elif get_origin(kind) is dict:
+            value_kind = get_args(kind)[1]
+            if isinstance(value, str) and value.strip().startswith('{'):
+                try:
+                    value = json.loads(value)
+                except ValueError as e:
+                    raise ConfigError(f"{name} must be a JSON mapping, got {value!r}: {e}") from e
+            if not isinstance(value, dict):
+                raise ConfigError(f"{name} must be a mapping")
+            for sub_key, sub_value in value.items():
+                if is_dataclass(value_kind):
+                    if sub_key not in current:
+                        raise ConfigError(f"Unknown platform: {name}.{sub_key}")
+                    _apply(current[sub_key], sub_value, f"{name}.{sub_key}.")
+                else:
+                    current[sub_key] = _convert(sub_value, value_kind, f"{name}.{sub_key}")
+        else:
+            setattr(target, key, _convert(value, kind, name))
+
+
+def _nest(path, value):
+    """{'a': {'b': value}} for the path ['a', 'b']"""
+    for key in reversed(path):
+        value = {key: value}
+    return value
+
+
+def env_overrides(environ=None):
+    """Nested overrides from PIPELINE__SECTION__SETTING=value variables, in name order"""
+    environ = os.environ if environ is None else environ
+    return [
+        _nest(key[len(OVERRIDE_PREFIX):].lower().split('__'), value)
+        for key, value in sorted(environ.items()) if key.startswith(OVERRIDE_PREFIX)
+    ]
+
+
+def parse_overrides(assignments):
+    """Nested overrides from "section.setting=value" strings (e.g. platforms.amazon.concurrency=2)"""
+    overrides = []
+    for assignment in assignments:
+        key, sep, value = assignment.partition('=')
+        if not sep or not key.strip():
+            raise ConfigError(f"Expected SETTING=VALUE, got {assignment!r}")
+        overrides.append(_nest(key.strip().split('.'), value.strip()))
+    return overrides
+
+
+def _read_file(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except OSError as e:
+        raise ConfigError(f"Cannot read config file {path}: {e}") from e
+    except ValueError as e:
+        raise ConfigError(f"Config file {path} is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ConfigError(f"Config file {path} must hold a JSON object")
+    return data
+
+
+def load_config(path=None, preset=None, overrides=(), environ=None):
+    """Build and validate the pipeline config.
+
+    Later sources win: defaults, then the preset (argument, PIPELINE_PRESET or
+    the file's "preset" key), the JSON file (argument or PIPELINE_CONFIG), the
+    PIPELINE__* environment variables and finally `overrides`
+    ("section.setting=value" strings, e.g. from --set).
+    """
+    environ = os.environ if environ is None else environ
+    path = path or environ.get(CONFIG_ENV)
+    data = _read_file(path) if path else {}
+    file_preset = data.pop('preset', None)
+    preset = preset or environ.get(PRESET_ENV) or file_preset
+
+    config = PipelineConfig()
+    if preset:
+        if preset not in PRESETS:
+            raise ConfigError(f"Unknown preset {preset!r} (expected one of {sorted(PRESETS)})")
+        _apply(config, PRESETS[preset])
+        config.preset = preset
+    _apply(config, data)
+    for override in env_overrides(environ) + parse_overrides(overrides):
+        _apply(config, override)
+    return config.validate()
+
+
+def add_config_arguments(parser):
+    """Add --config, --preset and --set to an argparse parser"""
+    group = parser.add_argument_group("pipeline settings")
+    group.add_argument("--config", help=f"JSON settings file (default: ${CONFIG_ENV})")
+    group.add_argument("--preset", choices=sorted(PRESETS), help=f"start from a named preset (default: ${PRESET_ENV})")
+    group.add_argument("--set", dest="overrides", action="append", default=[], metavar="SETTING=VALUE",
+                       help="override one setting, e.g. platforms.amazon.concurrency=2 (repeatable)")
+    return parser
+
+
+def config_from_args(args):
+    return load_config(args.config, args.preset, args.overrides)
+
+
+def describe(config):
+    """One-line summary of the settings that differ from the defaults, for the run log"""
+    changed = _diff(asdict(PipelineConfig()), config.to_dict())
+    return json.dumps(changed, sort_keys=True) if changed else "defaults"
+
+
+def _diff(default, actual):
+    changed = {}
+    for key, value in actual.items():
+        if isinstance(value, dict) and isinstance(default.get(key), dict):
+            nested = _diff(default[key], value)
+            if nested:
+                changed[key] = nested
+        elif default.get(key) != value:
+            changed[key] = value
+    return changed
+
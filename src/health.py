@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from scrapers.base_scraper import CaptchaError, ProductNotFoundError
+
+logger = logging.getLogger("ProductMatcher.health")
+
+# Outcomes of one scraper call
+OK = "ok"
+EMPTY = "empty"      # the page loaded but nothing could be parsed from it
+ERROR = "error"
+CAPTCHA = "captcha"
+
+# Circuit states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def search_outcome(candidates):
+    """Outcome of one search: pages that failed to load are ERROR, pages that parsed to nothing EMPTY.
+
+    A site's own "no results" page is a normal miss (OK); see SearchResults.
+    """
+    if getattr(candidates, "failed", False):
+        return ERROR
+    return EMPTY if getattr(candidates, "unparsed", False) else OK
+
+
+def search_outcomes(candidate_lists):
+    """Outcome per search of a batch (see search_outcome)"""
+    return [search_outcome(candidates) for candidates in candidate_lists]
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a platform whose circuit breaker is open"""
+
+    def __init__(self, platform):
+        super().__init__(f"{platform} circuit is open")
+        self.platform = platform
+
+
+class PlatformHealth:
+    """Sliding-window health of one platform with a circuit breaker.
+
+    The circuit opens on a captcha page, or once the last `window` calls
+    (at least `min_calls` of them) have an error rate of `max_error_rate` or
+    an empty-parse rate of `max_empty_rate` (selectors broken after a site
+    deploy). While open, calls are rejected without touching the site. After
+    `cooldown` seconds one probe call is let through (half-open): success
+    closes the circuit, failure reopens it with the cooldown doubled, up to
+    `max_cooldown`.
+    """
+
+    def __init__(self, platform, window=30, min_calls=10, max_error_rate=0.5,
+                 max_empty_rate=0.9, cooldown=60, max_cooldown=600):
+        self.platform = platform
+        self.window = deque(maxlen=window)
+        self.min_calls = min_calls
+        self.max_error_rate = max_error_rate
+        self.max_empty_rate = max_empty_rate
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self.counts = {OK: 0, EMPTY: 0, ERROR: 0, CAPTCHA: 0}
+        self.rejected = 0
+        self.trips = 0
+        self.recoveries = 0
+
+    def allow(self, now=None):
+        """True if a call may go to the platform now; an open circuit lets one probe through after its cooldown"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and now - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                logger.info(f"{self.platform}: circuit half-open, sending probe")
+                return True
+            self.rejected += 1
+            return False
+
+    def is_open(self):
+        return self.state == OPEN
+
+    def record(self, outcome, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self.counts[outcome] += 1
+            if self.state == HALF_OPEN:
+                self._probing = False
+                if outcome in (OK, EMPTY):
+                    self._close()
+                else:
+                    self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                    self._open(now, f"probe failed ({outcome})")
+                return
+            self.window.append(outcome)
+            if self.state == CLOSED:
+                reason = self._trip_reason(outcome)
+                if reason:
+                    self._open(now, reason)
+
+    def _trip_reason(self, outcome):
+        if outcome == CAPTCHA:
+            return "captcha page"
+        calls = len(self.window)
+        if calls < self.min_calls:
+            return None
+        error_rate = sum(o in (ERROR, CAPTCHA) for o in self.window) / calls
+        if error_rate >= self.max_error_rate:
+            return f"error rate {error_rate:.0%} over last {calls} calls"
+        empty_rate = sum(o == EMPTY for o in self.window) / calls
+        if empty_rate >= self.max_empty_rate:
+            return f"empty-parse rate {empty_rate:.0%} over last {calls} calls"
+        return None
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self.opened_at = now
+        self.trips += 1
+        logger.warning(f"{self.platform}: circuit opened ({reason}); retrying in {self.cooldown:.0f}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self.cooldown = self.base_cooldown
+        self.window.clear()
+        self.recoveries += 1
+        logger.warning(f"{self.platform}: circuit closed, platform recovered")
+
+    def call(self, func, *args, outcome=None, **kwargs):
+        """Run one scraper call through the breaker and record how it went.
+
+        outcome maps the call's result to an outcome (or a list of outcomes
+        for batch calls); by default any return counts as OK.
+        """
+        if not self.allow():
+            raise CircuitOpenError(self.platform)
+        try:
+            result = func(*args, **kwargs)
+        except CaptchaError:
+            self.record(CAPTCHA)
+            raise
+        except ProductNotFoundError:
+            # The site answered properly; the product is just gone
+            self.record(OK)
+            raise
+        except Exception:
+            self.record(ERROR)
+            raise
+        outcomes = outcome(result) if outcome else OK
+        for value in ([outcomes] if isinstance(outcomes, str) else outcomes or [OK]):
+            self.record(value)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            calls = len(self.window)
+            return {
+                "state": self.state,
+                **self.counts,
+                "rejected": self.rejected,
+                "trips": self.trips,
+                "recoveries": self.recoveries,
+                "window_error_rate": round(sum(o in (ERROR, CAPTCHA) for o in self.window) / calls, 3) if calls else 0.0,
+                "window_empty_rate": round(sum(o == EMPTY for o in self.window) / calls, 3) if calls else 0.0,
+            }
+
+
+class HealthMonitor:
+    """PlatformHealth per platform, created on first use with shared settings"""
+
+    def __init__(self, **settings):
+        self.settings = settings
+        self._platforms = {}
+        self._lock = threading.Lock()
+
+    def get(self, platform):
+        with self._lock:
+            health = self._platforms.get(platform)
+            if health is None:
+                health = self._platforms[platform] = PlatformHealth(platform, **self.settings)
+        return health
+
+    def snapshot(self):
+        with self._lock:
+            platforms = dict(self._platforms)
+        return {platform: health.snapshot() for platform, health in platforms.items()}
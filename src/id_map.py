@@ -0,0 +1,66 @@
+import json
+import os
+import threading
+
+ID_MAP_FILE = "data/cache/id_map.json"
+
+
+class ProductIdMap:
+    """Persisted SPIN ID -> {platform: {"id", "confidence"}} map filled from successful matches.
+
+    Once a SKU has been matched on a platform, later runs can open the
+    product page directly from its id instead of searching again. The match
+    confidence of the search that found it is kept alongside.
+    """
+
+    def __init__(self, path=ID_MAP_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids = self._load()
+        self.direct_lookups = 0
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _entry(self, spin_id, platform):
+        entry = self._ids.get(str(spin_id), {}).get(platform)
+        # Maps written before confidences were stored hold the bare id
+        return {"id": entry, "confidence": None} if isinstance(entry, str) else entry
+
+    def get(self, spin_id, platform):
+        with self._lock:
+            entry = self._entry(spin_id, platform)
+        return entry["id"] if entry else None
+
+    def confidence(self, spin_id, platform):
+        with self._lock:
+            entry = self._entry(spin_id, platform)
+        return entry["confidence"] if entry else None
+
+    def set(self, spin_id, platform, product_id, confidence=None):
+        with self._lock:
+            self._ids.setdefault(str(spin_id), {})[platform] = {"id": product_id, "confidence": confidence}
+
+    def forget(self, spin_id, platform):
+        """Drop an id that no longer resolves to a product page"""
+        with self._lock:
+            self._ids.get(str(spin_id), {}).pop(platform, None)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def save(self):
+        """Write the map atomically so an interrupted run never leaves it half-written"""
+        with self._lock:
+            data = {spin_id: dict(ids) for spin_id, ids in self._ids.items()}
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
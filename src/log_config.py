@@ -0,0 +1,175 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from contextlib import contextmanager
+
+LOG_FILE = os.path.join("logs", "product_matcher.log")
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+# Default levels for noisy modules; LOG_LEVELS="scrapers=DEBUG,urllib3=INFO" overrides them
+MODULE_LEVELS = {
+    'selenium': 'WARNING',
+    'urllib3': 'WARNING',
+    'WDM': 'WARNING',
+}
+# Fields every record carries, taken from log_context() in the thread that logged it
+CONTEXT_FIELDS = ('sku', 'platform', 'stage')
+
+_context = {field: contextvars.ContextVar(f"log_{field}", default=None) for field in CONTEXT_FIELDS}
+_listener = None
+_queue_handler = None
+
+
+@contextmanager
+def log_context(**fields):
+    """Attach sku/platform/stage to every record logged inside the block"""
+    tokens = [(_context[field], _context[field].set(value)) for field, value in fields.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current log_context() fields onto the record.
+
+    Runs on the QueueHandler, i.e. in the thread that logged, since the
+    listener thread does not see that thread's context.
+    """
+
+    def filter(self, record):
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, _context[field].get())
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; context fields are left out when unset"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The usual console line with the context fields appended"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        context = ' '.join(
+            f"{field}={getattr(record, field)}" for field in CONTEXT_FIELDS
+            if getattr(record, field, None) is not None
+        )
+        return f"{line} [{context}]" if context else line
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that keeps the traceback apart from the message.
+
+    The stock handler folds the traceback into msg before enqueueing; here it
+    is kept in exc_text so the JSON formatter can store it as its own field.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, level = item.partition('=')
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(log_file=LOG_FILE, level=None, module_levels=None, max_bytes=MAX_BYTES,
+                  backup_count=BACKUP_COUNT, console=True):
+    """Route all logging through a queue so threads never block on file or console I/O.
+
+    Loggers only enqueue records; a listener thread writes them as JSON lines
+    to a size-rotated log_file and as text to stderr. level defaults to
+    $LOG_LEVEL (INFO); per-module levels come from MODULE_LEVELS, then
+    module_levels, then $LOG_LEVELS. Calling it again replaces the previous
+    setup.
+    """
+    global _listener, _queue_handler
+    shutdown_logging()
+
+    handlers = []
+    if log_file:
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(TextFormatter())
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = StructuredQueueHandler(log_queue)
+    _queue_handler.addFilter(ContextFilter())
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level or os.environ.get('LOG_LEVEL', 'INFO').upper())
+    levels = {**MODULE_LEVELS, **(module_levels or {}), **_parse_levels(os.environ.get('LOG_LEVELS'))}
+    for name, module_level in levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,97 @@
+import re
+
+from query_plan import COLORS, MEASURE_UNITS, STOPWORDS, UNIT_ALIASES
+
+# Escalation to a broader query stops once the best candidate reaches this
+CONFIDENCE_THRESHOLD = 0.75
+# Candidates below this are not accepted even after the last tier
+MIN_CONFIDENCE = 0.4
+
+# Weights of the confidence components; the UOM weight is dropped when the
+# SKU's UOM is not a measurable quantity (sizes, "1Piece", ...), and the
+# variant weight unless both names state a colour
+WEIGHTS = {'terms': 0.5, 'brand': 0.25, 'uom': 0.25, 'variant': 0.25}
+
+QUANTITY_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(ml|mls|l|ltr|ltrs|litre|liter|g|gm|gms|gram|grams|kg|kgs|pcs|pc|pieces|piece|pack|packs)\b'
+)
+# Conversions to a base unit so 1 kg and 1000 g compare equal
+BASE_UNITS = {'kg': ('g', 1000), 'l': ('ml', 1000)}
+
+
+def _tokens(text):
+    return re.sub(r'[\W_]+', ' ', str(text).lower()).split()
+
+
+def _normalized_quantity(quantity, unit):
+    unit = UNIT_ALIASES.get(unit, unit)
+    if unit not in MEASURE_UNITS:
+        return None
+    amount = float(quantity)
+    base, factor = BASE_UNITS.get(unit, (unit, 1))
+    return amount * factor, base
+
+
+def parse_quantities(text):
+    """All (amount, base unit) quantities stated in text, e.g. "1 kg" -> (1000.0, 'g')"""
+    quantities = []
+    for quantity, unit in QUANTITY_PATTERN.findall(str(text).lower()):
+        normalized = _normalized_quantity(quantity, unit)
+        if normalized:
+            quantities.append(normalized)
+    return quantities
+
+
+def _term_matches(term, candidate_tokens):
+    # Allow simple plural/singular differences ("slide" vs "slides")
+    return any(
+        term == token or (len(term) > 3 and len(token) > 3 and (token.startswith(term) or term.startswith(token)))
+        for token in candidate_tokens
+    )
+
+
+def match_confidence(product_name, uom, candidate_name):
+    """How well a search result's name matches the SKU, from 0 (unrelated) to 1.
+
+    Combines the share of the SKU's significant name terms found in the
+    candidate, whether the brand (first word) matches, and whether the stated
+    quantity agrees with the SKU's UOM (a conflicting quantity scores 0, an
+    unstated one half). When both names state a colour they must share one,
+    so variants found on a shared search page go to the right SKU.
+    """
+    if not candidate_name:
+        return 0.0
+    name_tokens = [token for token in _tokens(QUANTITY_PATTERN.sub(' ', str(product_name).lower()))
+                   if token not in STOPWORDS]
+    if not name_tokens:
+        return 0.0
+    candidate_tokens = _tokens(candidate_name)
+
+    scores = {
+        'terms': sum(_term_matches(term, candidate_tokens) for term in name_tokens) / len(name_tokens),
+        'brand': 1.0 if _term_matches(name_tokens[0], candidate_tokens) else 0.0,
+    }
+    wanted = parse_quantities(re.sub(r'(\d)([a-z])', r'\1 \2', str(uom).lower())) if uom else []
+    if wanted and not (wanted[0] == (1.0, 'pcs')):
+        stated = parse_quantities(candidate_name)
+        if not stated:
+            scores['uom'] = 0.5
+        else:
+            scores['uom'] = 1.0 if wanted[0] in stated else 0.0
+    wanted_colors = COLORS.intersection(name_tokens)
+    stated_colors = COLORS.intersection(candidate_tokens)
+    if wanted_colors and stated_colors:
+        scores['variant'] = 1.0 if wanted_colors & stated_colors else 0.0
+
+    total_weight = sum(WEIGHTS[key] for key in scores)
+    return round(sum(WEIGHTS[key] * score for key, score in scores.items()) / total_weight, 3)
+
+
+def best_candidate(product_name, uom, candidates):
+    """Return (candidate, confidence) for the highest-scoring candidate, or (None, 0.0)"""
+    best, best_confidence = None, 0.0
+    for candidate in candidates:
+        confidence = match_confidence(product_name, uom, candidate.get('name', ''))
+        if best is None or confidence > best_confidence:
+            best, best_confidence = candidate, confidence
+    return best, best_confidence
@@ -0,0 +1,83 @@
+import json
+import os
+import re
+import threading
+import time
+
+NEGATIVE_CACHE_FILE = "data/cache/negative_cache.json"
+DAY = 24 * 60 * 60
+
+
+def normalize_query(query):
+    """Lowercase, strip punctuation and collapse whitespace so equivalent queries share a key"""
+    query = re.sub(r'[^\w\s]', ' ', str(query).lower())
+    return re.sub(r'\s+', ' ', query).strip()
+
+
+class NegativeCache:
+    """Persisted registry of (SPIN ID, platform, query) searches that found nothing.
+
+    A miss is skipped until its re-check time. Every consecutive miss doubles
+    the wait (base_ttl, 2x, 4x, ... capped at max_ttl), so items a platform
+    clearly does not sell stop costing browser time, while occasional
+    re-checks still notice when they get listed. A hit removes the entry.
+    """
+
+    def __init__(self, path=NEGATIVE_CACHE_FILE, base_ttl=DAY, max_ttl=30 * DAY):
+        self.path = path
+        self.base_ttl = base_ttl
+        self.max_ttl = max_ttl
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self.skipped = 0
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _key(spin_id, platform, query):
+        return f"{spin_id}|{platform}|{normalize_query(query)}"
+
+    def is_known_missing(self, spin_id, platform, query, now=None):
+        """True if this search recently found nothing and is not yet due for a re-check"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(self._key(spin_id, platform, query))
+            if entry and now < entry["recheck_at"]:
+                self.skipped += 1
+                return True
+        return False
+
+    def record_miss(self, spin_id, platform, query, now=None):
+        now = time.time() if now is None else now
+        key = self._key(spin_id, platform, query)
+        with self._lock:
+            entry = self._entries.get(key) or {"misses": 0, "first_miss": now}
+            entry["misses"] += 1
+            ttl = min(self.base_ttl * 2 ** (entry["misses"] - 1), self.max_ttl)
+            entry["last_checked"] = now
+            entry["recheck_at"] = now + ttl
+            self._entries[key] = entry
+
+    def record_hit(self, spin_id, platform, query):
+        with self._lock:
+            self._entries.pop(self._key(spin_id, platform, query), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def save(self):
+        """Write the cache atomically so an interrupted run never leaves it half-written"""
+        with self._lock:
+            data = dict(self._entries)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,135 @@
+import json
+import os
+
+import pandas as pd
+
+# Search tiers from most to least specific
+TIERS = ('exact', 'brand_type_uom', 'brand_type')
+# Tiers each platform runs, in order. Blinkit's search ranks loosely, so it
+# starts from the shortened brand + type query it has always used.
+PLATFORM_TIERS = {
+    'amazon': TIERS,
+    'blinkit': ('brand_type_uom', 'brand_type'),
+    'zepto': TIERS,
+}
+
+PRODUCT_TYPES = [
+    'oil', 'shampoo', 'conditioner', 'soap', 'lotion', 'cream', 'powder', 'gel',
+    'serum', 'facewash', 'toothpaste', 'detergent', 'biscuits', 'chips', 'juice',
+    'tea', 'coffee', 'ghee', 'atta', 'rice', 'dal', 'masala', 'sauce', 'noodles',
+    'tshirt', 'shirt', 'slides', 'flip flop', 'sandals', 'sandal', 'slippers', 'shoes', 'socks',
+]
+STOPWORDS = {'with', 'and', 'for', 'the', 'a', 'an', 'in', 'on', 'by', 'to', 'of'}
+# Words that tell variants of one product apart (shade, size) rather than name the product
+COLORS = {
+    'black', 'white', 'red', 'blue', 'green', 'yellow', 'pink', 'purple', 'orange', 'brown',
+    'grey', 'gray', 'navy', 'maroon', 'beige', 'gold', 'silver', 'tan', 'olive', 'khaki',
+    'teal', 'charcoal', 'graphite', 'volt', 'lavender', 'peach', 'mint', 'turquoise', 'coral',
+    'ivory', 'mustard', 'wine', 'multicolor', 'multicolour', 'multi',
+}
+SIZE_WORDS = {'xs', 's', 'm', 'l', 'xl', 'xxl', 'xxxl', 'small', 'medium', 'large', 'uk', 'us', 'eu'}
+
+UNIT_ALIASES = {
+    'gm': 'g', 'gms': 'g', 'gram': 'g', 'grams': 'g', 'kgs': 'kg',
+    'mls': 'ml', 'ltr': 'l', 'litre': 'l', 'liter': 'l', 'ltrs': 'l',
+    'piece': 'pcs', 'pieces': 'pcs', 'pc': 'pcs', 'pack': 'pcs', 'packs': 'pcs',
+}
+# Units worth putting in a search query; sizes like "1Medium" are not
+MEASURE_UNITS = {'ml', 'l', 'g', 'kg', 'pcs'}
+QUANTITY_IN_NAME = r'\b\d+(?:\.\d+)?\s*(?:ml|mls|l|ltr|litre|g|gm|gms|kg|kgs)\b'
+
+
+def is_variant_token(token):
+    """True for colour, size and numeric tokens ("black", "xl", "uk7", "6")"""
+    return token in COLORS or token in SIZE_WORDS or any(char.isdigit() for char in token)
+
+
+def normalize_uom(uom):
+    """Split a UOM column like "100ml" / "1 Kg" / "1Piece" into (quantity, unit, query text)"""
+    parts = uom.fillna('').astype(str).str.lower().str.replace(r'\s+', '', regex=True).str.extract(
+        r'^(\d+(?:\.\d+)?)([a-z]+)$'
+    )
+    quantity = parts[0].str.replace(r'\.0+$', '', regex=True).fillna('')
+    unit = parts[1].replace(UNIT_ALIASES).fillna('')
+    measurable = unit.isin(MEASURE_UNITS) & ~((unit == 'pcs') & (quantity == '1'))
+    query = (quantity + ' ' + unit).where(measurable, '')
+    return quantity, unit, query
+
+
+def _join(*parts):
+    return pd.concat(parts, axis=1).agg(' '.join, axis=1).str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def _tier_list(tiers, row):
+    queries = []
+    for tier in tiers:
+        query = row[tier]
+        if query and query not in queries:
+            queries.append(query)
+    return tuple(queries)
+
+
+def build_query_plans(df, platforms=None):
+    """Per-row search plans for a whole input frame, computed column-wise before any search.
+
+    Returns a frame on df's index with the cleaned name, brand, product type,
+    normalized UOM (and its query text), one column per tier and, per platform, the tuple of
+    queries to try in order ({platform}_queries). Rows with equal tuples share
+    one search.
+    """
+    platforms = platforms or list(PLATFORM_TIERS)
+    names = df['Item Name'].fillna('').astype(str).str.lower()
+    clean = (
+        names.str.replace(QUANTITY_IN_NAME, ' ', regex=True)
+        .str.replace(r'[^\w\s]', ' ', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+    quantity, unit, uom_query = normalize_uom(df['UOM'] if 'UOM' in df.columns else pd.Series('', index=df.index))
+
+    tokens = clean.str.split()
+    brand = tokens.str[0].fillna('')
+    product_type = clean.str.extract(r'\b(' + '|'.join(PRODUCT_TYPES) + r')\b', expand=False).fillna('')
+    # Without a known product type, the first couple of descriptive words stand in for it
+    key_terms = tokens.map(lambda words: ' '.join([w for w in words[1:] if w not in STOPWORDS and len(w) > 2][:2]))
+    core = _join(brand, product_type.where(product_type != '', key_terms))
+
+    plans = pd.DataFrame({
+        'clean_name': clean,
+        'brand': brand,
+        'product_type': product_type,
+        'quantity': quantity,
+        'unit': unit,
+        'uom_query': uom_query,
+        'exact': _join(clean, uom_query),
+        'brand_type_uom': _join(core, uom_query),
+        'brand_type': core,
+    }, index=df.index)
+    for platform in platforms:
+        tiers = PLATFORM_TIERS.get(platform, TIERS)
+        plans[f"{platform}_queries"] = [_tier_list(tiers, row) for row in plans[list(TIERS)].to_dict('records')]
+    return plans
+
+
+def plan_summary(plans, platforms):
+    """Rows, distinct plans and the worst-case number of searches per platform"""
+    summary = {}
+    for platform in platforms:
+        distinct = plans[f"{platform}_queries"].drop_duplicates()
+        summary[platform] = {
+            'rows': len(plans),
+            'distinct_plans': len(distinct),
+            'first_tier_searches': distinct.str[0].nunique(),
+            'max_searches': int(distinct.map(len).sum()),
+        }
+    return summary
+
+
+def save_plans(plans, path):
+    """Store the plans next to a job's output so a run can be inspected or replayed"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    records = plans.reset_index().rename(columns={'index': 'row'}).to_dict('records')
+    with open(path, 'w') as f:
+        json.dump(records, f, indent=1, default=list)
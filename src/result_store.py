@@ -0,0 +1,160 @@
+import operator
+from numbers import Number
+
+import pandas as pd
+
+from scrapers.product_ids import canonicalize_url
+
+PLATFORMS = ['amazon', 'blinkit', 'zepto']
+COLUMNAR_EXTENSIONS = ('.parquet', '.arrow', '.feather')
+COMPARISONS = {
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Parquet/Arrow results: pip install pyarrow") from e
+    return pyarrow
+
+
+def is_columnar_path(file_path):
+    return str(file_path).lower().endswith(COLUMNAR_EXTENSIONS)
+
+
+def result_schema(columns):
+    """Arrow schema for a result frame with the given columns.
+
+    Prices, quantities and match confidences are float64 (missing -> null
+    instead of "N/A"), UOM columns are categorical and L1 is
+    dictionary-encoded; anything not declared here stays a string.
+    """
+    pa = _require_pyarrow()
+    category = pa.dictionary(pa.int32(), pa.string())
+    declared = {
+        'Sl No': pa.int64(),
+        'L1': category,
+        'UOM': category,
+    }
+    for platform in PLATFORMS:
+        declared[f"{platform}_mrp"] = pa.float64()
+        declared[f"{platform}_sale_price"] = pa.float64()
+        declared[f"{platform}_quantity"] = pa.float64()
+        declared[f"{platform}_match_confidence"] = pa.float64()
+        declared[f"{platform}_uom"] = category
+    return pa.schema([pa.field(column, declared.get(column, pa.string())) for column in columns])
+
+
+def canonical_product_url(platform, url):
+    """Tracking-free URL for a scraped URL, or None if there is none"""
+    if not isinstance(url, str) or not url.strip() or url == "N/A":
+        return None
+    return canonicalize_url(platform, url)
+
+
+def to_typed_frame(df):
+    """Coerce a (string-typed) result frame to the declared column types"""
+    df = df.copy()
+    for platform in PLATFORMS:
+        url_col = f"{platform}_url"
+        if url_col in df.columns:
+            position = df.columns.get_loc(url_col) + 1
+            canonical = [canonical_product_url(platform, url) for url in df[url_col]]
+            df.insert(position, f"{platform}_canonical_url", canonical)
+        for field in ('mrp', 'sale_price', 'quantity', 'match_confidence'):
+            column = f"{platform}_{field}"
+            if column in df.columns:
+                df[column] = pd.to_numeric(df[column], errors='coerce')
+        uom_col = f"{platform}_uom"
+        if uom_col in df.columns:
+            df[uom_col] = df[uom_col].replace({"N/A": None, "": None}).astype("category")
+    for column in ('L1', 'UOM'):
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    if 'Sl No' in df.columns:
+        df['Sl No'] = pd.to_numeric(df['Sl No'], errors='coerce').astype("Int64")
+    return df
+
+
+def to_arrow_table(df):
+    pa = _require_pyarrow()
+    typed = to_typed_frame(df)
+    return pa.Table.from_pandas(typed, schema=result_schema(typed.columns), preserve_index=False)
+
+
+def write_results(df, file_path):
+    """Write results as Parquet (.parquet) or Arrow IPC (.arrow/.feather)"""
+    _require_pyarrow()
+    table = to_arrow_table(df)
+    if str(file_path).lower().endswith('.parquet'):
+        import pyarrow.parquet as pq
+        pq.write_table(table, file_path, compression='zstd')
+    else:
+        import pyarrow.feather as feather
+        # Uncompressed IPC can be memory-mapped without a decode step
+        feather.write_feather(table, file_path, compression='uncompressed')
+
+
+def read_results(file_path, columns=None, filters=None):
+    """Read a columnar result file, memory-mapped, with optional column projection and filters.
+
+    filters uses the pyarrow DNF form, e.g. [("amazon_sale_price", "<", 100)].
+    """
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    if str(file_path).lower().endswith('.parquet'):
+        table = pq.read_table(file_path, columns=columns, filters=filters, memory_map=True)
+    else:
+        import pyarrow.feather as feather
+        # Zero-copy over the mapped file, so filter before projecting
+        table = feather.read_table(file_path, memory_map=True)
+        if filters:
+            table = table.filter(pq.filters_to_expression(filters))
+        if columns:
+            table = table.select(columns)
+    return table.to_pandas()
+
+
+def _filter_mask(series, op, value):
+    values = list(value) if op in ('in', 'not in') else [value]
+    if values and all(isinstance(v, Number) and not isinstance(v, bool) for v in values):
+        # CSV columns holding "N/A" load as text; compare them as numbers like the typed formats do
+        series = pd.to_numeric(series, errors='coerce')
+    if op == 'in':
+        return series.isin(values)
+    if op == 'not in':
+        return series.notna() & ~series.isin(values)
+    if op not in COMPARISONS:
+        raise ValueError(f"Unsupported filter operator: {op!r}")
+    # Missing values never match, as with pyarrow filters
+    return series.notna() & COMPARISONS[op](series, value).fillna(False).astype(bool)
+
+
+def filter_frame(df, filters):
+    """Apply pyarrow DNF filters to an in-memory frame (used for CSV inputs).
+
+    A flat list of (column, op, value) tuples is ANDed; a list of such lists
+    is ORed, as in read_results.
+    """
+    if not filters:
+        return df
+    groups = filters if isinstance(filters[0], list) else [filters]
+    mask = pd.Series(False, index=df.index)
+    for group in groups:
+        group_mask = pd.Series(True, index=df.index)
+        for column, op, value in group:
+            group_mask &= _filter_mask(df[column], op, value)
+        mask |= group_mask
+    return df[mask].reset_index(drop=True)
+
+
+def filter_columns(filters):
+    """Columns a set of DNF filters refers to"""
+    if not filters:
+        return []
+    groups = filters if isinstance(filters[0], list) else [filters]
+    return [column for group in groups for column, _, _ in group]
@@ -0,0 +1,309 @@
+import argparse
+import json
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+
+CHANGE_STATS_FILE = "data/cache/change_stats.sqlite"
+DAY = 24 * 60 * 60
+# Observations older than this count half as much towards an item's change rate
+HALF_LIFE_DAYS = 30
+# Until it has history, an item is taken to change about once a week
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 7.0
+# Output status of a SKU the request budget left unchecked this run; its other columns stay empty
+DEFERRED = "deferred"
+# Observations kept per (SPIN ID, platform) in the history table; older ones are dropped
+HISTORY_LIMIT = 90
+# Requests one check of a SKU costs: Amazon usually reads the match from its search page,
+# browser platforms load a search page and a product page
+REQUEST_COSTS = {'amazon': 1, 'blinkit': 2, 'zepto': 2}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats (
+    spin_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    prices TEXT NOT NULL,           -- last {location: sale price} seen
+    last_seen REAL NOT NULL,
+    last_change REAL,
+    changes REAL NOT NULL,          -- decayed number of changes seen
+    exposure REAL NOT NULL,         -- decayed seconds observed
+    observations INTEGER NOT NULL,
+    PRIMARY KEY (spin_id, platform)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS history (
+    spin_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    prices TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_time ON history (observed_at);
+CREATE INDEX IF NOT EXISTS history_item ON history (spin_id, platform, observed_at);
+"""
+
+
+def price_signature(details):
+    """{location: sale price} of one result per location ("" for location-independent platforms)"""
+    return {location or '': str((result or {}).get('sale_price') or 'N/A') for location, result in details.items()}
+
+
+def _changed(old, new):
+    # Only locations seen both times count, so a failed fetch in one location is not a change
+    return any(old[location] != price for location, price in new.items() if location in old)
+
+
+class ChangeStats:
+    """Per (SPIN ID, platform) price-change statistics, with the observation history, in SQLite.
+
+    The change rate is an exponentially weighted estimate of changes per day:
+    the change count and the time observed both decay with a half-life of
+    half_life_days, starting from a prior of PRIOR_CHANGES in PRIOR_DAYS.
+    The history keeps the last history_limit observations per item. The
+    database is opened on first use and only created by the first
+    observation; writes are committed by save(), once per run (or chunk).
+    """
+
+    def __init__(self, path=CHANGE_STATS_FILE, half_life_days=HALF_LIFE_DAYS, keep_history=True,
+                 history_limit=HISTORY_LIMIT):
+        self.path = path
+        self.half_life = half_life_days * DAY
+        self.keep_history = keep_history
+        self.history_limit = history_limit
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connection(self, create=False):
+        """The database, opened on first use; None while there is none and create is False (lock held)"""
+        if self._db is None:
+            on_disk = self.path != ':memory:'
+            if on_disk and not create and not os.path.exists(self.path):
+                return None
+            directory = os.path.dirname(self.path)
+            if directory and on_disk:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def observe(self, spin_id, platform, details, now=None):
+        """Record a SKU's result on a platform ({location: details}); return True if its price changed"""
+        prices = price_signature(details)
+        if not prices:
+            return False
+        now = time.time() if now is None else now
+        key = (str(spin_id), platform)
+        with self._lock:
+            db = self._connection(create=True)
+            row = db.execute(
+                "SELECT prices, last_seen, last_change, changes, exposure, observations FROM stats"
+                " WHERE spin_id = ? AND platform = ?", key
+            ).fetchone()
+            if row is None:
+                changed, last_change, changes, exposure, observations = False, None, 0.0, 0.0, 0
+            else:
+                old, last_seen, last_change, changes, exposure, observations = row
+                old = json.loads(old)
+                changed = _changed(old, prices)
+                elapsed = max(now - last_seen, 0.0)
+                decay = 0.5 ** (elapsed / self.half_life)
+                changes = changes * decay + changed
+                exposure = exposure * decay + elapsed
+                last_change = now if changed else last_change
+                prices = {**old, **prices}
+            encoded = json.dumps(prices, sort_keys=True)
+            db.execute(
+                "INSERT OR REPLACE INTO stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (encoded, now, last_change, changes, exposure, observations + 1)
+            )
+            if self.keep_history:
+                db.execute("INSERT INTO history VALUES (?, ?, ?, ?)", key + (now, encoded))
+                db.execute(
+                    "DELETE FROM history WHERE rowid IN (SELECT rowid FROM history WHERE spin_id = ? AND platform = ?"
+                    " ORDER BY observed_at DESC, rowid DESC LIMIT -1 OFFSET ?)", key + (self.history_limit,)
+                )
+        return changed
+
+    @staticmethod
+    def _rate(changes, exposure):
+        return (changes + PRIOR_CHANGES) / (exposure / DAY + PRIOR_DAYS)
+
+    def change_rate(self, spin_id, platform):
+        """Estimated price changes per day"""
+        with self._lock:
+            db = self._connection()
+            row = db.execute(
+                "SELECT changes, exposure FROM stats WHERE spin_id = ? AND platform = ?", (str(spin_id), platform)
+            ).fetchone() if db else None
+        return self._rate(*row) if row else self._rate(0.0, 0.0)
+
+    def probabilities(self, keys, now=None):
+        """{(spin_id, platform): chance its price changed since last seen}; 1.0 for items never seen"""
+        now = time.time() if now is None else now
+        with self._lock:
+            db = self._connection()
+            rows = {
+                (spin_id, platform): (last_seen, changes, exposure)
+                for spin_id, platform, last_seen, changes, exposure in (db.execute(
+                    "SELECT spin_id, platform, last_seen, changes, exposure FROM stats"
+                ) if db else [])
+            }
+        probabilities = {}
+        for spin_id, platform in keys:
+            row = rows.get((str(spin_id), platform))
+            if row is None:
+                probabilities[(spin_id, platform)] = 1.0
+            else:
+                last_seen, changes, exposure = row
+                age = max(now - last_seen, 0.0) / DAY
+                probabilities[(spin_id, platform)] = 1 - math.exp(-self._rate(changes, exposure) * age)
+        return probabilities
+
+    def history(self):
+        """Every recorded observation as (spin_id, platform, observed_at, {location: sale price}), oldest first"""
+        with self._lock:
+            db = self._connection()
+            rows = db.execute(
+                "SELECT spin_id, platform, observed_at, prices FROM history ORDER BY observed_at"
+            ).fetchall() if db else []
+        return [(spin_id, platform, observed_at, json.loads(prices)) for spin_id, platform, observed_at, prices in rows]
+
+    def __len__(self):
+        with self._lock:
+            db = self._connection()
+            return db.execute("SELECT COUNT(*) FROM stats").fetchone()[0] if db else 0
+
+    def save(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
+
+
+def plan_checks(stats, keys, budget, now=None, costs=None):
+    """The (spin_id, platform) keys to check this run, within `budget` requests.
+
+    Keys are taken by change probability per request (see REQUEST_COSTS),
+    highest first, so the budget goes where a change is most likely; items
+    never seen come first. Ties keep the order of keys.
+    """
+    costs = {**REQUEST_COSTS, **(costs or {})}
+    probabilities = stats.probabilities(keys, now)
+    ranked = sorted(keys, key=lambda key: -probabilities[key] / costs.get(key[1], 1))
+    return _within_budget(ranked, budget, costs)
+
+
+def _within_budget(ranked, budget, costs):
+    chosen, spent = [], 0
+    for key in ranked:
+        cost = costs.get(key[1], 1)
+        if spent + cost <= budget:
+            chosen.append(key)
+            spent += cost
+    return chosen
+
+
+def _runs(history):
+    """Observations grouped per day: [(day start, {(spin_id, platform): prices})]"""
+    runs = {}
+    for spin_id, platform, observed_at, prices in history:
+        day = observed_at // DAY * DAY
+        runs.setdefault(day, {})[(spin_id, platform)] = prices
+    return sorted(runs.items())
+
+
+def _round_robin(state, keys, budget, now, costs):
+    # Least recently checked first
+    ranked = sorted(keys, key=lambda key: state['checked'].get(key, -1))
+    return _within_budget(ranked, budget, costs)
+
+
+def _random(state, keys, budget, now, costs):
+    return _within_budget(state['random'].sample(keys, len(keys)), budget, costs)
+
+
+def _change_rate(state, keys, budget, now, costs):
+    return plan_checks(state['stats'], keys, budget, now, costs)
+
+
+POLICIES = {'change_rate': _change_rate, 'round_robin': _round_robin, 'random': _random}
+
+
+def simulate(history, budget, policies=None, costs=None, seed=0):
+    """Replay recorded observations under a per-run request budget and score each check policy.
+
+    history holds complete runs, as returned by ChangeStats.history(), grouped
+    per day. Each run, a policy picks the items to check within budget; a
+    check catches a change when the item's price differs from what that
+    policy saw last. 'everything' checks every item every run, for reference.
+    Returns {policy: {'requests', 'changes_caught', 'caught_per_100_requests',
+    'share_of_changes'}}.
+    """
+    costs = {**REQUEST_COSTS, **(costs or {})}
+    policies = policies or list(POLICIES)
+    runs = _runs(history)
+    states = {
+        policy: {'seen': {}, 'checked': {}, 'requests': 0, 'caught': 0, 'random': random.Random(seed),
+                 'stats': ChangeStats(':memory:', keep_history=False)}
+        for policy in ['everything'] + policies
+    }
+    for day, truth in runs:
+        keys = list(truth)
+        for policy, state in states.items():
+            if policy == 'everything':
+                chosen = keys
+            else:
+                chosen = POLICIES[policy](state, keys, budget, day, costs)
+            for key in chosen:
+                prices = truth[key]
+                previous = state['seen'].get(key)
+                state['caught'] += previous is not None and _changed(previous, prices)
+                state['seen'][key] = {**(previous or {}), **prices}
+                state['checked'][key] = day
+                state['requests'] += costs.get(key[1], 1)
+                state['stats'].observe(key[0], key[1], {location or None: {'sale_price': price}
+                                                        for location, price in prices.items()}, now=day)
+
+    total = states['everything']['caught']
+    results = {}
+    for policy, state in states.items():
+        state['stats'].close()
+        results[policy] = {
+            'requests': state['requests'],
+            'changes_caught': state['caught'],
+            'caught_per_100_requests': round(100 * state['caught'] / state['requests'], 2) if state['requests'] else 0.0,
+            'share_of_changes': round(state['caught'] / total, 3) if total else 0.0,
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded price history to compare check schedules")
+    parser.add_argument("--stats", default=CHANGE_STATS_FILE, help=f"change statistics database (default: {CHANGE_STATS_FILE})")
+    parser.add_argument("--budget", type=int, nargs="+", required=True, help="requests per run to simulate (one or more)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.stats):
+        parser.error(f"{args.stats} does not exist; it is written by every matcher run")
+    stats = ChangeStats(args.stats)
+    history = stats.history()
+    stats.close()
+    print(f"{len(_runs(history))} runs, {len({(s, p) for s, p, *_ in history})} SKU/platform pairs")
+    print(f"{'budget':>8} {'policy':<12} {'requests':>9} {'caught':>7} {'per 100 req':>12} {'share':>6}")
+    for budget in args.budget:
+        for policy, result in simulate(history, budget).items():
+            print(f"{budget:>8} {policy:<12} {result['requests']:>9} {result['changes_caught']:>7} "
+                  f"{result['caught_per_100_requests']:>12} {result['share_of_changes']:>6.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+
+from scrapers.browser import CACHE_DIR
+
+WAIT_TIMINGS_FILE = os.path.join(CACHE_DIR, "wait_timings.json")
+
+# Page states shared by every platform; scrapers add their own success states
+CAPTCHA_STATE = {
+    "selectors": [
+        "iframe[src*='captcha']",
+        "iframe[src*='challenge']",
+        "#challenge-form",
+        "[id*='captcha']",
+    ],
+    "texts": ["verify you are human", "are you a robot", "unusual traffic"],
+}
+EMPTY_TEXTS = ["no results", "no products found", "couldn't find", "no items found"]
+
+
+class AdaptiveTimeout:
+    """Timeout for one wait, learned from how long recent waits actually took.
+
+    Until enough samples exist the configured default is used. After that the
+    timeout is the chosen percentile of recent durations times some headroom,
+    never below minimum and never above the default.
+    """
+
+    MIN_SAMPLES = 10
+
+    def __init__(self, default, minimum=1.0, percentile=0.95, headroom=1.5, window=100):
+        self.default = default
+        self.minimum = minimum
+        self.percentile = percentile
+        self.headroom = headroom
+        self.samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, elapsed):
+        with self._lock:
+            self.samples.append(elapsed)
+
+    def value(self):
+        with self._lock:
+            samples = sorted(self.samples)
+        if len(samples) < self.MIN_SAMPLES:
+            return self.default
+        index = min(len(samples) - 1, math.ceil(self.percentile * len(samples)) - 1)
+        return max(self.minimum, min(self.default, samples[index] * self.headroom))
+
+
+class WaitTimings:
+    """Per (platform, stage) adaptive timeouts, persisted so later runs start tuned"""
+
+    def __init__(self, path=WAIT_TIMINGS_FILE):
+        self.path = path
+        self._timeouts = {}
+        self._lock = threading.Lock()
+        self._loaded = {}
+        self._load()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self):
+        self._loaded = self._read()
+
+    def get(self, platform, stage, default):
+        """Learned timeout for (platform, stage), capped at the caller's current default"""
+        key = f"{platform}:{stage}"
+        with self._lock:
+            timeout = self._timeouts.get(key)
+            if timeout is None:
+                timeout = AdaptiveTimeout(default)
+                for elapsed in self._loaded.get(key, []):
+                    timeout.record(elapsed)
+                self._timeouts[key] = timeout
+            else:
+                # The configured wait can change between calls (e.g. another scraper's settings)
+                timeout.default = default
+        return timeout
+
+    def save(self):
+        """Write this run's samples, keeping the stages it did not touch from the file on disk"""
+        with self._lock:
+            data = {key: list(timeout.samples) for key, timeout in self._timeouts.items()}
+        data = {**self._read(), **data}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(data, f)
+        except OSError:
+            pass  # Learned timings are only an optimisation
+
+
+wait_timings = WaitTimings()
+
+
+def wait_for_page_state(page, platform, stage, states, default_timeout):
+    """Race the given page states with a learned timeout; return the state name or None.
+
+    Any state that resolves (including empty-state and captcha pages) counts as
+    a sample, so known-negative pages teach the timeout as well as hits do. A
+    wait that times out counts as taking the whole timeout, so once pages get
+    slower the learned timeout grows back towards the default.
+    """
+    timeout = wait_timings.get(platform, stage, default_timeout)
+    limit = timeout.value()
+    start = time.perf_counter()
+    state = page.wait_for_state(states, timeout=limit)
+    timeout.record(limit if state is None else time.perf_counter() - start)
+    return state
+
+
+def changed_states(states, selector, signature):
+    """Copy of states whose non-captcha entries only match once the page signature changes"""
+    return {
+        name: spec if name == "captcha" else {**spec, "changed_from": {"selector": selector, "value": signature}}
+        for name, spec in states.items()
+    }
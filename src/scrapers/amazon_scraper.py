@@ -1,42 +1,143 @@
-from scrapers.base_scraper import BaseScraper
+from scrapers.base_scraper import BaseScraper, CaptchaError, ProductNotFoundError, SearchResults
+from urllib.parse import quote_plus, urljoin
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 class AmazonScraper(BaseScraper):
+    platform = 'amazon'
+
+    # Amazon's bot check replaces the page with a "Robot Check" captcha form
+    CAPTCHA_SELECTORS = ["form[action*='validateCaptcha']", "#captchacharacters"]
+    CAPTCHA_TITLES = ["robot check"]
+    RESULT_SELECTOR = "div[data-component-type='s-search-result']"
+    # Text of Amazon's own "nothing matched" search page
+    NO_RESULTS_TEXTS = ["no results for"]
+    # Dead ASINs get Amazon's 404 page (its title reads "Page Not Found")
+    NOT_FOUND_TITLES = ["page not found"]
+    # Paid placements: labelled cards, ad holders and links through the sponsored-click redirect
+    SPONSORED_SELECTORS = [".puis-sponsored-label-text", ".s-sponsored-label-info-icon", "a[href*='/sspa/']"]
+
     def __init__(self):
         super().__init__()
         self.base_url = "https://www.amazon.in"
         self.search_url = f"{self.base_url}/s?k="
     
-    def search_product(self, product_name, uom):
-        search_query = f"{product_name} {uom}".replace(" ", "+")
+    def _check_captcha(self, soup, url):
+        """Raise CaptchaError if Amazon served its bot check instead of the page"""
+        title = soup.title.get_text(strip=True).lower() if soup.title else ""
+        if any(soup.select_one(selector) for selector in self.CAPTCHA_SELECTORS) or title in self.CAPTCHA_TITLES:
+            raise CaptchaError(f"Captcha page shown for {url} on Amazon")
+
+    def _check_not_found(self, soup, url):
+        """Raise ProductNotFoundError if Amazon answered with its 404 page"""
+        title = soup.title.get_text(strip=True).lower() if soup.title else ""
+        if any(text in title for text in self.NOT_FOUND_TITLES):
+            raise ProductNotFoundError(f"{url} no longer exists on Amazon")
+
+    def _is_sponsored(self, block):
+        return "AdHolder" in block.get("class", []) or any(
+            block.select_one(selector) for selector in self.SPONSORED_SELECTORS
+        )
+
+    def _card_details(self, block, url, title):
+        """Product details shown on a result card, or None if the card has no MRP to read.
+
+        Discounted listings show the sale price and the struck-through MRP on
+        the card, which is all a product page would add; without an MRP the
+        caller has to fetch the product page.
+        """
+        price = block.select_one(".a-price:not(.a-text-price) .a-offscreen")
+        mrp = block.select_one(".a-price.a-text-price .a-offscreen")
+        if not price or not mrp:
+            return None
+        quantity, uom = self._extract_quantity_uom(title)
+        return {
+            "url": url,
+            "mrp": self._price_text(mrp.get_text()),
+            "sale_price": self._price_text(price.get_text()),
+            "quantity": quantity,
+            "uom": uom,
+        }
+
+    def _parse_search_results(self, soup):
+        """Return the organic results of a search page in page order.
+
+        Each is {'name', 'url', 'asin', 'details'}; details are read from the
+        card (see _card_details) and are None when the product page is needed.
+        Sponsored results are skipped: they are paid placements rather than
+        the best match for the query. Only a page with no result blocks at
+        all falls back to its first product link.
+        """
+        products = []
+        blocks = soup.select(self.RESULT_SELECTOR)
+        for block in blocks:
+            if self._is_sponsored(block):
+                continue
+            link = block.select_one("a.a-link-normal.s-no-outline") or block.select_one("h2 a")
+            title = block.select_one("h2")
+            if not link or not link.get("href"):
+                continue
+            name = title.get_text(" ", strip=True) if title else ""
+            # Canonical /dp/<ASIN> URLs are shared with id lookups and keep tracking params out
+            url = self.canonicalize_url(urljoin(self.base_url, link['href']))
+            products.append({
+                'name': name,
+                'url': url,
+                'asin': block.get("data-asin") or self.extract_product_id(url),
+                'details': self._card_details(block, url, name),
+            })
+        if not blocks:
+            # Layouts without result blocks: fall back to the first product link
+            product_link = soup.select_one("a.a-link-normal.s-no-outline")
+            if product_link and product_link.get("href"):
+                image = product_link.select_one("img")
+                products.append({
+                    'name': image.get("alt", "") if image else "",
+                    'url': self.canonicalize_url(urljoin(self.base_url, product_link['href']))
+                })
+        return products
+
+    def search_candidates(self, product_name, uom, query=None):
+        search_query = quote_plus(query or f"{product_name} {uom}")
         search_url = f"{self.search_url}{search_query}"
         # print("------------------")
-        print(search_url)
+        logger.debug(search_url)
         soup = self.get_soup(search_url)
-        # print("------------------")
-        print(soup.title)
-        # print("------------------")
-        # Find the first product result
-        product_link = soup.select_one("a.a-link-normal.s-no-outline")
-        if product_link:
-            return f"{self.base_url}{product_link['href']}"
-        return None
+        self._check_captcha(soup, search_url)
+        products = self._parse_search_results(soup)
+        if not products and not soup.select_one(self.RESULT_SELECTOR):
+            text = soup.get_text(" ", strip=True).lower()
+            if not any(phrase in text for phrase in self.NO_RESULTS_TEXTS):
+                logger.info(f"No search results could be read from {search_url}")
+                return SearchResults(unparsed=True)
+        return products
+
+    def search_product(self, product_name, uom, query=None):
+        # Take the first product result
+        products = self.search_candidates(product_name, uom, query)
+        return products[0]['url'] if products else None
     
     def extract_product_details(self, url):
         if not url:
             return None
-            
-        soup = self.get_soup(url)
         
+        url = self.canonicalize_url(url)
+        soup = self.get_soup(url)
+        self._check_captcha(soup, url)
+        self._check_not_found(soup, url)
+        return self._parse_product_page(soup, url)
+    
+    def _parse_product_page(self, soup, url):
+        """Extract product details from a parsed Amazon product page"""
         # Extract MRP
         mrp_element = soup.select_one(".a-text-strike")
-        mrp = mrp_element.text.strip() if mrp_element else "N/A"
-        mrp = re.sub(r'[^\d.]', '', mrp) if mrp != "N/A" else mrp
+        mrp = self._price_text(mrp_element.text) if mrp_element else "N/A"
         
         # Extract Sale Price
         price_element = soup.select_one(".a-price-whole")
-        sale_price = price_element.text.strip() if price_element else "N/A"
-        sale_price = re.sub(r'[^\d.]', '', sale_price) if sale_price != "N/A" else sale_price
+        sale_price = self._price_text(price_element.text) if price_element else "N/A"
         
         # Extract Quantity and UOM
         product_title = soup.select_one("#productTitle").text.strip() if soup.select_one("#productTitle") else ""
@@ -50,6 +151,11 @@ class AmazonScraper(BaseScraper):
             "uom": uom
         }
     
+    @staticmethod
+    def _price_text(text):
+        """Digits of a price like "₹1,105." ; the whole-price span carries a trailing "." from its decimals"""
+        return re.sub(r'[^\d.]', '', text).rstrip('.')
+
     def _extract_quantity_uom(self, title):
         # Use regex patterns to extract quantity and UOM from title
         quantity_pattern = r'(\d+(\.\d+)?)\s*(ml|g|kg|l|pcs|Piece|UK|pack|box|meter|pair|inches|strips|inch|peices|large|medium|small|L|XL|XXL|S|XS|)'
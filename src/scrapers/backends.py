@@ -0,0 +1,607 @@
+import asyncio
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+
+from scrapers.browser import create_chrome_driver, DriverPrewarmer
+from scrapers.session_state import (
+    LOCAL_STORAGE_JS, LOCAL_STORAGE_SEED_JS, from_cdp_cookie, to_cdp_cookie, live_cookies,
+)
+
+# Backend used by the browser-based scrapers when none is passed explicitly
+DEFAULT_BACKEND = os.environ.get("SCRAPER_BROWSER_BACKEND", "selenium")
+
+# Resource types the Playwright backend never downloads
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# Identifies what a results page currently shows: the links (or text) of the
+# first few elements matching a selector. Batched searches record it before
+# submitting the next query and only accept a state once it changes, so cards
+# left over from the previous query are not mistaken for new results. The URL
+# is left out: the SPA updates it as soon as a query is submitted, while the
+# previous query's cards are still on screen.
+SIGNATURE_JS = """(selector) => {
+    const items = Array.from(document.querySelectorAll(selector)).slice(0, 5);
+    return items.map(e => e.getAttribute('href') || e.textContent.trim()).join('|');
+}"""
+
+# Returns the name of the first page state that is showing, or null. A state
+# matches when any of its selectors is present or, for text checks, when the
+# start of its scope's visible text contains one of its phrases. Both backends
+# poll this one probe so success, empty-state and captcha pages are raced in
+# a single round-trip instead of one wait per selector. A state with
+# "changed_from" is skipped while the page signature still equals that value.
+STATE_PROBE_JS = """(states) => {
+    const signature = %s;
+    for (const [name, spec] of Object.entries(states)) {
+        if (spec.changed_from && signature(spec.changed_from.selector) === spec.changed_from.value) {
+            continue;
+        }
+        for (const selector of spec.selectors || []) {
+            if (document.querySelector(selector)) return name;
+        }
+        if (spec.texts && spec.texts.length) {
+            const scope = document.querySelector(spec.text_scope || 'body') || document.body;
+            const text = scope ? (scope.innerText || '').slice(0, 5000).toLowerCase() : '';
+            for (const phrase of spec.texts) {
+                if (text.includes(phrase)) return name;
+            }
+        }
+    }
+    return null;
+}""" % SIGNATURE_JS
+
+
+class BrowserPage(ABC):
+    """A single tab the scrapers navigate and read HTML from"""
+
+    @abstractmethod
+    def goto(self, url, timeout=30):
+        """Navigate to url"""
+        pass
+
+    @abstractmethod
+    def wait_for(self, selectors, timeout=10):
+        """Wait until any of the CSS selectors is present; return True if one appeared"""
+        pass
+
+    @abstractmethod
+    def click(self, selectors, timeout=5):
+        """Click the first clickable element matching any selector; return True on success"""
+        pass
+
+    @abstractmethod
+    def type_text(self, selectors, text, timeout=5):
+        """Type text into the first element matching any selector; return True on success"""
+        pass
+
+    @abstractmethod
+    def fill(self, selectors, text, submit=True, timeout=5):
+        """Replace the value of the first matching input and optionally press Enter; return True on success"""
+        pass
+
+    @abstractmethod
+    def evaluate(self, script, arg=None):
+        """Call a JS function expression with arg in the page and return its result"""
+        pass
+
+    def signature(self, selector):
+        """The first few elements matching selector (see SIGNATURE_JS)"""
+        return self.evaluate(SIGNATURE_JS, selector)
+
+    @abstractmethod
+    def content(self):
+        """Return the current page HTML"""
+        pass
+
+    @abstractmethod
+    def storage_state(self):
+        """Cookies and the current origin's localStorage, in Playwright storage_state form"""
+        pass
+
+    @abstractmethod
+    def wait_for_state(self, states, timeout=10):
+        """Wait until one of the named states shows; return its name, or None on timeout.
+
+        states maps a name to {"selectors": [...], "texts": [...], "text_scope": css,
+        "changed_from": {"selector": css, "value": signature}}; earlier entries win
+        when several match at once.
+        """
+        pass
+
+    def wait_for_network_idle(self, timeout=10):
+        """Wait until the page stops making requests (best effort)"""
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class BrowserBackend(ABC):
+    name = None
+
+    @abstractmethod
+    def new_page(self, storage_state=None):
+        """Return a BrowserPage ready for navigation, starting from storage_state if given"""
+        pass
+
+    def prewarm(self):
+        """Start the browser before the first page is requested"""
+        pass
+
+    def close(self):
+        """Shut down every browser this backend started"""
+        pass
+
+
+class SeleniumPage(BrowserPage):
+    def __init__(self, backend, driver):
+        self.backend = backend
+        self.driver = driver
+        self.failed = False
+
+    def goto(self, url, timeout=30):
+        from selenium.common.exceptions import WebDriverException
+
+        self.driver.set_page_load_timeout(timeout)
+        try:
+            self.driver.get(url)
+        except WebDriverException:
+            self.failed = True
+            raise
+
+    def wait_for(self, selectors, timeout=10):
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        try:
+            WebDriverWait(self.driver, timeout).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ", ".join(selectors)))
+            )
+            return True
+        except TimeoutException:
+            return False
+
+    def wait_for_state(self, states, timeout=10):
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        script = f"return ({STATE_PROBE_JS})(arguments[0]);"
+        try:
+            return WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda driver: driver.execute_script(script, states)
+            )
+        except TimeoutException:
+            return None
+
+    def _wait_clickable(self, selectors, timeout):
+        from selenium.common.exceptions import TimeoutException, NoSuchElementException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        for selector in selectors:
+            try:
+                return WebDriverWait(self.driver, timeout).until(
+                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
+                )
+            except (TimeoutException, NoSuchElementException):
+                continue
+        return None
+
+    def click(self, selectors, timeout=5):
+        element = self._wait_clickable(selectors, timeout)
+        if element is None:
+            return False
+        element.click()
+        return True
+
+    def type_text(self, selectors, text, timeout=5):
+        element = self._wait_clickable(selectors, timeout)
+        if element is None:
+            return False
+        element.send_keys(text)
+        return True
+
+    def fill(self, selectors, text, submit=True, timeout=5):
+        from selenium.webdriver.common.keys import Keys
+
+        element = self._wait_clickable(selectors, timeout)
+        if element is None:
+            return False
+        element.send_keys(Keys.CONTROL, "a")
+        element.send_keys(Keys.DELETE)
+        element.send_keys(text + (Keys.ENTER if submit else ""))
+        return True
+
+    def evaluate(self, script, arg=None):
+        return self.driver.execute_script(f"return ({script})(arguments[0]);", arg)
+
+    def content(self):
+        return self.driver.page_source
+
+    def storage_state(self):
+        cookies = self.driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        return {
+            "cookies": [from_cdp_cookie(cookie) for cookie in cookies],
+            "origins": [self.evaluate(LOCAL_STORAGE_JS)],
+        }
+
+    def close(self):
+        # The driver stays with its worker thread for the next page unless it broke
+        if self.failed:
+            self.backend.discard_driver(self.driver)
+
+
+class SeleniumBackend(BrowserBackend):
+    """One Chrome per worker thread, reused across every page that thread opens"""
+
+    name = "selenium"
+
+    def __init__(self, driver_factory):
+        self.driver_factory = driver_factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._drivers = []
+        self._prewarmer = DriverPrewarmer(driver_factory)
+        # id(driver) -> (state applied, seed script identifiers)
+        self._applied_states = {}
+
+    def prewarm(self):
+        self._prewarmer.start()
+
+    def _get_driver(self):
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            driver = self._prewarmer.take() or self.driver_factory()
+            self._local.driver = driver
+            with self._lock:
+                self._drivers.append(driver)
+        return driver
+
+    def new_page(self, storage_state=None):
+        driver = self._get_driver()
+        if storage_state:
+            self._apply_storage_state(driver, storage_state)
+        return SeleniumPage(self, driver)
+
+    def _apply_storage_state(self, driver, state):
+        """Load a saved session into a (reused) driver once per state version.
+
+        Cookies go in through CDP so no navigation to each domain is needed;
+        localStorage is seeded by a script that runs before the site's own.
+        Switching a driver to another session (e.g. another delivery location)
+        first clears what the previous one left behind.
+        """
+        applied, script_ids = self._applied_states.get(id(driver), (None, []))
+        if applied is state:
+            return
+        for script_id in script_ids:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script_id})
+        if applied is not None:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            for origin in applied.get("origins", []) + state.get("origins", []):
+                driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                    "origin": origin["origin"], "storageTypes": "local_storage"
+                })
+        driver.execute_cdp_cmd("Network.setCookies", {
+            "cookies": [to_cdp_cookie(cookie) for cookie in live_cookies(state)]
+        })
+        script_ids = []
+        for origin in state.get("origins", []):
+            source = LOCAL_STORAGE_SEED_JS % (json.dumps(origin["origin"]), json.dumps(origin.get("localStorage", [])))
+            result = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+            script_ids.append(result["identifier"])
+        self._applied_states[id(driver)] = (state, script_ids)
+
+    def discard_driver(self, driver):
+        if getattr(self._local, "driver", None) is driver:
+            self._local.driver = None
+        self._applied_states.pop(id(driver), None)
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass  # Ignore errors during driver cleanup
+
+    def close(self):
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass  # Ignore errors during driver cleanup
+        self._local = threading.local()
+        self._applied_states = {}
+
+
+class _PlaywrightBrowser:
+    """A single Chromium process driven from its own asyncio event loop thread.
+
+    Every PlaywrightBackend shares it; isolation between pages comes from
+    lightweight browser contexts rather than separate browser processes.
+    Backends acquire() it when created and release() it when closed; the
+    process is stopped when the last of them lets go.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self.loop = None
+        self._thread = None
+        self._playwright = None
+        self.browser = None
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the browser loop from any thread and return its result"""
+        try:
+            self.start()
+        except Exception:
+            coro.close()
+            raise
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    def start(self):
+        with self._lock:
+            if self.loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="playwright-loop", daemon=True)
+            thread.start()
+            try:
+                asyncio.run_coroutine_threadsafe(self._launch(), loop).result()
+            except Exception:
+                loop.call_soon_threadsafe(loop.stop)
+                thread.join()
+                raise
+            self.loop = loop
+            self._thread = thread
+
+    async def _launch(self):
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=["--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu"],
+        )
+
+    async def _shutdown(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+
+    def release(self):
+        """Drop one backend's hold on the browser, stopping it if that was the last"""
+        with self._lock:
+            self._users = max(self._users - 1, 0)
+            if self._users == 0:
+                self._stop()
+
+    def stop(self):
+        with self._lock:
+            self._stop()
+
+    def _stop(self):
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop = None
+        self._thread = None
+        self.browser = None
+        self._playwright = None
+
+
+_playwright_browser = _PlaywrightBrowser()
+
+
+class PlaywrightPage(BrowserPage):
+    """Sync facade over a Playwright page; the *_async methods can be awaited on the browser loop"""
+
+    def __init__(self, browser, context, page):
+        self._browser = browser
+        self.context = context
+        self.page = page
+
+    async def goto_async(self, url, timeout=30):
+        await self.page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+
+    async def wait_for_async(self, selectors, timeout=10):
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        try:
+            await self.page.wait_for_selector(", ".join(selectors), state="attached", timeout=timeout * 1000)
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    async def wait_for_state_async(self, states, timeout=10):
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        try:
+            handle = await self.page.wait_for_function(
+                STATE_PROBE_JS, arg=states, polling=100, timeout=timeout * 1000
+            )
+            return await handle.json_value()
+        except PlaywrightTimeoutError:
+            return None
+
+    async def wait_for_response_async(self, url_part, timeout=10):
+        """Wait for a network response whose URL contains url_part"""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        try:
+            await self.page.wait_for_event(
+                "response", lambda response: url_part in response.url, timeout=timeout * 1000
+            )
+            return True
+        except PlaywrightTimeoutError:
+            return False
+
+    async def wait_for_network_idle_async(self, timeout=10):
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        try:
+            await self.page.wait_for_load_state("networkidle", timeout=timeout * 1000)
+        except PlaywrightTimeoutError:
+            pass
+
+    async def _first_visible(self, selectors, timeout):
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+        for selector in selectors:
+            try:
+                return await self.page.wait_for_selector(selector, state="visible", timeout=timeout * 1000)
+            except PlaywrightTimeoutError:
+                continue
+        return None
+
+    async def click_async(self, selectors, timeout=5):
+        element = await self._first_visible(selectors, timeout)
+        if element is None:
+            return False
+        await element.click()
+        return True
+
+    async def type_text_async(self, selectors, text, timeout=5):
+        element = await self._first_visible(selectors, timeout)
+        if element is None:
+            return False
+        await element.type(text)
+        return True
+
+    async def fill_async(self, selectors, text, submit=True, timeout=5):
+        element = await self._first_visible(selectors, timeout)
+        if element is None:
+            return False
+        await element.fill(text)
+        if submit:
+            await element.press("Enter")
+        return True
+
+    async def evaluate_async(self, script, arg=None):
+        return await self.page.evaluate(script, arg)
+
+    async def content_async(self):
+        return await self.page.content()
+
+    async def storage_state_async(self):
+        return await self.context.storage_state()
+
+    async def close_async(self):
+        await self.context.close()
+
+    def goto(self, url, timeout=30):
+        return self._browser.run(self.goto_async(url, timeout))
+
+    def wait_for(self, selectors, timeout=10):
+        return self._browser.run(self.wait_for_async(selectors, timeout))
+
+    def wait_for_state(self, states, timeout=10):
+        return self._browser.run(self.wait_for_state_async(states, timeout))
+
+    def wait_for_response(self, url_part, timeout=10):
+        return self._browser.run(self.wait_for_response_async(url_part, timeout))
+
+    def wait_for_network_idle(self, timeout=10):
+        return self._browser.run(self.wait_for_network_idle_async(timeout))
+
+    def click(self, selectors, timeout=5):
+        return self._browser.run(self.click_async(selectors, timeout))
+
+    def type_text(self, selectors, text, timeout=5):
+        return self._browser.run(self.type_text_async(selectors, text, timeout))
+
+    def fill(self, selectors, text, submit=True, timeout=5):
+        return self._browser.run(self.fill_async(selectors, text, submit, timeout))
+
+    def evaluate(self, script, arg=None):
+        return self._browser.run(self.evaluate_async(script, arg))
+
+    def content(self):
+        return self._browser.run(self.content_async())
+
+    def storage_state(self):
+        return self._browser.run(self.storage_state_async())
+
+    def close(self):
+        return self._browser.run(self.close_async())
+
+
+class PlaywrightBackend(BrowserBackend):
+    """Each page gets its own browser context inside one shared Chromium process"""
+
+    name = "playwright"
+
+    def __init__(self, user_agent=None, block_resources=True):
+        self.user_agent = user_agent
+        self.block_resources = block_resources
+        self._browser = _playwright_browser
+        self._browser.acquire()
+        self._closed = False
+
+    def prewarm(self):
+        threading.Thread(target=self._browser.start, name="playwright-prewarm", daemon=True).start()
+
+    async def _route(self, route):
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def new_page_async(self, storage_state=None):
+        if storage_state:
+            storage_state = {"cookies": live_cookies(storage_state), "origins": storage_state.get("origins", [])}
+        context = await self._browser.browser.new_context(
+            user_agent=self.user_agent,
+            viewport={"width": 1280, "height": 720},
+            storage_state=storage_state,
+        )
+        if self.block_resources:
+            await context.route("**/*", self._route)
+        page = await context.new_page()
+        return PlaywrightPage(self._browser, context, page)
+
+    def new_page(self, storage_state=None):
+        return self._browser.run(self.new_page_async(storage_state))
+
+    def close(self):
+        # Other scrapers' backends may still be using the shared browser
+        if not self._closed:
+            self._closed = True
+            self._browser.release()
+
+
+def _create_backend(name=None, driver_factory=None, user_agent=None):
+    name = (name or DEFAULT_BACKEND).lower()
+    if name == "selenium":
+        return SeleniumBackend(driver_factory or create_chrome_driver)
+    if name == "playwright":
+        return PlaywrightBackend(user_agent=user_agent)
+    raise ValueError(f"Unknown browser backend: {name}")
+
+
+def create_backend(name=None, driver_factory=None, user_agent=None):
+    """Build the browser backend named in config ("selenium" or "playwright").
+
+    While a scraper archive is active (see scrapers.replay) the backend is
+    wrapped to record its pages, or replaced by one that replays them.
+    """
+    # Imported here because replay builds on the page classes in this module
+    from scrapers.replay import wrap_backend
+
+    return wrap_backend(lambda: _create_backend(name, driver_factory, user_agent))
@@ -1,16 +1,17 @@
-import requests
 from abc import ABC, abstractmethod
 from bs4 import BeautifulSoup
+import copy
+import logging
 import random
 import time
 
-session = requests.Session()
+from scrapers.session_manager import session_manager, user_agents
+from scrapers.product_ids import extract_product_id, product_url, canonicalize_url
+from scrapers.backends import create_backend
+from scrapers.adaptive_wait import wait_for_page_state, changed_states
+from scrapers.session_state import session_store
 
-user_agents = [
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Safari/605.1.15',
-    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
-]
+logger = logging.getLogger(__name__)
 
 # proxies = [
 #     {'http': 'http://proxy1.example.com:8080', 'https': 'https://proxy1.example.com:8080'},
@@ -18,26 +19,373 @@ user_agents = [
 # ]
 # proxy = random.choice(proxies)
 
+class CaptchaError(Exception):
+    """The site answered with a captcha/bot-check page instead of content"""
+    pass
+
+class ProductNotFoundError(Exception):
+    """The site answered that a product page does not exist (delisted or a dead id)"""
+    pass
+
+class SearchResults(list):
+    """Candidates from one search.
+
+    unparsed is True when the page did not show the site's "no results" state
+    yet no product card could be read from it (a results page whose cards
+    the selectors miss, or a page matching no known state). That points at
+    broken selectors, unlike an ordinary miss, which is a plain empty list.
+    failed is True when the search page could not be fetched or loaded at
+    all; neither says anything about whether the product exists.
+    """
+
+    def __init__(self, candidates=(), unparsed=False, failed=False):
+        super().__init__(candidates)
+        self.unparsed = unparsed
+        self.failed = failed
+
 class BaseScraper(ABC):
+    platform = None
+    # Whether prices and availability depend on the delivery location
+    location_dependent = False
+    location = None
+    # Default upper bound (seconds) of each page-state wait, per stage
+    WAIT_TIMEOUTS = {}
+
     def __init__(self):
-        # self.headers = {
-        #     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        # }
-        self.headers = {'User-Agent': random.choice(user_agents)}
+        # HTTP requests take their headers from their SessionManager session; this is for browsers
+        self.user_agent = random.choice(user_agents)
+        self.request_timeout = 30
+        self.request_delay = 2
+        self.page_load_timeout = 30
+        self.load_retries = 3
+        self.wait_timeouts = dict(self.WAIT_TIMEOUTS)
     
+    def configure(self, settings):
+        """Apply a platform's timeouts, delays and retries (a config.PlatformSettings)"""
+        self.request_timeout = settings.request_timeout
+        self.request_delay = settings.request_delay
+        self.page_load_timeout = settings.page_load_timeout
+        self.load_retries = settings.load_retries
+        self.wait_timeouts = {**self.WAIT_TIMEOUTS, **settings.wait_timeouts}
+        return self
+
     @abstractmethod
-    def search_product(self, product_name, uom):
-        """Search for a product and return matching product URL"""
+    def search_product(self, product_name, uom, query=None):
+        """Search for a product and return matching product URL.
+
+        query is the planned search text (see query_plan); without it the
+        scraper builds its own from product_name and uom.
+        """
         pass
     
+    def search_candidates(self, product_name, uom, query=None):
+        """Search results as [{'name', 'url'}] in site order, for scoring by the caller.
+
+        Scrapers that can read several results override this; the default
+        wraps search_product's single pick (with no name to score).
+        """
+        url = self.search_product(product_name, uom, query)
+        return [{'name': '', 'url': url}] if url else []
+
+    def search_products(self, queries):
+        """Search a batch of (product_name, uom, query) tuples; returns a candidate list per entry.
+
+        Browser scrapers override this to reuse one page for the whole batch.
+        """
+        candidates = []
+        for product_name, uom, query in queries:
+            try:
+                candidates.append(self.search_candidates(product_name, uom, query))
+            except CaptchaError:
+                raise
+            except Exception as e:
+                logger.warning(f"Error searching {product_name}: {str(e)}")
+                candidates.append(SearchResults(failed=True))
+        return candidates
+
     @abstractmethod
     def extract_product_details(self, url):
         """Extract product details from product page"""
         pass
     
+    def for_location(self, location):
+        """Scraper that sees the site from location, sharing this one's browser backend"""
+        if not self.location_dependent or location is None or location == self.location:
+            return self
+        scraper = copy.copy(self)
+        scraper.location = location
+        return scraper
+
+    def extract_product_id(self, url):
+        """Return the platform product id (ASIN, prid, pvid) in a product URL"""
+        return extract_product_id(self.platform, url)
+
+    def product_url(self, product_id):
+        """Direct product page URL for a known id, skipping the search page"""
+        return product_url(self.platform, product_id, base_url=self.base_url)
+
+    def canonicalize_url(self, url):
+        """Strip redirects and tracking params so equal products share one URL"""
+        return canonicalize_url(self.platform, url, base_url=self.base_url)
+
+    def prewarm(self):
+        """Prepare any expensive resources (e.g. a browser) before the first search"""
+        pass
+
+    def close(self):
+        """Release browsers or other resources held by the scraper"""
+        pass
+
     def get_soup(self, url):
         """Get BeautifulSoup object from URL"""
-        # response = session.get(url, headers=self.headers, proxies=proxy)
-        response = session.get(url, headers=self.headers)
-        time.sleep(2)
-        return BeautifulSoup(response.content, 'html.parser')
\ No newline at end of file
+        # response = session_manager.get(url, proxies=proxy)
+        # Each worker thread gets its own pooled keep-alive session (and User-Agent)
+        response = session_manager.get(url, timeout=self.request_timeout)
+        # Replayed responses need no politeness delay
+        if self.request_delay and not session_manager.offline:
+            time.sleep(self.request_delay)
+        return BeautifulSoup(response.content, 'html.parser')
+
+class BrowserScraper(BaseScraper):
+    """Scraper for a single-page app driven through a browser backend (see scrapers.backends).
+
+    Pages start from a saved per-location session (see session_state), which
+    _bootstrap_session creates by picking the delivery location on the home
+    page. Sites describe themselves through class attributes: the page
+    states raced on the home, search and product pages, the search box and
+    result card selectors and CARD_SIGNATURE_SELECTOR. They implement
+    _create_driver, _set_location, _parse_search_results and
+    _parse_product_page, and may override _search_query and _search_page_url.
+    """
+
+    location_dependent = True
+    SEARCH_INPUT_SELECTORS = []
+    # Cards of a loaded results page, waited for after a location prompt was answered
+    RESULT_SELECTORS = []
+    CARD_SIGNATURE_SELECTOR = ""
+    # Page states raced against each other; negative states come first so they win ties
+    HOME_STATES = {}
+    SEARCH_STATES = {}
+    PRODUCT_STATES = {}
+
+    def __init__(self, backend=None, location="Mumbai"):
+        super().__init__()
+        self.location = location
+        self.backend = create_backend(backend, driver_factory=self._create_driver,
+                                      user_agent=self.user_agent)
+
+    @property
+    def site(self):
+        return self.platform.capitalize()
+
+    def prewarm(self):
+        """Start a browser in the background ahead of the first search"""
+        self.backend.prewarm()
+
+    def close(self):
+        self.backend.close()
+
+    def _create_driver(self):
+        """A new Selenium webdriver for the selenium backend"""
+        raise NotImplementedError
+
+    def _set_location(self, page, location):
+        """Pick a delivery location on an open page; return True if one was selected"""
+        raise NotImplementedError
+
+    def _parse_search_results(self, html):
+        """Return [{'name', 'url'}] for every product card on a search results page"""
+        raise NotImplementedError
+
+    def _parse_product_page(self, html, url):
+        """Extract product details from product page HTML"""
+        raise NotImplementedError
+
+    def _search_query(self, product_name, uom, query=None):
+        """Text to search for; a planned query is used as is"""
+        return query or f"{product_name} {uom}"
+
+    def _search_page_url(self, search_query):
+        return f"{self.search_url}{search_query}"
+
+    @staticmethod
+    def _close_page(page):
+        if page:
+            try:
+                page.close()
+            except Exception:
+                pass  # Ignore errors during page cleanup
+
+    def _load_page(self, page, url, max_retries=None):
+        """Navigate to url with retries; return False if the page never loaded"""
+        max_retries = max_retries or self.load_retries
+        for attempt in range(max_retries):
+            try:
+                page.goto(url, timeout=self.page_load_timeout)
+                return True
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    logger.warning(f"Attempt {attempt+1} failed, retrying... Error: {str(e)}")
+                    time.sleep(2)
+                else:
+                    logger.warning(f"Failed to load page after {max_retries} attempts")
+        return False
+
+    def _bootstrap_session(self):
+        """Set the delivery location once on the home page and return the resulting storage state"""
+        page = None
+        try:
+            page = self.backend.new_page()
+            if not self._load_page(page, self.base_url):
+                return None
+            state = wait_for_page_state(page, self.platform, "home", self.HOME_STATES,
+                                        default_timeout=self.wait_timeouts["home"])
+            if state == "captcha":
+                logger.warning(f"Captcha page shown while setting up {self.site} session")
+                return None
+            if state == "location" and not self._set_location(page, self.location):
+                logger.warning(f"Could not set location {self.location} on {self.site}")
+                return None
+            return page.storage_state()
+        except Exception as e:
+            logger.warning(f"Error setting up {self.site} session: {str(e)}")
+            return None
+        finally:
+            self._close_page(page)
+
+    def _new_page(self):
+        """Open a page that starts with the saved location session.
+
+        If the session could not be bootstrapped the page starts empty, but
+        still names its session so archived pages are scoped the same way
+        whether a run is recorded or replayed.
+        """
+        state = session_store.get(self.platform, self.location, self._bootstrap_session)
+        return self.backend.new_page(storage_state=state or session_store.empty_state(self.platform, self.location))
+
+    def _run_search(self, page, product_name, uom, query=None, previous_signature=None):
+        """Run one search on an open page and return the product cards found ([] on a miss, see SearchResults).
+
+        With previous_signature (batch mode) the query is typed into the site's
+        search box so the SPA shell stays loaded; otherwise, or if the search
+        box is missing, the search URL is loaded directly. A typed query is
+        only answered once the cards differ from previous_signature; if they
+        never do (the query shows the same cards as the last one) its search
+        URL is loaded instead.
+        """
+        search_query = self._search_query(product_name, uom, query)
+        search_url = self._search_page_url(search_query)
+        logger.debug(f"Searching for {search_query} on {self.site}")
+
+        states = self.SEARCH_STATES
+        typed = previous_signature is not None and page.fill(self.SEARCH_INPUT_SELECTORS, search_query)
+        if typed:
+            states = changed_states(states, self.CARD_SIGNATURE_SELECTOR, previous_signature)
+        elif not self._load_page(page, search_url):
+            return SearchResults(failed=True)
+
+        # Race results against location prompt, empty-state and captcha pages so misses return early
+        state = wait_for_page_state(page, self.platform, "search", states, default_timeout=self.wait_timeouts["search"])
+        if state is None and typed:
+            logger.debug(f"Cards did not change for {search_query} on {self.site}; loading its search page")
+            if not self._load_page(page, search_url):
+                return SearchResults(failed=True)
+            state = wait_for_page_state(page, self.platform, "search", self.SEARCH_STATES,
+                                        default_timeout=self.wait_timeouts["search"])
+        if state == "location":
+            # The saved session lost its location; set it here and save the refreshed session
+            try:
+                if not self._set_location(page, self.location):
+                    session_store.invalidate(self.platform, self.location)
+                    return SearchResults(failed=True)
+                session_store.save(self.platform, page.storage_state(), self.location)
+                state = "results" if page.wait_for(self.RESULT_SELECTORS, timeout=10) else None
+            except Exception as e:
+                logger.warning(f"Could not set location on {self.site}: {str(e)}")
+                return SearchResults(failed=True)
+        if state == "captcha":
+            raise CaptchaError(f"Captcha page shown for {search_query} on {self.site}")
+        if state == "empty":
+            logger.info(f"No products found for {search_query} on {self.site}")
+            return []
+        if state != "results":
+            logger.info(f"Search page for {search_query} on {self.site} showed no known state ({state or 'timeout'})")
+            return SearchResults(unparsed=True)
+
+        products = self._parse_search_results(page.content())
+        if not products:
+            logger.info(f"No product cards found for {search_query} on {self.site}")
+            return SearchResults(unparsed=True)
+        return products
+
+    def search_candidates(self, product_name, uom, query=None):
+        """Search the site and return every product card as a candidate"""
+        page = None
+        try:
+            page = self._new_page()
+            return self._run_search(page, product_name, uom, query)
+        except CaptchaError:
+            raise
+        except Exception as e:
+            logger.warning(f"Error in {self.site} search: {str(e)}")
+            return SearchResults(failed=True)
+        finally:
+            self._close_page(page)
+
+    def search_products(self, queries):
+        """Search several (product_name, uom, query) entries on one page, loading the SPA once per batch"""
+        candidates = []
+        page = None
+        try:
+            page = self._new_page()
+            signature = None
+            for product_name, uom, query in queries:
+                try:
+                    candidates.append(self._run_search(page, product_name, uom, query, previous_signature=signature))
+                    signature = page.signature(self.CARD_SIGNATURE_SELECTOR)
+                except CaptchaError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Error in {self.site} search: {str(e)}")
+                    candidates.append(SearchResults(failed=True))
+                    # Start the next query from a fresh navigation
+                    signature = None
+        except CaptchaError:
+            raise
+        except Exception as e:
+            logger.warning(f"Error opening {self.site} page: {str(e)}")
+        finally:
+            self._close_page(page)
+        # Queries left unsearched because the page could not be opened
+        return candidates + [SearchResults(failed=True) for _ in range(len(queries) - len(candidates))]
+
+    def extract_product_details(self, url):
+        """Extract product details from the site's product page"""
+        if not url:
+            return None
+        url = self.canonicalize_url(url)
+
+        page = None
+        try:
+            page = self._new_page()
+            if not self._load_page(page, url):
+                return None
+
+            state = wait_for_page_state(page, self.platform, "product", self.PRODUCT_STATES,
+                                        default_timeout=self.wait_timeouts["product"])
+            if state == "captcha":
+                raise CaptchaError(f"Captcha page shown for {url} on {self.site}")
+            if state == "not_found":
+                raise ProductNotFoundError(f"{url} no longer exists on {self.site}")
+            if state != "product":
+                logger.info(f"{self.site} product details did not load ({state or 'timeout'})")
+                return None
+
+            return self._parse_product_page(page.content(), url)
+        except (CaptchaError, ProductNotFoundError):
+            raise
+        except Exception as e:
+            logger.warning(f"Error extracting details from {self.site}: {str(e)}")
+            return None
+        finally:
+            self._close_page(page)
@@ -1,89 +1,180 @@
-from scrapers.base_scraper import BaseScraper
+from scrapers.base_scraper import BrowserScraper
+from scrapers.browser import create_chrome_driver
+from scrapers.adaptive_wait import CAPTCHA_STATE, EMPTY_TEXTS
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+import logging
 import re
-import time
-import gc
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
-from webdriver_manager.chrome import ChromeDriverManager
-
-class BlinkatScraper(BaseScraper):
-    def __init__(self):
-        super().__init__()
+
+logger = logging.getLogger(__name__)
+
+class BlinkatScraper(BrowserScraper):
+    platform = 'blinkit'
+
+    # Selector fallbacks, most specific first
+    PRODUCT_CARD_SELECTORS = [
+        ".product-card",
+        "[data-testid='product-card']",
+        ".plp-product",
+        ".product-item"
+    ]
+    NAME_SELECTORS = [
+        ".Product__ProductName-sc-11dk8zk-3",
+        ".product-name",
+        "[data-testid='product-name']",
+        ".item-title",
+        "h3.name",
+        ".product-title"
+    ]
+    PRODUCT_PAGE_SELECTORS = [".product-detail", ".pdp-container", ".product-info"]
+    SEARCH_INPUT_SELECTORS = [
+        "input[placeholder*='Search']",
+        "input[type='search']",
+        "[data-testid='search-input'] input"
+    ]
+    RESULT_SELECTORS = PRODUCT_CARD_SELECTORS
+    CARD_SIGNATURE_SELECTOR = ", ".join(PRODUCT_CARD_SELECTORS)
+    LOCATION_PROMPT_TEXTS = ["detect my location", "select delivery location"]
+    LOCATION_INPUT_SELECTORS = [
+        "input[name='select-locality']",
+        "input[placeholder*='delivery location']",
+        "input[placeholder*='location']"
+    ]
+    LOCATION_SUGGESTION_SELECTORS = [
+        "[class*='LocationSearchList__LocationListContainer']",
+        "[class*='LocationSearchList'] [class*='LocationDetail']",
+        ".location-suggestion"
+    ]
+    # Page states raced against each other; negative states come first so they win ties
+    SEARCH_STATES = {
+        "captcha": CAPTCHA_STATE,
+        "location": {"texts": LOCATION_PROMPT_TEXTS},
+        "empty": {"selectors": [".no-results", ".empty-state"], "texts": EMPTY_TEXTS},
+        "results": {"selectors": PRODUCT_CARD_SELECTORS},
+    }
+    # What the home page shows on a first visit: the location prompt, or the store
+    HOME_STATES = {
+        "captcha": CAPTCHA_STATE,
+        "location": {"selectors": LOCATION_INPUT_SELECTORS, "texts": LOCATION_PROMPT_TEXTS},
+        "ready": {"selectors": SEARCH_INPUT_SELECTORS},
+    }
+    PRODUCT_STATES = {
+        "captcha": CAPTCHA_STATE,
+        "not_found": {"texts": ["page not found", "product is not available"]},
+        "product": {"selectors": PRODUCT_PAGE_SELECTORS},
+    }
+    MRP_SELECTORS = [
+        ".ProductInfo__OriginalPrice-sc-urkcd7-4",
+        ".original-price",
+        ".mrp",
+        ".strike-price",
+        "[data-testid='original-price']"
+    ]
+    PRICE_SELECTORS = [
+        ".ProductInfo__DiscountedPrice-sc-urkcd7-3",
+        ".discounted-price",
+        ".sale-price",
+        ".current-price",
+        "[data-testid='current-price']"
+    ]
+    TITLE_SELECTORS = [
+        ".ProductHeader__StyledProductHeader-sc-4rfq5f-0 h1",
+        ".product-title",
+        ".pdp-title",
+        "h1.title",
+        "[data-testid='product-title']"
+    ]
+
+    WAIT_TIMEOUTS = {"home": 10, "search": 10, "product": 15}
+
+    def __init__(self, backend=None, location="Mumbai"):
         self.base_url = "https://blinkit.com"
         self.search_url = f"{self.base_url}/search/"
+        super().__init__(backend, location)
+
+    def _chrome_options(self):
+        from selenium.webdriver.chrome.options import Options
+
         # Set up Chrome options for headless browsing
-        self.chrome_options = Options()
-        self.chrome_options.add_argument("--headless")
-        self.chrome_options.add_argument("--no-sandbox")
-        self.chrome_options.add_argument("--disable-dev-shm-usage")
-        self.chrome_options.add_argument(f"user-agent={self.headers['User-Agent']}")
+        chrome_options = Options()
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument(f"user-agent={self.user_agent}")
+
+        # Add memory optimization options
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--disable-features=NetworkService")
+        chrome_options.add_argument("--window-size=1280,720")
+        chrome_options.add_argument("--disable-browser-side-navigation")
+        chrome_options.add_argument("--disable-infobars")
+
+        # Limit the browser cache size
+        chrome_options.add_argument("--disk-cache-size=1")
+        chrome_options.add_argument("--media-cache-size=1")
+        chrome_options.add_argument("--disable-application-cache")
+        chrome_options.add_argument("--disable-cache")
+        return chrome_options
 
-    def _init_driver(self):
+    def _create_driver(self):
         """Initialize and return a new webdriver instance with improved memory management"""
+        from selenium.webdriver.chrome.options import Options
+
         try:
-            # Add memory optimization options
-            self.chrome_options.add_argument("--disable-extensions")
-            self.chrome_options.add_argument("--disable-gpu")
-            self.chrome_options.add_argument("--disable-features=NetworkService")
-            self.chrome_options.add_argument("--window-size=1280,720")
-            self.chrome_options.add_argument("--disable-browser-side-navigation")
-            self.chrome_options.add_argument("--disable-infobars")
-            
-            # Limit the browser cache size
-            self.chrome_options.add_argument("--disk-cache-size=1")
-            self.chrome_options.add_argument("--media-cache-size=1")
-            self.chrome_options.add_argument("--disable-application-cache")
-            self.chrome_options.add_argument("--disable-cache")
-            
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=self.chrome_options)
-            
+            driver = create_chrome_driver(self._chrome_options())
+
+            # Cookies are kept: pages load the saved session state into them
             driver.execute_cdp_cmd('Network.clearBrowserCache', {})
-            driver.delete_all_cookies()
 
             # Set page load timeout
-            driver.set_page_load_timeout(30)
-            driver.set_script_timeout(30)
-            
+            driver.set_page_load_timeout(self.page_load_timeout)
+            driver.set_script_timeout(self.page_load_timeout)
+
             return driver
         except Exception as e:
-            print(f"Error initializing Chrome driver: {str(e)}")
+            logger.error(f"Error initializing Chrome driver: {str(e)}")
             # Try with minimal options as fallback
             try:
                 minimal_options = Options()
                 minimal_options.add_argument("--headless")
                 minimal_options.add_argument("--no-sandbox")
                 minimal_options.add_argument("--disable-dev-shm-usage")
-                service = Service(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=minimal_options)
+                driver = create_chrome_driver(minimal_options)
                 return driver
             except Exception as e2:
-                print(f"Fallback driver initialization also failed: {str(e2)}")
+                logger.error(f"Fallback driver initialization also failed: {str(e2)}")
                 raise
 
+    def _set_location(self, page, location):
+        """Type a delivery location into the location prompt and pick the first suggestion"""
+        logger.info(f"Attempting to set location {location} on Blinkit...")
+        if not page.type_text(self.LOCATION_INPUT_SELECTORS, location, timeout=5):
+            return False
+        if not page.click(self.LOCATION_SUGGESTION_SELECTORS, timeout=5):
+            return False
+        # Let the site persist the chosen address before its state is captured
+        page.wait_for_network_idle(timeout=5)
+        return True
+
     def _extract_key_terms(self, product_name):
         """Extract key terms from product name for better matching"""
         # Remove common words that don't help with matching
         common_words = ['with', 'and', 'for', 'the', 'a', 'an', 'in', 'on', 'by', 'to', 'of']
-        
+
         # Split the product name into words
         words = product_name.lower().split()
-        
+
         # Filter out common words and very short words
         key_terms = [word for word in words if word not in common_words and len(word) > 2]
-        
+
         # Extract brand name (usually the first word)
         brand = words[0] if words else ""
-        
+
         # Find product type (oil, shampoo, etc.)
         product_types = ['oil', 'shampoo', 'conditioner', 'soap', 'lotion', 'cream', 'powder', 'gel']
         product_type = next((word for word in words if word.lower() in product_types), "")
-        
+
         return {
             'all_terms': key_terms,
             'brand': brand,
@@ -91,13 +182,70 @@ class BlinkatScraper(BaseScraper):
             'important_terms': key_terms[:3]  # First few terms are usually most important
         }
 
-    def search_product(self, product_name, uom):
-        """Search for a product on Blinkit with improved fuzzy matching"""
-        print(f"Searching for {product_name} {uom} on Blinkit")
-        
+    def _parse_search_results(self, html):
+        """Return [{'name', 'url'}] for every product card on a search results page"""
+        soup = BeautifulSoup(html, 'html.parser')
+
+        product_cards = []
+        for selector in self.PRODUCT_CARD_SELECTORS:
+            cards = soup.select(selector)
+            if cards:
+                product_cards = cards
+                logger.debug(f"Found {len(cards)} product cards using selector: {selector}")
+                break
+
+        products = []
+        for card in product_cards:
+            card_product_name = None
+            for selector in self.NAME_SELECTORS:
+                name_element = card.select_one(selector)
+                if name_element:
+                    card_product_name = name_element.get_text(" ", strip=True)
+                    if card_product_name:
+                        break
+            if not card_product_name:
+                continue
+
+            link_element = card if card.name == "a" else card.find("a", href=True)
+            if not link_element or not link_element.get("href"):
+                continue
+
+            products.append({
+                'name': card_product_name,
+                'url': self.canonicalize_url(urljoin(self.base_url, link_element['href']))
+            })
+        return products
+
+    def _score_match(self, card_product_name, key_terms, uom):
+        """Score how well a card name matches the searched product"""
+        match_score = 0
+        card_name_lower = card_product_name.lower()
+
+        # Brand match is important (higher weight)
+        if key_terms['brand'] in card_name_lower:
+            match_score += 3
+
+        # Product type match is important
+        if key_terms['product_type'] and key_terms['product_type'] in card_name_lower:
+            match_score += 2
+
+        # Count how many key terms match
+        for term in key_terms['all_terms']:
+            if term in card_name_lower:
+                match_score += 1
+
+        # Check for UOM match if provided
+        if uom and uom.lower() in card_name_lower:
+            match_score += 1
+        return match_score
+
+    def _build_search_query(self, product_name, uom, query=None):
+        """Return (key_terms, search_query) for a product; a planned query is used as is"""
         # Extract key terms for better searching
         key_terms = self._extract_key_terms(product_name)
-        
+        if query:
+            return key_terms, query
+
         # Create a simpler search query using just the brand and product type
         # This increases chances of finding similar products
         if key_terms['product_type']:
@@ -105,306 +253,115 @@ class BlinkatScraper(BaseScraper):
         else:
             # Use first 2-3 important terms if product type not found
             search_query = " ".join(key_terms['important_terms'][:3])
-        
+
         # Add UOM only if it's significant (like 1kg vs 500g)
         if uom and len(uom) > 1:
             search_query += f" {uom}"
-            
+        return key_terms, search_query
+
+    def _search_query(self, product_name, uom, query=None):
+        return self._build_search_query(product_name, uom, query)[1]
+
+    def _search_page_url(self, search_query):
         # Replace spaces with + for URL encoding
-        search_query = search_query.replace(" ", "+")
-        search_url = f"{self.search_url}{search_query}"
-        print(f"Simplified search URL: {search_url}")
-        
-        driver = None
-        try:
-            driver = self._init_driver()
-            
-            # Navigate to search page with retry mechanism
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    driver.get(search_url)
-                    break
-                except WebDriverException as e:
-                    if attempt < max_retries - 1:
-                        print(f"Attempt {attempt+1} failed, retrying... Error: {str(e)}")
-                        time.sleep(2)
-                    else:
-                        print(f"Failed to load page after {max_retries} attempts")
-                        return None
-            
-            # Wait for page to load with better error handling
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 
-                        ".product-card, .no-results, .empty-state"))
-                )
-            except TimeoutException:
-                print(f"No products found for {search_query} on Blinkit")
-                return None
-                
-            # Check for no results message
-            if any(text in driver.page_source.lower() for text in ["no results", "no products found", "couldn't find"]):
-                print(f"No products found for {search_query} on Blinkit")
-                return None
-                
-            # Try different product card selectors
-            product_card_selectors = [
-                ".product-card", 
-                "[data-testid='product-card']", 
-                ".plp-product", 
-                ".product-item"
-            ]
-            
-            product_cards = []
-            for selector in product_card_selectors:
-                try:
-                    cards = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if cards:
-                        product_cards = cards
-                        print(f"Found {len(cards)} product cards using selector: {selector}")
-                        break
-                except Exception as e:
-                    print(f"Error finding product cards with selector {selector}: {str(e)}")
-                    continue
-                    
-            if not product_cards:
-                print(f"No product cards found for {search_query} on Blinkit")
-                return None
-                
-            # Try different product name selectors
-            name_selectors = [
-                ".Product__ProductName-sc-11dk8zk-3",
-                ".product-name",
-                "[data-testid='product-name']",
-                ".item-title",
-                "h3.name",
-                ".product-title"
-            ]
-            
-            # Store all products with their match scores
-            matched_products = []
-            
-            # Find most relevant product match using fuzzy matching
-            for card in product_cards:
-                try:
-                    card_product_name = None
-                    
-                    # Try different selectors for product name
-                    for selector in name_selectors:
-                        try:
-                            product_name_element = card.find_element(By.CSS_SELECTOR, selector)
-                            card_product_name = product_name_element.text.strip()
-                            if card_product_name:
-                                print(f"Found product: {card_product_name}")
-                                break
-                        except NoSuchElementException:
-                            continue
-                            
-                    if not card_product_name:
-                        continue
-                        
-                    # Calculate match score based on key terms
-                    match_score = 0
-                    card_name_lower = card_product_name.lower()
-                    
-                    # Brand match is important (higher weight)
-                    if key_terms['brand'] in card_name_lower:
-                        match_score += 3
-                        
-                    # Product type match is important
-                    if key_terms['product_type'] and key_terms['product_type'] in card_name_lower:
-                        match_score += 2
-                        
-                    # Count how many key terms match
-                    for term in key_terms['all_terms']:
-                        if term in card_name_lower:
-                            match_score += 1
-                            
-                    # Check for UOM match if provided
-                    if uom and uom.lower() in card_name_lower:
-                        match_score += 1
-                        
-                    # Only consider products with a minimum match score
-                    if match_score >= 2:
-                        # Get product URL
-                        try:
-                            link_element = card.find_element(By.TAG_NAME, "a")
-                            product_url = link_element.get_attribute("href")
-                            
-                            if product_url:
-                                matched_products.append({
-                                    'name': card_product_name,
-                                    'url': product_url,
-                                    'score': match_score
-                                })
-                        except NoSuchElementException:
-                            continue
-                except Exception as e:
-                    print(f"Error processing card: {str(e)}")
-                    continue
-            
-            # Sort products by match score (highest first)
-            matched_products.sort(key=lambda x: x['score'], reverse=True)
-            
-            # Return the URL of the best match if any found
-            if matched_products:
-                best_match = matched_products[0]
-                print(f"Best match: {best_match['name']} (Score: {best_match['score']})")
-                return best_match['url']
-                    
-            print(f"No matching products found for {product_name} on Blinkit")
-            return None
-        except Exception as e:
-            print(f"Error in Blinkit search: {str(e)}")
-            return None
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass  # Ignore errors during driver cleanup
-            
-            # Force garbage collection to free memory
-            gc.collect()
-
-    def extract_product_details(self, url):
-        """Extract product details from Blinkit product page"""
-        if not url:
-            return None
-            
-        driver = None
-        try:
-            driver = self._init_driver()
-            
-            # Navigate to product page with retry
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    driver.get(url)
-                    break
-                except WebDriverException as e:
-                    if attempt < max_retries - 1:
-                        print(f"Attempt {attempt+1} failed, retrying... Error: {str(e)}")
-                        time.sleep(2)
-                    else:
-                        print(f"Failed to load product page after {max_retries} attempts")
-                        return None
-            
-            # Wait for page to load
-            try:
-                WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, 
-                        ".product-detail, .pdp-container, .product-info"))
-                )
-            except TimeoutException:
-                print(f"Timed out waiting for product details page to load")
-                return None
-
-            # Extract MRP with multiple selector attempts
-            mrp_selectors = [
-                ".ProductInfo__OriginalPrice-sc-urkcd7-4",
-                ".original-price",
-                ".mrp",
-                ".strike-price",
-                "[data-testid='original-price']"
-            ]
-            
-            mrp = "N/A"
-            for selector in mrp_selectors:
-                try:
-                    mrp_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    mrp = mrp_element.text.strip()
-                    mrp = re.sub(r'[^\d.]', '', mrp)
-                    if mrp:
-                        break
-                except NoSuchElementException:
-                    continue
-
-            # Extract Sale Price with multiple selector attempts
-            price_selectors = [
-                ".ProductInfo__DiscountedPrice-sc-urkcd7-3",
-                ".discounted-price",
-                ".sale-price",
-                ".current-price",
-                "[data-testid='current-price']"
-            ]
-            
-            sale_price = "N/A"
-            for selector in price_selectors:
-                try:
-                    price_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    sale_price = price_element.text.strip()
-                    sale_price = re.sub(r'[^\d.]', '', sale_price)
-                    if sale_price:
-                        break
-                except NoSuchElementException:
-                    continue
-
-            # Extract product title with multiple selector attempts
-            title_selectors = [
-                ".ProductHeader__StyledProductHeader-sc-4rfq5f-0 h1",
-                ".product-title",
-                ".pdp-title",
-                "h1.title",
-                "[data-testid='product-title']"
-            ]
-            
-            product_title = ""
-            for selector in title_selectors:
-                try:
-                    title_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    product_title = title_element.text.strip()
-                    if product_title:
-                        break
-                except NoSuchElementException:
-                    continue
-                    
-            quantity, uom = self._extract_quantity_uom(product_title)
-
-            return {
-                "url": url,
-                "mrp": mrp,
-                "sale_price": sale_price,
-                "quantity": quantity,
-                "uom": uom
-            }
-        except Exception as e:
-            print(f"Error extracting details from Blinkit: {str(e)}")
+        return f"{self.search_url}{search_query.replace(' ', '+')}"
+
+    def _best_match(self, products, product_name, uom, key_terms):
+        """Return the URL of the best-scoring product card, or None"""
+        if not products:
+            logger.info(f"No product cards found for {product_name} on Blinkit")
             return None
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                except:
-                    pass  # Ignore errors during driver cleanup
-                
-            # Force garbage collection to free memory
-            gc.collect()
+
+        # Store all products with their match scores
+        matched_products = []
+        for product in products:
+            logger.debug(f"Found product: {product['name']}")
+            match_score = self._score_match(product['name'], key_terms, uom)
+
+            # Only consider products with a minimum match score
+            if match_score >= 2:
+                matched_products.append({**product, 'score': match_score})
+
+        # Sort products by match score (highest first)
+        matched_products.sort(key=lambda x: x['score'], reverse=True)
+
+        # Return the URL of the best match if any found
+        if matched_products:
+            best_match = matched_products[0]
+            logger.debug(f"Best match: {best_match['name']} (Score: {best_match['score']})")
+            return best_match['url']
+
+        logger.info(f"No matching products found for {product_name} on Blinkit")
+        return None
+
+    def search_product(self, product_name, uom, query=None):
+        """Search for a product on Blinkit with improved fuzzy matching"""
+        products = self.search_candidates(product_name, uom, query)
+        key_terms = self._extract_key_terms(product_name)
+        return self._best_match(products, product_name, uom, key_terms)
+
+    def _select_text(self, soup, selectors):
+        """Return the text of the first selector that matches with non-empty text"""
+        for selector in selectors:
+            element = soup.select_one(selector)
+            if element:
+                text = element.get_text(" ", strip=True)
+                if text:
+                    return text
+        return ""
+
+    def _parse_price(self, soup, selectors):
+        for selector in selectors:
+            element = soup.select_one(selector)
+            if element:
+                price = re.sub(r'[^\d.]', '', element.get_text(strip=True))
+                if price:
+                    return price
+        return "N/A"
+
+    def _parse_product_page(self, html, url):
+        """Extract product details from Blinkit product page HTML"""
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Extract MRP and Sale Price with multiple selector attempts
+        mrp = self._parse_price(soup, self.MRP_SELECTORS)
+        sale_price = self._parse_price(soup, self.PRICE_SELECTORS)
+
+        # Extract product title with multiple selector attempts
+        product_title = self._select_text(soup, self.TITLE_SELECTORS)
+        quantity, uom = self._extract_quantity_uom(product_title)
+
+        return {
+            "url": url,
+            "mrp": mrp,
+            "sale_price": sale_price,
+            "quantity": quantity,
+            "uom": uom
+        }
 
     def _extract_quantity_uom(self, title):
         """Extract quantity and UOM from product title"""
         # Common UOM patterns in Blinkit product titles
         quantity_pattern = r'(\d+(\.\d+)?)\s*(ml|g|kg|l|pcs|gm)'
         match = re.search(quantity_pattern, title, re.IGNORECASE)
-        
+
         if match:
             quantity = match.group(1)
             uom = match.group(3).lower()
-            
+
             # Standardize some common UOMs
             if uom == 'gm':
                 uom = 'g'
-                
+
             return quantity, uom
-            
+
         # Try alternative patterns
         alt_pattern = r'(\d+(\.\d+)?)(ml|g|kg|l)'
         match = re.search(alt_pattern, title, re.IGNORECASE)
-        
+
         if match:
             quantity = match.group(1)
             uom = match.group(3).lower()
             return quantity, uom
-            
-        return "N/A", "N/A"
\ No newline at end of file
+
+        return "N/A", "N/A"
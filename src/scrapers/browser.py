@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "project_web_scrape")
+
+# Resolved chromedriver path is cached on disk so later runs skip the
+# webdriver_manager version check (and its network round-trip) entirely.
+DRIVER_CACHE_FILE = os.path.join(CACHE_DIR, "chromedriver.json")
+DRIVER_CACHE_TTL = 24 * 60 * 60
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def _read_cached_driver_path():
+    try:
+        with open(DRIVER_CACHE_FILE) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    path = cached.get("path")
+    if not path or not os.path.exists(path):
+        return None
+    if time.time() - cached.get("resolved_at", 0) > DRIVER_CACHE_TTL:
+        return None
+    return path
+
+
+def _write_cached_driver_path(path):
+    try:
+        os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+        with open(DRIVER_CACHE_FILE, "w") as f:
+            json.dump({"path": path, "resolved_at": time.time()}, f)
+    except OSError:
+        pass  # The on-disk cache is only an optimisation
+
+
+def get_driver_path():
+    """Resolve the chromedriver binary once per process, using the on-disk cache when fresh"""
+    global _driver_path
+    if _driver_path:
+        return _driver_path
+
+    with _driver_path_lock:
+        if _driver_path:
+            return _driver_path
+
+        path = _read_cached_driver_path()
+        if path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            _write_cached_driver_path(path)
+
+        _driver_path = path
+        return _driver_path
+
+
+def create_chrome_driver(options):
+    """Start a Chrome webdriver with the cached chromedriver binary"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    service = Service(get_driver_path())
+    return webdriver.Chrome(service=service, options=options)
+
+
+class DriverPrewarmer:
+    """Starts a browser in the background so the first SKU does not pay Chrome's cold start"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._thread = None
+        self._driver = None
+        self._error = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None or self._driver is not None:
+                return
+            self._thread = threading.Thread(target=self._build, name="driver-prewarm", daemon=True)
+            self._thread.start()
+
+    def _build(self):
+        try:
+            self._driver = self.factory()
+        except Exception as e:
+            self._error = e
+
+    def take(self):
+        """Return the prewarmed driver (waiting for it if still starting), or None"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None:
+            return None
+
+        thread.join()
+        driver, self._driver = self._driver, None
+        if self._error is not None:
+            logger.warning(f"Prewarmed driver failed to start: {str(self._error)}")
+            self._error = None
+        return driver
@@ -0,0 +1,82 @@
+import re
+from urllib.parse import unquote, urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Stable product identifier in each platform's product URLs
+PRODUCT_ID_PATTERNS = {
+    'amazon': re.compile(r'/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?&#]|$)'),
+    'blinkit': re.compile(r'/prid/(\d+)'),
+    'zepto': re.compile(r'/pvid/([0-9a-fA-F-]{36})'),
+}
+
+# Shortest product URL each platform resolves directly from the id
+PRODUCT_URL_TEMPLATES = {
+    'amazon': "{base_url}/dp/{product_id}",
+    'blinkit': "{base_url}/prn/product/prid/{product_id}",
+    'zepto': "{base_url}/pn/product/pvid/{product_id}",
+}
+
+# Query parameters that only identify a click, session or ranking position
+TRACKING_PARAMS = {
+    'ref', 'ref_', 'dib', 'dib_tag', 'qid', 'sr', 'sp_csd', 'psc', 'spc', 'ie',
+    'crid', 'sprefix', 'keywords', 'nsdOptOutParam', 'th', 'smid', 'tag',
+    'linkCode', 'content-id', 'custom_back', 'gclid', 'fbclid',
+}
+TRACKING_PREFIXES = ('utm_', 'pd_rd_', 'pf_rd_')
+
+BASE_URLS = {
+    'amazon': "https://www.amazon.in",
+    'blinkit': "https://blinkit.com",
+    'zepto': "https://www.zeptonow.com",
+}
+
+
+def extract_product_id(platform, url):
+    """Return the platform's product id found in url, or None"""
+    if not url or not isinstance(url, str):
+        return None
+    # Amazon sponsored links carry the real product path URL-encoded in a query param
+    match = PRODUCT_ID_PATTERNS[platform].search(unquote(url))
+    return match.group(1) if match else None
+
+
+def product_url(platform, product_id, base_url=None):
+    """Build the direct product page URL for a known id"""
+    return PRODUCT_URL_TEMPLATES[platform].format(
+        base_url=base_url or BASE_URLS[platform], product_id=product_id
+    )
+
+
+def _unwrap_redirect(url):
+    """Follow Amazon's /sspa/click?...&url=<path> sponsored redirect without a network hop"""
+    parts = urlsplit(url)
+    if parts.path.startswith('/sspa/click'):
+        target = dict(parse_qsl(parts.query)).get('url')
+        if target:
+            return urljoin(f"{parts.scheme}://{parts.netloc}", target)
+    return url
+
+
+def _strip_tracking(url):
+    parts = urlsplit(url)
+    path = re.sub(r'/ref=[^/]*$', '', parts.path)
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES)
+    ]
+    return urlunsplit((parts.scheme, parts.netloc, path, urlencode(params), ''))
+
+
+def canonicalize_url(platform, url, base_url=None):
+    """Canonical form of a scraped URL, used before fetching, caching and storing.
+
+    Product pages collapse to the id-only URL (Amazon /dp/<ASIN>, Blinkit
+    prid, Zepto pvid). Anything else keeps its path with redirects unwrapped
+    and tracking parameters dropped.
+    """
+    if not url or not isinstance(url, str):
+        return url
+    url = _unwrap_redirect(url)
+    product_id = extract_product_id(platform, url)
+    if product_id:
+        return product_url(platform, product_id, base_url=base_url)
+    return _strip_tracking(url)
@@ -0,0 +1,352 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from scrapers.backends import BrowserBackend, BrowserPage
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Archive used when SCRAPER_ARCHIVE is set; SCRAPER_ARCHIVE_MODE picks record (default) or replay
+ARCHIVE_ENV = "SCRAPER_ARCHIVE"
+ARCHIVE_MODE_ENV = "SCRAPER_ARCHIVE_MODE"
+
+_active = None
+
+
+class ReplayMissError(Exception):
+    """A replayed run asked for a response the archive does not hold"""
+    pass
+
+
+def _store_body(bodies, data):
+    """Keep a body once in bodies, keyed by its hash, and return the key"""
+    if isinstance(data, bytes):
+        try:
+            text, encoding = data.decode("utf-8"), None
+        except UnicodeDecodeError:
+            text, encoding = base64.b64encode(data).decode("ascii"), "base64"
+    else:
+        text, encoding = data, None
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    if key not in bodies:
+        bodies[key] = {"text": text, "encoding": encoding} if encoding else {"text": text}
+    return key
+
+
+def _load_body(bodies, key):
+    body = bodies[key]
+    if body.get("encoding") == "base64":
+        return base64.b64decode(body["text"])
+    return body["text"].encode("utf-8")
+
+
+class Archive:
+    """Every HTTP response and browser page call of a run, in one gzipped HAR file.
+
+    HTTP fetches are standard HAR 1.2 entries. Browser page calls (navigation,
+    state probes, page HTML, ...) are kept under "_pageCalls", keyed by the
+    page's session scope, the last URL it opened, the last text typed into it,
+    the method and its arguments (timeouts excluded). Bodies and page HTML are
+    stored once per distinct content under "_bodies".
+
+    In replay mode the same calls are answered from the archive in recorded
+    order, without network or browser. A call that was never recorded raises
+    ReplayMissError.
+    """
+
+    def __init__(self, path, mode=REPLAY):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown archive mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries = []
+        self._page_calls = []
+        self._bodies = {}
+        self._http = {}
+        self._calls = {}
+        self._positions = {}
+        self.hits = 0
+        self.misses = 0
+        if mode == REPLAY:
+            self._load()
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    def _load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            log = json.load(f)["log"]
+        self._entries = log.get("entries", [])
+        self._page_calls = log.get("_pageCalls", [])
+        self._bodies = log.get("_bodies", {})
+        for entry in self._entries:
+            self._http.setdefault(entry["request"]["url"], []).append(entry)
+        for call in self._page_calls:
+            self._calls.setdefault(self._call_key(call), []).append(call)
+
+    @staticmethod
+    def _call_key(call):
+        return (call["scope"], call["url"], call["query"], call["method"], call["args"])
+
+    def _next(self, table, key):
+        """Recorded values for key are handed out in order; the last one repeats"""
+        with self._lock:
+            values = table.get(key)
+            if not values:
+                self.misses += 1
+                return None
+            position = self._positions.get((id(table), key), 0)
+            self._positions[(id(table), key)] = position + 1
+            self.hits += 1
+            return values[min(position, len(values) - 1)]
+
+    def record_response(self, url, response, elapsed):
+        entry = {
+            "startedDateTime": datetime.now(timezone.utc).isoformat(),
+            "time": round(elapsed * 1000, 1),
+            "request": {"method": "GET", "url": url, "headers": []},
+            "response": {
+                "status": response.status_code,
+                "statusText": response.reason or "",
+                "headers": [{"name": name, "value": value} for name, value in response.headers.items()
+                            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")],
+                "content": {"size": len(response.content), "mimeType": response.headers.get("Content-Type", "")},
+            },
+        }
+        with self._lock:
+            entry["response"]["content"]["_body"] = _store_body(self._bodies, response.content)
+            self._entries.append(entry)
+
+    def replay_response(self, url):
+        entry = self._next(self._http, url)
+        if entry is None:
+            raise ReplayMissError(f"No recorded response for {url}")
+        response = requests.Response()
+        response.status_code = entry["response"]["status"]
+        response.reason = entry["response"].get("statusText", "")
+        response.headers = CaseInsensitiveDict({h["name"]: h["value"] for h in entry["response"]["headers"]})
+        response._content = _load_body(self._bodies, entry["response"]["content"]["_body"])
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+        return response
+
+    def record_call(self, call, result=None, error=None, elapsed=0.0):
+        call = {**call, "time": round(elapsed * 1000, 1)}
+        with self._lock:
+            if error is not None:
+                call["error"] = error
+            elif isinstance(result, str) and len(result) > 256:
+                call["_body"] = _store_body(self._bodies, result)
+            else:
+                call["result"] = result
+            self._page_calls.append(call)
+
+    def replay_call(self, call):
+        recorded = self._next(self._calls, self._call_key(call))
+        if recorded is None:
+            raise ReplayMissError(f"No recorded {call['method']} on {call['url'] or 'a new page'}")
+        if "error" in recorded:
+            raise Exception(recorded["error"])
+        if "_body" in recorded:
+            return _load_body(self._bodies, recorded["_body"]).decode("utf-8")
+        return recorded.get("result")
+
+    def stats(self):
+        """Entry counts, recorded network/browser time and (when replaying) hits and misses"""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "http_entries": len(self._entries),
+                "page_calls": len(self._page_calls),
+                "bodies": len(self._bodies),
+                "recorded_seconds": round(
+                    sum(e["time"] for e in self._entries) / 1000 + sum(c["time"] for c in self._page_calls) / 1000, 2
+                ),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def save(self):
+        """Write a recorded archive atomically; replayed archives are left untouched"""
+        if self.replaying:
+            return
+        with self._lock:
+            log = {
+                "version": "1.2",
+                "creator": {"name": "project_web_scrape", "version": "1"},
+                "entries": list(self._entries),
+                "_pageCalls": list(self._page_calls),
+                "_bodies": dict(self._bodies),
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"log": log}, f)
+        os.replace(tmp_path, self.path)
+
+
+def _state_scope(storage_state):
+    # Saved sessions carry the platform and location they were made for
+    if not storage_state:
+        return ""
+    return f"{storage_state.get('platform') or ''}:{storage_state.get('location') or ''}"
+
+
+class _ArchivedPage(BrowserPage):
+    """Page whose calls are recorded to, or answered from, an archive"""
+
+    def __init__(self, archive, scope, page=None):
+        self.archive = archive
+        self.scope = scope
+        self.page = page
+        self.url = ""
+        self.query = ""
+
+    def _call(self, method, *args, **kwargs):
+        call = {
+            "scope": self.scope,
+            "url": self.url,
+            "query": self.query,
+            "method": method,
+            "args": json.dumps(args, sort_keys=True, default=str),
+        }
+        if self.archive.replaying:
+            return self.archive.replay_call(call)
+        start = time.perf_counter()
+        try:
+            result = getattr(self.page, method)(*args, **kwargs)
+        except Exception as e:
+            self.archive.record_call(call, error=str(e), elapsed=time.perf_counter() - start)
+            raise
+        self.archive.record_call(call, result, elapsed=time.perf_counter() - start)
+        return result
+
+    def goto(self, url, timeout=30):
+        self.url, self.query = url, ""
+        return self._call("goto", url, timeout=timeout)
+
+    def wait_for(self, selectors, timeout=10):
+        return self._call("wait_for", selectors, timeout=timeout)
+
+    def click(self, selectors, timeout=5):
+        return self._call("click", selectors, timeout=timeout)
+
+    def type_text(self, selectors, text, timeout=5):
+        result = self._call("type_text", selectors, text, timeout=timeout)
+        self.query = text
+        return result
+
+    def fill(self, selectors, text, submit=True, timeout=5):
+        result = self._call("fill", selectors, text, submit, timeout=timeout)
+        self.query = text
+        return result
+
+    def evaluate(self, script, arg=None):
+        return self._call("evaluate", script, arg)
+
+    def content(self):
+        return self._call("content")
+
+    def storage_state(self):
+        return self._call("storage_state")
+
+    def wait_for_state(self, states, timeout=10):
+        return self._call("wait_for_state", states, timeout=timeout)
+
+    def wait_for_network_idle(self, timeout=10):
+        return self._call("wait_for_network_idle", timeout=timeout)
+
+    def close(self):
+        if self.page is not None:
+            self.page.close()
+
+
+class RecordingBackend(BrowserBackend):
+    """Wraps a real backend and records every call made on its pages"""
+
+    def __init__(self, backend, archive):
+        self.backend = backend
+        self.archive = archive
+        self.name = backend.name
+
+    def new_page(self, storage_state=None):
+        return _ArchivedPage(self.archive, _state_scope(storage_state), self.backend.new_page(storage_state))
+
+    def prewarm(self):
+        self.backend.prewarm()
+
+    def close(self):
+        self.backend.close()
+
+
+class ReplayBackend(BrowserBackend):
+    """Serves pages from an archive; never starts a browser"""
+
+    name = "replay"
+
+    def __init__(self, archive):
+        self.archive = archive
+
+    def new_page(self, storage_state=None):
+        return _ArchivedPage(self.archive, _state_scope(storage_state))
+
+
+def active_archive():
+    return _active
+
+
+def activate(archive):
+    """Route all scraper HTTP fetches and browser pages created from now on through archive"""
+    global _active
+    from scrapers.session_manager import session_manager
+    from scrapers.session_state import session_store
+
+    _active = archive
+    session_manager.archive = archive
+    # Replayed pages are keyed by the session they were recorded in, not by live cookies
+    session_store.offline = archive.replaying
+    logger.info(f"Scraper archive {archive.path} active in {archive.mode} mode")
+    return archive
+
+
+def deactivate():
+    global _active
+    from scrapers.session_manager import session_manager
+    from scrapers.session_state import session_store
+
+    _active = None
+    session_manager.archive = None
+    session_store.offline = False
+
+
+def wrap_backend(backend_factory):
+    """Backend for the active archive: the real one (recording) or none at all (replay)"""
+    if _active is None:
+        return backend_factory()
+    if _active.replaying:
+        return ReplayBackend(_active)
+    return RecordingBackend(backend_factory(), _active)
+
+
+def archive_from_env():
+    """Archive configured through SCRAPER_ARCHIVE / SCRAPER_ARCHIVE_MODE, or None"""
+    path = os.environ.get(ARCHIVE_ENV)
+    if not path:
+        return None
+    return Archive(path, os.environ.get(ARCHIVE_MODE_ENV, RECORD))
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+user_agents = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/15.0 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
+]
+
+
+class SessionManager:
+    """Hands out one pooled requests.Session per worker thread.
+
+    requests.Session is not thread-safe, so every worker gets its own session
+    with an HTTPAdapter sized for the hosts it talks to. Keep-alive lets the
+    pooled connections be reused across fetches so each SKU does not pay for
+    a new TCP/TLS handshake.
+
+    A worker only has one request in flight at a time, so a couple of
+    connections per host is enough; total connections scale with the number
+    of workers rather than being capped by a single shared pool.
+    """
+
+    def __init__(self, pool_connections=4, pool_maxsize=2, max_retries=3, backoff_factor=0.5):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = []
+        # Set by scrapers.replay.activate() to record or replay responses
+        self.archive = None
+
+    def configure(self, pool_connections=None, pool_maxsize=None, max_retries=None, backoff_factor=None):
+        """Update pool and retry settings; only sessions created afterwards pick them up"""
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+            if max_retries is not None:
+                self.max_retries = max_retries
+            if backoff_factor is not None:
+                self.backoff_factor = backoff_factor
+
+    def _build_session(self):
+        retry = Retry(
+            total=self.max_retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            'User-Agent': random.choice(user_agents),
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Language': 'en-IN,en;q=0.9',
+            'Connection': 'keep-alive',
+        })
+        return session
+
+    def get_session(self):
+        """Return the calling thread's session, creating it on first use"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._build_session()
+            self._local.session = session
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    @property
+    def offline(self):
+        """True while responses are replayed from an archive instead of fetched"""
+        return self.archive is not None and self.archive.replaying
+
+    def get(self, url, **kwargs):
+        archive = self.archive
+        if archive is None:
+            return self.get_session().get(url, **kwargs)
+        if archive.replaying:
+            return archive.replay_response(url)
+        start = time.perf_counter()
+        response = self.get_session().get(url, **kwargs)
+        archive.record_response(url, response, time.perf_counter() - start)
+        return response
+
+    def stats(self):
+        """Connection reuse statistics summed over every worker session"""
+        with self._lock:
+            sessions = list(self._sessions)
+
+        connections = 0
+        requests_sent = 0
+        for session in sessions:
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    connections += pool.num_connections
+                    requests_sent += pool.num_requests
+
+        reused = max(requests_sent - connections, 0)
+        return {
+            "sessions": len(sessions),
+            "requests": requests_sent,
+            "new_connections": connections,
+            "reused_connections": reused,
+            "reuse_ratio": (reused / requests_sent) if requests_sent else 0.0,
+        }
+
+    def close(self):
+        """Close every session handed out so far"""
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
+
+session_manager = SessionManager()
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from scrapers.browser import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+SESSION_DIR = os.path.join(CACHE_DIR, "sessions")
+# Sessions are re-bootstrapped after this long even if nothing looks wrong,
+# so a location or onboarding flag the site silently dropped gets re-applied.
+SESSION_MAX_AGE = 12 * 60 * 60
+# After a failed bootstrap, pages run without saved state for this long before retrying
+BOOTSTRAP_RETRY_AFTER = 5 * 60
+
+# Collects the current origin's localStorage in Playwright storage_state form
+LOCAL_STORAGE_JS = """() => ({
+    origin: location.origin,
+    localStorage: Object.keys(localStorage).map(name => ({name, value: localStorage.getItem(name)}))
+})"""
+
+# Seeds an origin's localStorage before any page script runs. Keys the page
+# already holds are left alone so values it updated during the run survive.
+LOCAL_STORAGE_SEED_JS = """(() => {
+    const origin = %s;
+    const items = %s;
+    if (location.origin !== origin) return;
+    for (const item of items) {
+        if (localStorage.getItem(item.name) === null) localStorage.setItem(item.name, item.value);
+    }
+})();"""
+
+
+def _slug(value):
+    return re.sub(r'[^\w-]+', '_', str(value).lower()).strip('_') or "default"
+
+
+def live_cookies(state, now=None):
+    """Cookies in state that have not expired; session cookies (expires -1) always count"""
+    now = time.time() if now is None else now
+    return [
+        cookie for cookie in state.get("cookies", [])
+        if cookie.get("expires", -1) < 0 or cookie["expires"] > now
+    ]
+
+
+def to_cdp_cookie(cookie):
+    """Playwright storage_state cookie -> Network.setCookies parameter"""
+    params = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly") if key in cookie}
+    if cookie.get("expires", -1) >= 0:
+        params["expires"] = cookie["expires"]
+    if cookie.get("sameSite") in ("Strict", "Lax", "None"):
+        params["sameSite"] = cookie["sameSite"]
+    return params
+
+
+def from_cdp_cookie(cookie):
+    """Network.getAllCookies entry -> Playwright storage_state cookie"""
+    return {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie["domain"],
+        "path": cookie.get("path", "/"),
+        "expires": -1 if cookie.get("session") else cookie.get("expires", -1),
+        "httpOnly": cookie.get("httpOnly", False),
+        "secure": cookie.get("secure", False),
+        "sameSite": cookie.get("sameSite", "Lax"),
+    }
+
+
+class SessionStore:
+    """Per (platform, location) browser session state saved under SESSION_DIR.
+
+    A state is Playwright's storage_state shape (cookies plus per-origin
+    localStorage) with the time it was captured. Scrapers run their location
+    and onboarding flow once in a bootstrap page, save what the site stored,
+    and every later page starts from that state instead of repeating the
+    flow. A state is used until it is older than max_age, all of its cookies
+    have expired, or a scraper invalidates it after the site asked again.
+    """
+
+    def __init__(self, directory=SESSION_DIR, max_age=SESSION_MAX_AGE):
+        self.directory = directory
+        self.max_age = max_age
+        self._states = {}
+        self._lock = threading.Lock()
+        self._bootstrap_locks = {}
+        self._failed_at = {}
+        # While replaying an archive, pages only need to know which session they stand for
+        self.offline = False
+
+    def path(self, platform, location=None):
+        return os.path.join(self.directory, f"{platform}-{_slug(location)}.json")
+
+    def is_valid(self, state, now=None):
+        now = time.time() if now is None else now
+        if not state or now - state.get("saved_at", 0) > self.max_age:
+            return False
+        return not state.get("cookies") or bool(live_cookies(state, now))
+
+    def load(self, platform, location=None):
+        """Return the saved state for (platform, location) if it is still valid, else None"""
+        key = (platform, location)
+        with self._lock:
+            state = self._states.get(key)
+        if state is None:
+            try:
+                with open(self.path(platform, location)) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                return None
+        if not self.is_valid(state):
+            return None
+        # States saved by older versions do not name their session
+        state.setdefault("platform", platform)
+        state.setdefault("location", location)
+        with self._lock:
+            self._states[key] = state
+        return state
+
+    def save(self, platform, state, location=None):
+        state = {
+            "cookies": state.get("cookies", []),
+            "origins": state.get("origins", []),
+            "saved_at": time.time(),
+            "platform": platform,
+            "location": location,
+        }
+        with self._lock:
+            self._states[(platform, location)] = state
+        path = self.path(platform, location)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass  # The in-memory state still serves this run
+        return state
+
+    def invalidate(self, platform, location=None):
+        """Forget a state the site no longer honours so the next page bootstraps again"""
+        with self._lock:
+            self._states.pop((platform, location), None)
+        try:
+            os.remove(self.path(platform, location))
+        except OSError:
+            pass
+
+    @staticmethod
+    def empty_state(platform, location=None):
+        """State with no cookies or storage that still names its (platform, location) session"""
+        return {"cookies": [], "origins": [], "platform": platform, "location": location}
+
+    def get(self, platform, location, bootstrap):
+        """Valid state for (platform, location), running bootstrap() once to create it if needed.
+
+        bootstrap returns a storage state dict, or None if onboarding failed;
+        in that case pages start without saved state until BOOTSTRAP_RETRY_AFTER.
+        """
+        if self.offline:
+            return self.empty_state(platform, location)
+        key = (platform, location)
+        state = self.load(platform, location)
+        if state is not None:
+            return state
+        if time.time() - self._failed_at.get(key, 0) < BOOTSTRAP_RETRY_AFTER:
+            return None
+        with self._lock:
+            bootstrap_lock = self._bootstrap_locks.setdefault(key, threading.Lock())
+        # Only one worker runs the onboarding flow; the others wait and reuse its result
+        with bootstrap_lock:
+            state = self.load(platform, location)
+            if state is not None or time.time() - self._failed_at.get(key, 0) < BOOTSTRAP_RETRY_AFTER:
+                return state
+            logger.info(f"Bootstrapping {platform} session for {location or 'default location'}")
+            state = bootstrap()
+            if not state:
+                self._failed_at[key] = time.time()
+                return None
+            self._failed_at.pop(key, None)
+            return self.save(platform, state, location)
+
+
+session_store = SessionStore()
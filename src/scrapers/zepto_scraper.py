@@ -1,250 +1,194 @@
-from scrapers.base_scraper import BaseScraper
+from scrapers.base_scraper import BrowserScraper
+from scrapers.browser import create_chrome_driver
+from scrapers.adaptive_wait import CAPTCHA_STATE, EMPTY_TEXTS
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin, quote
+import logging
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-import time
 
-class ZeptoScraper(BaseScraper):
-    def __init__(self):
-        super().__init__()
+logger = logging.getLogger(__name__)
+
+class ZeptoScraper(BrowserScraper):
+    platform = 'zepto'
+
+    RESULT_SELECTORS = [".search-item-card"]
+    CARD_NAME_SELECTOR = ".Product__ProductName-sc-11dk8zk-3"
+    PRODUCT_PAGE_SELECTORS = [".product-detail-container"]
+    SEARCH_INPUT_SELECTORS = [
+        "input[placeholder*='Search']",
+        "[data-testid='searchBar'] input",
+        "input[type='search']"
+    ]
+    CARD_SIGNATURE_SELECTOR = ".search-item-card"
+    # Page states raced against each other; negative states come first so they win ties
+    SEARCH_STATES = {
+        "captcha": CAPTCHA_STATE,
+        "location": {"texts": ["select your location"]},
+        "empty": {"selectors": ["[data-testid='empty-state']", ".no-results"], "texts": EMPTY_TEXTS},
+        "results": {"selectors": RESULT_SELECTORS},
+    }
+    PRODUCT_STATES = {
+        "captcha": CAPTCHA_STATE,
+        "not_found": {"texts": ["page not found", "product not found"]},
+        "product": {"selectors": PRODUCT_PAGE_SELECTORS},
+    }
+    # What the home page shows on a first visit: the location prompt, or the store
+    HOME_STATES = {
+        "captcha": CAPTCHA_STATE,
+        "location": {"texts": ["select your location"]},
+        "ready": {"selectors": SEARCH_INPUT_SELECTORS},
+    }
+    # Location picker selector fallbacks, tried in order
+    LOCATION_SELECTORS = [
+        ".location-selector",
+        "[data-testid='location-selector']",
+        ".address-selection",
+        ".select-location"
+    ]
+    LOCATION_INPUT_SELECTORS = [
+        ".location-input",
+        "[data-testid='location-input']",
+        "input[placeholder*='location']",
+        "input[placeholder*='address']"
+    ]
+    LOCATION_SUGGESTION_SELECTORS = [
+        ".location-suggestion",
+        ".address-suggestion",
+        ".suggestion-item",
+        "[data-testid='suggestion-item']"
+    ]
+
+    WAIT_TIMEOUTS = {"home": 10, "search": 10, "product": 10}
+
+    def __init__(self, backend=None, location="Mumbai"):
         self.base_url = "https://www.zeptonow.com"
         self.search_url = f"{self.base_url}/search?q="
-    
-    def _init_selenium(self):
+        super().__init__(backend, location)
+
+    def _create_driver(self):
         """Initialize Selenium WebDriver and return driver"""
+        from selenium.webdriver.chrome.options import Options
+
         try:
             # Set additional options to reduce memory usage
-            self.chrome_options = Options()
-            self.chrome_options.add_argument("--disable-extensions")
-            self.chrome_options.add_argument("--disable-gpu")
-            self.chrome_options.add_argument("--disable-dev-shm-usage")
-            self.chrome_options.add_argument("--no-sandbox")
-            self.chrome_options.add_argument("--disable-features=NetworkService")
-            self.chrome_options.add_argument("--window-size=1280,720")
-            self.chrome_options.add_argument("--disable-browser-side-navigation")
-            self.chrome_options.add_argument("--disable-infobars")
+            chrome_options = Options()
+            chrome_options.add_argument("--disable-extensions")
+            chrome_options.add_argument("--disable-gpu")
+            chrome_options.add_argument("--disable-dev-shm-usage")
+            chrome_options.add_argument("--no-sandbox")
+            chrome_options.add_argument("--disable-features=NetworkService")
+            chrome_options.add_argument("--window-size=1280,720")
+            chrome_options.add_argument("--disable-browser-side-navigation")
+            chrome_options.add_argument("--disable-infobars")
             
             # Limit the browser cache size
-            self.chrome_options.add_argument("--disk-cache-size=1")
-            self.chrome_options.add_argument("--media-cache-size=1")
+            chrome_options.add_argument("--disk-cache-size=1")
+            chrome_options.add_argument("--media-cache-size=1")
             
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=self.chrome_options)
+            driver = create_chrome_driver(chrome_options)
             
             # Set page load timeout
-            driver.set_page_load_timeout(30)
+            driver.set_page_load_timeout(self.page_load_timeout)
             
             return driver
         except Exception as e:
-            print(f"Error initializing driver: {str(e)}")
+            logger.error(f"Error initializing driver: {str(e)}")
             # Try to create a new driver with minimal options as fallback
             try:
                 minimal_options = Options()
                 minimal_options.add_argument("--headless")
                 minimal_options.add_argument("--no-sandbox")
-                service = Service(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=minimal_options)
+                driver = create_chrome_driver(minimal_options)
                 return driver
             except Exception as e2:
-                print(f"Fallback driver initialization also failed: {str(e2)}")
+                logger.error(f"Fallback driver initialization also failed: {str(e2)}")
                 raise
+
+    def _set_location(self, page, location):
+        """Pick a delivery location through the location dialog; return True if one was selected"""
+        logger.info(f"Attempting to set location {location} on Zepto...")
+        if page.click(self.LOCATION_SELECTORS, timeout=5):
+            logger.debug("Location selector clicked")
+        if page.type_text(self.LOCATION_INPUT_SELECTORS, location, timeout=5):
+            logger.debug("Location input filled")
+        # Wait for and select first suggestion
+        if page.click(self.LOCATION_SUGGESTION_SELECTORS, timeout=5):
+            logger.debug("Location suggestion selected")
+            # Let the site persist the chosen address before its state is captured
+            page.wait_for_network_idle(timeout=5)
+            return True
+        return False
+
+    def _parse_search_results(self, html):
+        """Return [{'name', 'url'}] for every search-item-card on the page"""
+        soup = BeautifulSoup(html, 'html.parser')
+        products = []
+        for card in soup.select(", ".join(self.RESULT_SELECTORS)):
+            name_element = card.select_one(self.CARD_NAME_SELECTOR)
+            if not name_element:
+                logger.debug("Element not found: product name")
+                continue
+            link_element = card if card.name == "a" else card.find("a", href=True)
+            href = link_element.get("href") if link_element else None
+            if not href:
+                continue
+            # Some links might be relative paths
+            products.append({
+                'name': name_element.get_text(" ", strip=True),
+                'url': self.canonicalize_url(urljoin(self.base_url, href))
+            })
+        return products
+    
+    def _search_page_url(self, search_query):
+        return f"{self.search_url}{quote(search_query)}"
     
-    def search_product(self, product_name, uom):
+    def search_product(self, product_name, uom, query=None):
         """Search for a product on Zepto and return the matching product URL"""
-        search_query = f"{product_name} {uom}".replace(" ", "%20")
-        search_url = f"{self.search_url}{search_query}"
+        products = self.search_candidates(product_name, uom, query)
         
-        driver = self._init_selenium()
-        try:
-            # Navigate to search page
-            driver.get(search_url)
-            
-            # Wait for search results to load
-            wait = WebDriverWait(driver, 10)
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "search-item-card")))
-            
-            # First, check if we need to set a delivery location
-            if "select your location" in driver.page_source.lower():
-                # Handle location setting if needed
-                try:
-                    print("Attempting to set location on Zepto...")
-                    # Try multiple selector patterns for location elements
-                    location_selectors = [
-                        ".location-selector", 
-                        "[data-testid='location-selector']",
-                        ".address-selection",
-                        ".select-location"
-                    ]
-                    for selector in location_selectors:
-                        try:
-                            location_element = WebDriverWait(driver, 5).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                            location_element.click()
-                            print("Location selector clicked")
-                            break
-                        except (TimeoutException, NoSuchElementException):
-                            continue
-                    # Input location
-                    input_selectors = [
-                        ".location-input",
-                        "[data-testid='location-input']",
-                        "input[placeholder*='location']",
-                        "input[placeholder*='address']"
-                    ]
-                    for selector in input_selectors:
-                        try:
-                            input_element = WebDriverWait(driver, 5).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                            input_element.send_keys("Mumbai")
-                            print("Location input filled")
-                            break
-                        except (TimeoutException, NoSuchElementException):
-                            continue
-                     # Wait for and select first suggestion
-                    suggestion_selectors = [
-                        ".location-suggestion",
-                        ".address-suggestion",
-                        ".suggestion-item",
-                        "[data-testid='suggestion-item']"
-                    ]
-                    for selector in suggestion_selectors:
-                        try:
-                            suggestion = WebDriverWait(driver, 5).until(
-                                EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                            )
-                            suggestion.click()
-                            print("Location suggestion selected")
-                            
-                            # Wait for page to reload with products
-                            WebDriverWait(driver, 10).until(
-                                EC.presence_of_element_located((By.CLASS_NAME, "search-item-card"))
-                            )
-                            break
-                        except (TimeoutException, NoSuchElementException):
-                            continue
-                except Exception as e:
-                    print(f"Could not set location on Zepto: {str(e)}")
-                    return None
-
-                    # # Click on location input
-                    # location_selector = driver.find_element(By.CLASS_NAME, "location-selector")
-                    # location_selector.click()
-                    
-                    # # Type a default location (e.g., Mumbai)
-                    # location_input = driver.find_element(By.CLASS_NAME, "location-input")
-                    # location_input.send_keys("Mumbai")
-                    
-                    # # Select first suggestion
-                    # location_suggestion = driver.find_element(By.CLASS_NAME, "location-suggestion")
-                    # location_suggestion.click()
-                    
-                    # # Wait for page to reload with products
-                    # wait.until(EC.presence_of_element_located((By.CLASS_NAME, "search-item-card")))
-                # except (TimeoutException, NoSuchElementException):
-                #     print("Could not set location on Zepto")
-                #     return None
-            
-            # Extract product cards
-            product_cards = driver.find_elements(By.CLASS_NAME, "search-item-card")
-            
-            if not product_cards:
-                return None
-            
-            # Find most relevant product match
-            for card in product_cards:
-                try:
-                    # Get product name
-                    # product_name_element = card.find_element(By.CLASS_NAME, "product-name")
-                    product_name_element = WebDriverWait(card, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".Product__ProductName-sc-11dk8zk-3")))
-                    card_product_name = product_name_element.text.strip()
-                    
-                    # Check for reasonable match
-                    search_terms = product_name.lower().split()
-                    if any(term in card_product_name.lower() for term in search_terms[:3]):
-                        # Get product URL
-                        link_element = card.find_element(By.TAG_NAME, "a")
-                        href = link_element.get_attribute("href")
-                        if href:
-                            # Some links might be relative paths
-                            if href.startswith("/"):
-                                return f"{self.base_url}{href}"
-                            else:
-                                return href
-                except (NoSuchElementException, Exception) as e:
-                    print(f"Element not found: {str(e)}")
-                    continue
-            
-            return None
-        finally:
-            driver.quit()
+        # Find most relevant product match
+        search_terms = product_name.lower().split()
+        for product in products:
+            # Check for reasonable match
+            if any(term in product['name'].lower() for term in search_terms[:3]):
+                return product['url']
+        
+        return None
     
-    def extract_product_details(self, url):
-        """Extract product details from Zepto product page"""
-        if not url:
-            return None
+    def _parse_product_page(self, html, url):
+        """Extract product details from Zepto product page HTML"""
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Extract MRP
+        mrp_element = soup.select_one(".strikethrough-price")
+        mrp = re.sub(r'[^\d.]', '', mrp_element.get_text(strip=True)) if mrp_element else "N/A"
         
-        driver = self._init_selenium()
-        try:
-            driver.get(url)
-            
-            # Wait for product details to load
-            wait = WebDriverWait(driver, 10)
-            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "product-detail-container")))
-            
-            # Extract MRP
-            try:
-                mrp_element = driver.find_element(By.CLASS_NAME, "strikethrough-price")
-                mrp = mrp_element.text.strip()
-                mrp = re.sub(r'[^\d.]', '', mrp) if mrp != "N/A" else mrp
-            except NoSuchElementException:
-                mrp = "N/A"
-            
-            # Extract Sale Price
-            try:
-                price_element = driver.find_element(By.CLASS_NAME, "actual-price")
-                sale_price = price_element.text.strip()
-                sale_price = re.sub(r'[^\d.]', '', sale_price) if sale_price != "N/A" else sale_price
-            except NoSuchElementException:
-                sale_price = "N/A"
-            
-            # Extract product title for quantity and UOM
-            try:
-                title_element = driver.find_element(By.CLASS_NAME, "product-title")
-                product_title = title_element.text.strip()
-                
-                # Try to find quantity/UOM from the product details section as well
-                try:
-                    details_element = driver.find_element(By.CLASS_NAME, "product-weight")
-                    product_details = details_element.text.strip()
-                except NoSuchElementException:
-                    product_details = ""
-                
-                # Combine title and details for better pattern matching
-                combined_text = f"{product_title} {product_details}"
-                quantity, uom = self._extract_quantity_uom(combined_text)
-            except NoSuchElementException:
-                quantity, uom = "N/A", "N/A"
-            
-            return {
-                "url": url,
-                "mrp": mrp,
-                "sale_price": sale_price,
-                "quantity": quantity,
-                "uom": uom
-            }
-        except Exception as e:
-            print(f"Error extracting details from Zepto: {str(e)}")
-            return None
-        finally:
-            driver.quit()
+        # Extract Sale Price
+        price_element = soup.select_one(".actual-price")
+        sale_price = re.sub(r'[^\d.]', '', price_element.get_text(strip=True)) if price_element else "N/A"
+        
+        # Extract product title for quantity and UOM
+        title_element = soup.select_one(".product-title")
+        if title_element:
+            product_title = title_element.get_text(" ", strip=True)
+            
+            # Try to find quantity/UOM from the product details section as well
+            details_element = soup.select_one(".product-weight")
+            product_details = details_element.get_text(" ", strip=True) if details_element else ""
+            
+            # Combine title and details for better pattern matching
+            combined_text = f"{product_title} {product_details}"
+            quantity, uom = self._extract_quantity_uom(combined_text)
+        else:
+            quantity, uom = "N/A", "N/A"
+        
+        return {
+            "url": url,
+            "mrp": mrp,
+            "sale_price": sale_price,
+            "quantity": quantity,
+            "uom": uom
+        }
     
     def _extract_quantity_uom(self, text):
         """Extract quantity and UOM from product text"""
@@ -1 +0,0 @@
-BlinkatScraper
\ No newline at end of file
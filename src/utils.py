@@ -1,28 +1,27 @@
 import pandas as pd
-import re
-from urllib.parse import quote
 
-def load_data(file_path):
-    """Load data from CSV file"""
+from result_store import is_columnar_path, read_results, write_results, filter_frame, filter_columns
+
+def load_data(file_path, columns=None, filters=None):
+    """Load data from CSV, or from a Parquet/Arrow result file (memory-mapped).
+
+    filters (pyarrow DNF form) apply to every format; CSV rows are filtered
+    in pandas after loading.
+    """
+    if is_columnar_path(file_path):
+        return read_results(file_path, columns=columns, filters=filters)
     # print("Processing first 100 rows")
-    return pd.read_csv(file_path) # file size limited to only top 100 rows
+    usecols = list(dict.fromkeys(columns + filter_columns(filters))) if columns else None
+    df = filter_frame(pd.read_csv(file_path, usecols=usecols), filters) # file size limited to only top 100 rows
+    return df[columns] if columns else df
     # return pd.read_csv(file_path)
 
 def save_data(data, file_path):
-    """Save data to CSV file"""
-    data.to_csv(file_path, index=False)
-
-def clean_product_name(name):
-    """Clean product name for better matching"""
-    # Remove special characters and extra spaces
-    name = re.sub(r'[^\w\s]', ' ', name)
-    name = re.sub(r'\s+', ' ', name).strip()
-    return name
-
-def generate_search_query(product_name, uom):
-    """Generate search query for product"""
-    query = f"{clean_product_name(product_name)} {uom}"
-    return quote(query)
+    """Save data to CSV, or to typed Parquet/Arrow when the path ends in .parquet/.arrow/.feather"""
+    if is_columnar_path(file_path):
+        write_results(data, file_path)
+    else:
+        data.to_csv(file_path, index=False)
 
 def calculate_price_difference(row):
     """Calculate price difference between Instamart and competitor"""
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+# The application modules import each other as top-level modules from src/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture
+def fake_scrapers(tmp_path, monkeypatch):
+    """Run ProductMatcher from tmp_path on fake scrapers, without delays between requests.
+
+    Call it with one scraper (used for its `platform`) or a {platform: scraper}
+    dict, plus any config overrides; it returns the matching load_config()
+    result.
+    """
+    from MAIN2 import ProductMatcher
+    from config import load_config
+
+    monkeypatch.chdir(tmp_path)
+
+    def install(scrapers, *overrides):
+        if not isinstance(scrapers, dict):
+            scrapers = {scrapers.platform: scrapers}
+        monkeypatch.setattr(ProductMatcher, "_get_scraper", lambda self, platform: scrapers[platform])
+        delays = [f"platforms.{platform}.{name}=0" for platform in scrapers for name in ("min_delay", "max_delay")]
+        return load_config(overrides=[*overrides, *delays], environ={})
+
+    return install
@@ -0,0 +1,71 @@
+import json
+
+from scrapers import adaptive_wait
+from scrapers.adaptive_wait import AdaptiveTimeout, WaitTimings, wait_for_page_state
+
+
+class TimedPage:
+    """Page whose wait resolves instantly, or times out when state is None"""
+
+    def __init__(self, state):
+        self.state = state
+        self.timeouts = []
+
+    def wait_for_state(self, states, timeout=10):
+        self.timeouts.append(timeout)
+        return self.state
+
+
+def test_timeout_learns_from_samples_within_bounds():
+    timeout = AdaptiveTimeout(default=10)
+    for _ in range(AdaptiveTimeout.MIN_SAMPLES - 1):
+        timeout.record(2.0)
+    assert timeout.value() == 10
+
+    timeout.record(2.0)
+    assert timeout.value() == 3.0
+    for _ in range(100):
+        timeout.record(0.1)
+    assert timeout.value() == timeout.minimum
+
+
+def test_timed_out_waits_back_the_timeout_off_towards_the_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(adaptive_wait, "wait_timings", WaitTimings(str(tmp_path / "timings.json")))
+    fast, slow = TimedPage("results"), TimedPage(None)
+    for _ in range(20):
+        wait_for_page_state(fast, "zepto", "search", {}, default_timeout=10)
+    learned = fast.timeouts[-1]
+    assert learned < 10
+
+    for _ in range(20):
+        assert wait_for_page_state(slow, "zepto", "search", {}, default_timeout=10) is None
+    assert slow.timeouts[-1] == 10
+    assert slow.timeouts == sorted(slow.timeouts) and slow.timeouts[0] == learned
+
+
+def test_save_keeps_stages_this_run_did_not_use(tmp_path):
+    path = tmp_path / "timings.json"
+    path.write_text(json.dumps({"blinkit:product": [3.0], "zepto:search": [1.0]}))
+    timings = WaitTimings(str(path))
+    timings.get("zepto", "search", 10).record(2.0)
+    # Another run saved a stage in the meantime
+    path.write_text(json.dumps({**json.loads(path.read_text()), "zepto:home": [4.0]}))
+
+    timings.save()
+
+    assert json.loads(path.read_text()) == {
+        "blinkit:product": [3.0], "zepto:home": [4.0], "zepto:search": [1.0, 2.0],
+    }
+
+
+def test_cap_follows_the_current_default(tmp_path):
+    timings = WaitTimings(str(tmp_path / "timings.json"))
+    assert timings.get("zepto", "search", 10).value() == 10
+    assert timings.get("zepto", "search", 4).value() == 4
+
+    timeout = timings.get("zepto", "search", 4)
+    for _ in range(AdaptiveTimeout.MIN_SAMPLES):
+        timeout.record(5.0)
+    # Learned 7.5s, but never above the configured wait
+    assert timings.get("zepto", "search", 4).value() == 4
+    assert timings.get("zepto", "search", 20).value() == 7.5
@@ -0,0 +1,66 @@
+import json
+import logging
+import os
+
+import pandas as pd
+
+from alerts import AlertEngine, PriceSnapshot
+from config import load_config
+from MAIN2 import ProductMatcher
+
+SAMPLE_INPUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "sample_input.csv")
+
+
+def _engine(tmp_path):
+    engine = AlertEngine(str(tmp_path / "alerts.jsonl"), PriceSnapshot(str(tmp_path / "snapshot.json")))
+    engine.load_reference_prices(pd.DataFrame({"SPIN ID": ["A", "B"], "instamart_sale_price": ["100", "N/A"]}))
+    return engine
+
+
+def _types(alerts):
+    return [alert["type"] for alert in alerts]
+
+
+def test_alerts_against_previous_run(tmp_path):
+    engine = _engine(tmp_path)
+    assert engine.observe("A", "zepto", None, {"sale_price": "99"}) == []
+    engine.save()
+
+    engine = _engine(tmp_path)
+    # 10% below the last run and 10% below our price
+    assert _types(engine.observe("A", "zepto", None, {"sale_price": "90"})) == ["price_drop", "undercut"]
+    # A persisting undercut is not raised again
+    assert engine.observe("A", "zepto", None, {"sale_price": "90"}) == []
+    assert _types(engine.observe("A", "zepto", None, {"sale_price": "N/A"})) == ["stock_out"]
+    # Locations are tracked separately, and SKUs without a reference price are never undercuts
+    assert _types(engine.observe("A", "zepto", "400001", {"sale_price": "50"})) == ["undercut"]
+    assert engine.observe("B", "zepto", None, {"sale_price": "1"}) == []
+    engine.save()
+
+    lines = [json.loads(line) for line in (tmp_path / "alerts.jsonl").read_text().splitlines()]
+    assert _types(lines) == ["price_drop", "undercut", "stock_out", "undercut"]
+    assert lines[1]["reference_price"] == 100 and lines[1]["change"] == -0.1
+    assert engine.counts == {"price_drop": 1, "undercut": 2, "stock_out": 1}
+
+
+def test_missing_reference_column_is_reported(tmp_path, caplog):
+    # The shipped input schema has no price of ours
+    df = pd.read_csv(SAMPLE_INPUT, dtype=str, nrows=3)
+    engine = AlertEngine(str(tmp_path / "alerts.jsonl"), PriceSnapshot(str(tmp_path / "snapshot.json")))
+    with caplog.at_level(logging.WARNING, logger="ProductMatcher.alerts"):
+        engine.load_reference_prices(df)
+        engine.load_reference_prices(df)
+    assert engine.reference_prices == {}
+    assert [record.getMessage() for record in caplog.records] == [
+        "Input has no 'instamart_sale_price' column; undercut alerts are off"
+    ]
+
+
+def test_reference_column_comes_from_the_config(tmp_path, monkeypatch):
+    df = pd.read_csv(SAMPLE_INPUT, dtype=str, nrows=3).assign(our_price="100")
+    monkeypatch.chdir(tmp_path)
+    matcher = ProductMatcher(config=load_config(overrides=["reference_column=our_price"], environ={}))
+    assert matcher.alerts.reference_column == "our_price"
+
+    matcher.alerts.load_reference_prices(df)
+    assert matcher.alerts.reference_prices == {spin_id: 100 for spin_id in df["SPIN ID"]}
@@ -0,0 +1,45 @@
+import os
+
+import pandas as pd
+
+from analyzer import ProductAnalyzer, dataset_hash
+
+
+def _results():
+    return pd.DataFrame({
+        'amazon_sale_price': ["100", "N/A", "120", "110", "1000"],
+        'blinkit_sale_price': ["N/A"] * 5,
+        'zepto_sale_price': ["90", "95", "N/A", "110", "105"],
+    })
+
+
+def test_price_summary_ignores_unparsable_prices():
+    summary = ProductAnalyzer(_results()).price_summary()
+
+    assert list(summary.index) == ["amazon", "zepto"]
+    assert summary.loc["amazon", "count"] == 4
+    assert summary.loc["amazon", "med"] == 115
+    # 1000 lies beyond 1.5 IQR, so the whisker stops at the largest inlier
+    assert summary.loc["amazon", "whishi"] == 120
+    assert summary.loc["zepto", "whislo"] == 90
+
+
+def test_price_chart_is_cached_per_dataset(tmp_path):
+    analyzer = ProductAnalyzer(_results())
+
+    path = analyzer.plot_price_comparison("chart.svg", cache_dir=str(tmp_path))
+    assert path.endswith(".svg") and os.path.getsize(path) > 0
+    modified = os.path.getmtime(path)
+
+    assert analyzer.plot_price_comparison("chart.svg", cache_dir=str(tmp_path)) == path
+    assert os.path.getmtime(path) == modified
+    assert ProductAnalyzer(_results().iloc[:3]).plot_price_comparison("chart.svg", cache_dir=str(tmp_path)) != path
+
+
+def test_dataset_hash_follows_content_not_identity():
+    df = _results()
+
+    assert dataset_hash(df) == dataset_hash(_results())
+    assert dataset_hash(df) == dataset_hash(df.set_index(pd.Index(range(10, 15))))
+    assert dataset_hash(df) != dataset_hash(df.assign(zepto_sale_price=["90", "95", "N/A", "110", "106"]))
+    assert dataset_hash(df) != dataset_hash(df.rename(columns={'zepto_sale_price': 'zepto_mrp'}))
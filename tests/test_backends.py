@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+from scrapers import backends
+from scrapers.backends import PlaywrightBackend, SeleniumBackend, create_backend
+from scrapers.replay import RECORD, REPLAY, Archive, RecordingBackend, ReplayBackend, activate, deactivate
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_backend_is_chosen_by_name_or_default(monkeypatch):
+    factory = FakeDriver
+    monkeypatch.setattr(backends, "DEFAULT_BACKEND", "selenium")
+
+    default = create_backend(driver_factory=factory)
+    assert isinstance(default, SeleniumBackend) and default.driver_factory is factory
+    monkeypatch.setattr(backends, "_playwright_browser", backends._PlaywrightBrowser())
+    playwright = create_backend("Playwright", user_agent="UA/1.0")
+    assert isinstance(playwright, PlaywrightBackend) and playwright.user_agent == "UA/1.0"
+    monkeypatch.setattr(backends, "DEFAULT_BACKEND", "playwright")
+    assert isinstance(create_backend(), PlaywrightBackend)
+    with pytest.raises(ValueError, match="Unknown browser backend"):
+        create_backend("firefox")
+
+
+def test_active_archive_wraps_or_replaces_the_backend(tmp_path):
+    try:
+        archive = activate(Archive(str(tmp_path / "run.har.gz"), RECORD))
+        recording = create_backend("selenium", driver_factory=FakeDriver)
+        assert isinstance(recording, RecordingBackend)
+        archive.save()
+        deactivate()
+
+        activate(Archive(str(tmp_path / "run.har.gz"), REPLAY))
+        assert isinstance(create_backend("selenium", driver_factory=FakeDriver), ReplayBackend)
+    finally:
+        deactivate()
+
+
+def test_selenium_backend_keeps_one_driver_per_thread():
+    backend = SeleniumBackend(FakeDriver)
+    first = backend.new_page()
+    assert backend.new_page().driver is first.driver
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(backend.new_page().driver))
+    thread.start()
+    thread.join()
+    assert other[0] is not first.driver
+
+    # A page whose navigation broke takes its driver with it
+    first.failed = True
+    first.close()
+    assert first.driver.quit_called and backend.new_page().driver is not first.driver
+    backend.close()
+    assert other[0].quit_called
+
+
+def test_shared_playwright_browser_stops_with_its_last_backend(monkeypatch):
+    browser = backends._PlaywrightBrowser()
+    launched = []
+
+    async def launch():
+        launched.append(True)
+
+    async def shutdown():
+        pass
+
+    monkeypatch.setattr(browser, "_launch", launch)
+    monkeypatch.setattr(browser, "_shutdown", shutdown)
+    monkeypatch.setattr(backends, "_playwright_browser", browser)
+    first, second = PlaywrightBackend(), PlaywrightBackend()
+    browser.start()
+
+    first.close()
+    first.close()
+    assert browser.loop is not None
+    second.close()
+    assert browser.loop is None and launched == [True]
@@ -0,0 +1,62 @@
+import json
+import sys
+import types
+
+import pytest
+
+from scrapers import browser
+
+
+@pytest.fixture
+def driver_cache(tmp_path, monkeypatch):
+    """Point the chromedriver cache at tmp_path and count webdriver_manager installs"""
+    installs = []
+    driver = tmp_path / "chromedriver"
+    driver.write_text("")
+
+    class ChromeDriverManager:
+        def install(self):
+            installs.append(str(driver))
+            return str(driver)
+
+    monkeypatch.setitem(sys.modules, "webdriver_manager", types.ModuleType("webdriver_manager"))
+    monkeypatch.setitem(sys.modules, "webdriver_manager.chrome",
+                        types.SimpleNamespace(ChromeDriverManager=ChromeDriverManager))
+    monkeypatch.setattr(browser, "DRIVER_CACHE_FILE", str(tmp_path / "cache" / "chromedriver.json"))
+    monkeypatch.setattr(browser, "_driver_path", None)
+    return installs
+
+
+def test_driver_path_is_resolved_once_and_cached_on_disk(driver_cache):
+    path = browser.get_driver_path()
+    assert browser.get_driver_path() == path
+    assert len(driver_cache) == 1
+
+    # A new process reads the fresh on-disk entry instead of asking webdriver_manager again
+    browser._driver_path = None
+    assert browser.get_driver_path() == path
+    assert len(driver_cache) == 1
+
+
+def test_expired_or_dangling_cache_entries_are_resolved_again(driver_cache, monkeypatch):
+    path = browser.get_driver_path()
+    with open(browser.DRIVER_CACHE_FILE) as f:
+        resolved_at = json.load(f)["resolved_at"]
+
+    browser._driver_path = None
+    monkeypatch.setattr(browser.time, "time", lambda: resolved_at + browser.DRIVER_CACHE_TTL + 1)
+    assert browser.get_driver_path() == path
+    assert len(driver_cache) == 2
+
+    with open(browser.DRIVER_CACHE_FILE, "w") as f:
+        json.dump({"path": path + ".removed", "resolved_at": resolved_at + browser.DRIVER_CACHE_TTL}, f)
+    assert browser._read_cached_driver_path() is None
+
+
+def test_prewarmed_driver_is_handed_out_once():
+    prewarmer = browser.DriverPrewarmer(lambda: "driver")
+    assert prewarmer.take() is None
+
+    prewarmer.start()
+    assert prewarmer.take() == "driver"
+    assert prewarmer.take() is None
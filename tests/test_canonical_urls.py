@@ -0,0 +1,64 @@
+import csv
+import os
+import re
+from urllib.parse import unquote
+
+import pytest
+
+from scrapers.product_ids import canonicalize_url, extract_product_id
+
+RESULT_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "result.csv")
+
+
+def _amazon_urls():
+    with open(RESULT_CSV, newline="") as f:
+        return [row["amazon_url"] for row in csv.DictReader(f) if row["amazon_url"]]
+
+
+AMAZON_URLS = _amazon_urls()
+
+
+def test_corpus_has_sponsored_and_organic_links():
+    assert any("/sspa/click" in url for url in AMAZON_URLS)
+    assert any("/sspa/click" not in url for url in AMAZON_URLS)
+
+
+@pytest.mark.parametrize("url", AMAZON_URLS)
+def test_amazon_result_urls_collapse_to_dp_asin(url):
+    canonical = canonicalize_url("amazon", url)
+
+    assert re.fullmatch(r"https://www\.amazon\.in/dp/[A-Z0-9]{10}", canonical)
+    # The ASIN is the one the original (possibly redirect-wrapped) link pointed at
+    assert canonical.rsplit("/", 1)[1] in unquote(url)
+    assert canonicalize_url("amazon", canonical) == canonical
+
+
+@pytest.mark.parametrize("platform, url, expected", [
+    (
+        "blinkit",
+        "https://blinkit.com/prn/patanjali-kesh-kanti-advanced-herbal-hair-oil/prid/392331?utm_source=share",
+        "https://blinkit.com/prn/product/prid/392331",
+    ),
+    (
+        "zepto",
+        "https://www.zeptonow.com/pn/dabur-amla-hair-oil/pvid/0a9b8c7d-6e5f-4a3b-2c1d-0e9f8a7b6c5d?ref=search",
+        "https://www.zeptonow.com/pn/product/pvid/0a9b8c7d-6e5f-4a3b-2c1d-0e9f8a7b6c5d",
+    ),
+    (
+        "amazon",
+        "https://www.amazon.in/s?k=patanjali+oil&ref=nb_sb_noss&crid=ABC&qid=1745386728",
+        "https://www.amazon.in/s?k=patanjali+oil",
+    ),
+])
+def test_canonicalize_platform_urls(platform, url, expected):
+    assert canonicalize_url(platform, url) == expected
+
+
+def test_canonicalize_keeps_base_url_override():
+    url = "http://127.0.0.1:8000/prn/some-oil/prid/42"
+    assert canonicalize_url("blinkit", url, base_url="http://127.0.0.1:8000") == "http://127.0.0.1:8000/prn/product/prid/42"
+
+
+def test_extract_product_id_without_id():
+    assert extract_product_id("amazon", "https://www.amazon.in/s?k=oil") is None
+    assert extract_product_id("zepto", None) is None
@@ -0,0 +1,122 @@
+import pandas as pd
+import pytest
+
+from cli import cluster_chunks, main
+
+ROWS = [
+    ("A1", "Amul Taaza Toned Milk", "500 ml"),
+    ("A2", "Amul Gold Full Cream Milk", "1 l"),
+    ("B1", "Tata Salt Iodised", "1 kg"),
+    ("C1", "Crocs Womens Classic Clog Black", "1 pc"),
+    ("C2", "Crocs Womens Classic Clog White", "1 pc"),
+]
+NO_DELAYS = ["--platforms", "amazon", "--no-progress"] + [
+    arg for setting in ("min_delay=0", "max_delay=0") for arg in ("--set", f"platforms.amazon.{setting}")
+]
+
+
+class FakeScraper:
+    """Finds every SKU except the salt, under its own name"""
+
+    platform = "amazon"
+    location_dependent = False
+    queries = []
+
+    def configure(self, settings):
+        return self
+
+    def for_location(self, location):
+        return self
+
+    def search_products(self, queries):
+        FakeScraper.queries.extend(query for _, _, query in queries)
+        return [[] if "salt" in query else [{"name": name, "url": f"https://www.amazon.in/dp/B0{abs(hash(name)) % 10**8:08d}"}]
+                for name, uom, query in queries]
+
+    def extract_product_details(self, url):
+        return {"url": url, "mrp": "100", "sale_price": "90", "quantity": "1", "uom": "pc"}
+
+    def extract_product_id(self, url):
+        return url.rsplit("/", 1)[-1]
+
+    def product_url(self, product_id):
+        return f"https://www.amazon.in/dp/{product_id}"
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def workdir(tmp_path, fake_scrapers):
+    fake_scrapers(FakeScraper())
+    pd.DataFrame(ROWS, columns=["SPIN ID", "Item Name", "UOM"]).to_csv("input.csv", index=False)
+    return tmp_path
+
+
+def _read(path):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def test_shards_split_the_input_and_keep_variants_together(workdir):
+    for shard in ("1/2", "2/2"):
+        assert main(["input.csv", "-o", f"out_{shard[0]}.csv", "--shard", shard] + NO_DELAYS) == 0
+
+    shards = [set(_read(f"out_{i}.csv")["SPIN ID"]) for i in (1, 2)]
+    assert shards[0] | shards[1] == {spin for spin, *_ in ROWS}
+    assert not shards[0] & shards[1]
+    assert any({"C1", "C2"} <= shard for shard in shards)
+    result = _read("out_1.csv") if "B1" in shards[0] else _read("out_2.csv")
+    assert result.set_index("SPIN ID").at["B1", "amazon_url"] == ""
+
+
+def test_resume_skips_checkpointed_skus(workdir):
+    assert main(["input.csv", "-o", "out.csv", "--limit", "2", "--chunk-size", "1"] + NO_DELAYS) == 0
+    # An interrupted run leaves its finished chunks in the checkpoint file
+    _read("out.csv").to_csv("out.csv.partial.csv", index=False)
+    FakeScraper.queries = []
+
+    assert main(["input.csv", "-o", "out.csv", "--resume"] + NO_DELAYS) == 0
+
+    result = _read("out.csv")
+    assert list(result["SPIN ID"]) == [spin for spin, *_ in ROWS]
+    assert FakeScraper.queries and not any("amul" in query for query in FakeScraper.queries)
+    assert not (workdir / "out.csv.partial.csv").exists()
+    assert (workdir / "out_query_plan.json").exists()
+
+
+def test_dry_run_prints_plans_without_scraping(workdir, capsys):
+    FakeScraper.queries = []
+    assert main(["input.csv", "--dry-run"] + NO_DELAYS) == 0
+
+    out = capsys.readouterr().out
+    assert "C2  Crocs Womens Classic Clog White [cluster C1]" in out
+    assert "amazon: amul taaza toned milk 500 ml" in out
+    assert not FakeScraper.queries and not (workdir / "data").exists()
+
+
+def test_daily_budget_checks_only_scheduled_skus(workdir):
+    FakeScraper.queries = []
+    assert main(["input.csv", "-o", "out.csv", "--daily-budget", "2"] + NO_DELAYS) == 0
+
+    # Nothing has been seen yet, so the first SKUs (one request each on Amazon) fill the budget
+    result = _read("out.csv").set_index("SPIN ID")
+    assert (result["amazon_url"] != "").sum() == 2
+    assert len(FakeScraper.queries) <= 2
+
+
+def test_chunks_keep_variant_clusters_together(workdir):
+    FakeScraper.queries = []
+    assert main(["input.csv", "-o", "out.csv", "--chunk-size", "1"] + NO_DELAYS) == 0
+
+    # The Crocs variants still share their cluster search although each chunk holds one SKU
+    assert "crocs womens classic clog" in FakeScraper.queries
+    assert "crocs womens classic clog black" not in FakeScraper.queries
+    assert list(_read("out.csv")["SPIN ID"]) == [spin for spin, *_ in ROWS]
+
+
+def test_cluster_chunks_pack_whole_clusters():
+    df = pd.DataFrame([ROWS[3], ROWS[0], ROWS[4], ROWS[1]], columns=["SPIN ID", "Item Name", "UOM"])
+    chunks = cluster_chunks(df, 1, ["amazon"])
+    assert [list(chunk["SPIN ID"]) for chunk in chunks] == [["C1", "C2"], ["A1"], ["A2"]]
+    assert [list(chunk["SPIN ID"]) for chunk in cluster_chunks(df, 3, ["amazon"])] == [["C1", "C2", "A1"], ["A2"]]
+    assert cluster_chunks(df.iloc[:0], 2, ["amazon"]) == []
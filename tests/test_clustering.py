@@ -0,0 +1,107 @@
+import os
+
+import pandas as pd
+
+from MAIN2 import ProductMatcher
+from clustering import batch_groups, cluster_plans, cluster_summary, core_tokens
+from query_plan import build_query_plans
+
+SAMPLE_INPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sample_input.csv")
+PLATFORMS = ["amazon", "blinkit", "zepto"]
+
+
+def _clustered(rows):
+    plans = build_query_plans(pd.DataFrame(rows, columns=["Item Name", "UOM"]), PLATFORMS)
+    return cluster_plans(plans, PLATFORMS)
+
+
+def test_core_tokens_drop_shade_and_size():
+    assert core_tokens("crocs womens splash glitter flip flop grey_uk7") == (
+        "crocs", "womens", "splash", "glitter", "flip", "flop"
+    )
+
+
+def test_variants_share_a_first_search():
+    plans = _clustered([
+        ["Flite Slippers FL0366L Navy Pink- 6 UK", "1Piece"],
+        ["Flite Slippers FL0366L Navy Pink- 7 UK", "7UK"],
+        ["Crocs Mens Crocband Flip Flop Black", "8UK"],
+        ["Crocs Mens Crocband Flip Flop White", "9UK"],
+        ["Crocs Womens Kadee II Sandal Navy", "1Piece"],
+    ])
+
+    assert list(plans["cluster"]) == [0, 0, 2, 2, 4]
+    assert list(plans["cluster_size"]) == [2, 2, 2, 2, 1]
+    # Shared words first, then each row's own queries
+    assert plans.at[2, "amazon_queries"] == (
+        "crocs mens crocband flip flop", "crocs mens crocband flip flop black", "crocs flip flop"
+    )
+    assert plans.at[3, "amazon_queries"][0] == "crocs mens crocband flip flop"
+    assert plans.at[0, "zepto_queries"][0] == plans.at[1, "zepto_queries"][0] == "flite slippers fl0366l navy pink uk"
+    assert plans.at[4, "amazon_queries"] == ("crocs womens kadee ii sandal navy", "crocs sandal")
+
+
+def test_sample_catalog_saves_searches():
+    plans = build_query_plans(pd.read_csv(SAMPLE_INPUT), PLATFORMS)
+    summary = cluster_summary(plans, cluster_plans(plans, PLATFORMS), PLATFORMS, batch_size=10)
+
+    assert summary["clusters"] < summary["rows"]
+    assert summary["amazon"]["saved"] > 100
+
+
+VARIANTS = [
+    ["Crocs Mens Crocband Flip Flop Black", "8UK"],
+    ["Dabur Amla Hair Oil", "100 ml"],
+    ["Tata Salt Iodised", "1 kg"],
+    ["Crocs Mens Crocband Flip Flop White", "9UK"],
+]
+
+
+def test_batches_keep_a_cluster_together():
+    plans = _clustered(VARIANTS)
+    groups = [(queries, [index]) for index, queries in plans["amazon_queries"].items()]
+
+    batches = batch_groups(groups, batch_size=2)
+    assert [[rows[0] for _, rows in batch] for batch in batches] == [[0, 3], [1, 2]]
+    # A cluster larger than a batch is split over batches of its own
+    assert [len(batch) for batch in batch_groups(groups, batch_size=1)] == [1, 1, 1, 1]
+    assert [[rows[0] for _, rows in batch] for batch in batch_groups(groups[:1] + groups, 2)] == [[0, 0], [3, 1], [2]]
+
+
+def test_summary_counts_first_tier_searches_per_batch():
+    plans = build_query_plans(pd.DataFrame(VARIANTS, columns=["Item Name", "UOM"]), PLATFORMS)
+    clustered = cluster_plans(plans, PLATFORMS)
+
+    assert cluster_summary(plans, clustered, PLATFORMS, batch_size=2)["amazon"] == {"first_tier_searches": 3, "saved": 1}
+    # One plan per batch: the cluster's members search their shared query separately
+    assert cluster_summary(plans, clustered, PLATFORMS, batch_size=1)["amazon"] == {"first_tier_searches": 4, "saved": 0}
+
+
+class SearchCountingScraper:
+    platform = "amazon"
+
+    def __init__(self):
+        self.queries = []
+
+    def for_location(self, location):
+        return self
+
+    def search_products(self, entries):
+        self.queries.extend(query for _, _, query in entries)
+        return [[] for _ in entries]
+
+    def extract_product_id(self, url):
+        return None
+
+    def close(self):
+        pass
+
+
+def test_cluster_members_in_different_input_batches_search_once(fake_scrapers):
+    scraper = SearchCountingScraper()
+    config = fake_scrapers(scraper, "batch_size=2")
+    df = pd.DataFrame([[f"S{i}", *row] for i, row in enumerate(VARIANTS)], columns=["SPIN ID", "Item Name", "UOM"])
+
+    ProductMatcher(platforms=["amazon"], prewarm=False, config=config).process_frame(df)
+
+    assert scraper.queries.count("crocs mens crocband flip flop") == 1
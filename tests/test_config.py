@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+from config import ConfigError, PipelineConfig, load_config
+
+
+def test_defaults_are_valid_and_match_the_previous_constants():
+    config = load_config(environ={})
+
+    assert config == PipelineConfig()
+    assert (config.max_workers, config.batch_size, config.max_retries) == (10, 10, 3)
+    assert config.enabled_platforms() == ["amazon", "blinkit", "zepto"]
+    amazon = config.platforms["amazon"]
+    assert (amazon.min_delay, amazon.max_delay, amazon.request_delay, amazon.request_timeout) == (2, 5, 2, 30)
+
+
+def test_later_sources_override_earlier_ones(tmp_path):
+    path = tmp_path / "pipeline.json"
+    path.write_text(json.dumps({
+        "preset": "polite-production",
+        "batch_size": 5,
+        "platforms": {"amazon": {"concurrency": 3}, "zepto": {"enabled": False}},
+    }))
+    environ = {
+        "PIPELINE_CONFIG": str(path),
+        "PIPELINE__PLATFORMS__AMAZON__CONCURRENCY": "4",
+        "PIPELINE__PLATFORMS__BLINKIT__WAIT_TIMEOUTS__PRODUCT": "20",
+        "PIPELINE__LOCATIONS": "400001, 560001",
+    }
+
+    config = load_config(overrides=["platforms.amazon.request_delay=1.5", "max_workers=3"], environ=environ)
+
+    assert config.preset == "polite-production"
+    # preset, then file, then environment, then command line
+    assert config.retry_delay == 15 and config.batch_size == 5 and config.max_workers == 3
+    assert config.platforms["amazon"].concurrency == 4
+    assert config.platforms["amazon"].request_delay == 1.5
+    assert config.platforms["blinkit"].wait_timeouts == {"product": 20.0}
+    assert config.locations == ["400001", "560001"]
+    assert config.enabled_platforms() == ["amazon", "blinkit"]
+    assert load_config(preset="fast-local", environ=environ).preset == "fast-local"
+
+
+@pytest.mark.parametrize("overrides, message", [
+    (["max_worker=4"], "Unknown setting: max_worker"),
+    (["platforms.flipkart.concurrency=2"], "Unknown platform"),
+    (["batch_size=ten"], "batch_size must be int"),
+    (["platforms.amazon.min_delay=9"], "min_delay must be between 0 and max_delay"),
+    (["platforms.zepto.backend=firefox"], "backend must be one of"),
+    (["platforms.amazon.wait_timeouts.checkout=5"], "unknown stage"),
+    (["platforms.amazon.wait_timeouts={search: 5}"], r"platforms.amazon.wait_timeouts must be a JSON mapping, got '\{search: 5\}'"),
+    ([f"max_retries=1{'0' * 400}"], "max_retries must be int, got 1000"),
+])
+def test_invalid_settings_are_rejected_at_startup(overrides, message):
+    with pytest.raises(ConfigError, match=message):
+        load_config(overrides=overrides, environ={})
+
+
+def test_malformed_environment_values_name_their_setting():
+    environ = {"PIPELINE__PLATFORMS__ZEPTO__WAIT_TIMEOUTS": "{\"search\": }"}
+    with pytest.raises(ConfigError, match="platforms.zepto.wait_timeouts must be a JSON mapping"):
+        load_config(environ=environ)
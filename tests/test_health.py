@@ -0,0 +1,134 @@
+import pytest
+import requests
+
+from health import CLOSED, HALF_OPEN, OPEN, CAPTCHA, EMPTY, ERROR, OK, CircuitOpenError, PlatformHealth, search_outcomes
+from scrapers.amazon_scraper import AmazonScraper
+from scrapers.base_scraper import CaptchaError, SearchResults
+from scrapers.blinkit_scraper import BlinkatScraper
+from scrapers.zepto_scraper import ZeptoScraper
+
+
+def _health(**settings):
+    return PlatformHealth("amazon", window=10, min_calls=4, cooldown=30, max_cooldown=100, **settings)
+
+
+def test_captcha_trips_immediately_and_rejects_calls():
+    health = _health()
+    health.record(OK, now=0)
+    health.record(CAPTCHA, now=1)
+
+    assert health.state == OPEN
+    assert not health.allow(now=10)
+    assert health.snapshot()["rejected"] == 1
+
+
+def test_error_and_empty_rates_trip_after_min_calls():
+    health = _health()
+    for outcome in (ERROR, ERROR, OK):
+        health.record(outcome, now=0)
+    assert health.state == CLOSED
+    health.record(OK, now=0)
+    health.record(ERROR, now=0)
+    assert health.state == OPEN
+
+    health = _health(max_empty_rate=0.75)
+    for outcome in (EMPTY, EMPTY, EMPTY, OK):
+        health.record(outcome, now=0)
+    assert health.state == OPEN
+
+
+def test_half_open_probe_recovers_or_backs_off():
+    health = _health()
+    health.record(CAPTCHA, now=0)
+
+    # One probe after the cooldown; concurrent callers are still rejected
+    assert health.allow(now=31)
+    assert health.state == HALF_OPEN
+    assert not health.allow(now=31)
+
+    health.record(ERROR, now=32)
+    assert health.state == OPEN
+    assert health.cooldown == 60
+    assert not health.allow(now=80)
+
+    assert health.allow(now=93)
+    health.record(OK, now=93)
+    assert health.state == CLOSED
+    assert health.cooldown == 30
+    assert (health.trips, health.recoveries) == (2, 1)
+
+
+def test_call_records_outcomes_and_raises_when_open():
+    health = _health()
+
+    assert health.call(lambda: [[1], []], outcome=lambda lists: [OK if c else EMPTY for c in lists]) == [[1], []]
+    assert health.counts[OK] == 1 and health.counts[EMPTY] == 1
+
+    def blocked():
+        raise CaptchaError("robot check")
+
+    with pytest.raises(CaptchaError):
+        health.call(blocked)
+    with pytest.raises(CircuitOpenError):
+        health.call(lambda: None)
+
+
+class SearchPage:
+    """Search page that settles in `state` and serves `html`"""
+
+    def __init__(self, state, html="<html><body></body></html>"):
+        self.state = state
+        self.html = html
+
+    def goto(self, url, timeout=30):
+        pass
+
+    def wait_for_state(self, states, timeout=10):
+        return self.state
+
+    def content(self):
+        return self.html
+
+
+@pytest.mark.parametrize("scraper_class", [BlinkatScraper, ZeptoScraper])
+def test_only_unreadable_result_pages_count_as_empty(scraper_class):
+    scraper = scraper_class()
+    searches = [
+        scraper._run_search(SearchPage(state), "Amul Taaza Toned Milk", "500 ml")
+        for state in ("empty", "results", None)
+    ]
+
+    assert searches == [[], [], []]
+    assert search_outcomes(searches) == [OK, EMPTY, EMPTY]
+
+
+def test_platform_that_rarely_stocks_the_catalogue_stays_closed():
+    health = _health()
+    misses = [[] for _ in range(9)] + [[{"name": "Amul Taaza", "url": "https://blinkit.com/prn/x/prid/1"}]]
+    health.call(lambda: misses, outcome=search_outcomes)
+    assert health.state == CLOSED and health.counts[OK] == 10
+
+    health.call(lambda: [SearchResults(unparsed=True) for _ in range(10)], outcome=search_outcomes)
+    assert health.state == OPEN
+
+
+def test_search_endpoint_that_keeps_failing_trips_the_circuit(monkeypatch):
+    scraper = AmazonScraper()
+
+    def unreachable(url):
+        raise requests.ConnectionError("connection reset")
+
+    monkeypatch.setattr(scraper, "get_soup", unreachable)
+    health = _health()
+    results = health.call(scraper.search_products, [("Tata Salt", "1 kg", None)] * 4, outcome=search_outcomes)
+
+    assert all(candidates.failed for candidates in results)
+    assert health.counts[ERROR] == 4 and health.state == OPEN
+
+
+@pytest.mark.parametrize("scraper_class", [BlinkatScraper, ZeptoScraper])
+def test_search_page_that_never_loads_is_an_error(scraper_class, monkeypatch):
+    scraper = scraper_class()
+    monkeypatch.setattr(scraper, "_load_page", lambda page, url: False)
+
+    assert search_outcomes([scraper._run_search(SearchPage("results"), "Amul Taaza Toned Milk", "500 ml")]) == [ERROR]
@@ -0,0 +1,103 @@
+import json
+
+import pandas as pd
+import pytest
+
+from MAIN2 import ProductMatcher
+from id_map import ProductIdMap
+from scrapers.base_scraper import ProductNotFoundError
+
+
+def test_ids_are_remembered_forgotten_and_persisted(tmp_path):
+    path = tmp_path / "cache" / "id_map.json"
+    ids = ProductIdMap(str(path))
+    ids.set(101, "amazon", "B00KNXO3KS", 0.92)
+    ids.set("101", "zepto", "6f2e1c0a")
+    ids.set("102", "amazon", "B07C5QYZ1H", 0.8)
+    ids.forget("102", "amazon")
+    ids.forget("999", "amazon")
+    ids.save()
+
+    reloaded = ProductIdMap(str(path))
+    assert (reloaded.get("101", "amazon"), reloaded.confidence(101, "amazon")) == ("B00KNXO3KS", 0.92)
+    assert reloaded.get("101", "zepto") == "6f2e1c0a" and reloaded.confidence("101", "zepto") is None
+    assert reloaded.get("102", "amazon") is None and reloaded.get("101", "blinkit") is None
+
+
+def test_maps_saved_before_confidences_still_load(tmp_path):
+    path = tmp_path / "id_map.json"
+    path.write_text(json.dumps({"101": {"amazon": "B00KNXO3KS"}}))
+    ids = ProductIdMap(str(path))
+
+    assert ids.get("101", "amazon") == "B00KNXO3KS" and ids.confidence("101", "amazon") is None
+
+
+class KnownProductScraper:
+    """Amazon stand-in whose product pages load, fail or are gone depending on `page`"""
+
+    platform = "amazon"
+    location_dependent = False
+
+    def __init__(self, page):
+        self.page = page
+        self.searches = []
+
+    def for_location(self, location):
+        return self
+
+    def product_url(self, product_id):
+        return f"https://www.amazon.in/dp/{product_id}"
+
+    def extract_product_id(self, url):
+        return url.rsplit("/", 1)[-1]
+
+    def extract_product_details(self, url):
+        if self.page == "timeout":
+            return None
+        if self.page == "error":
+            raise ConnectionError("connection reset")
+        if self.page == "gone":
+            raise ProductNotFoundError(f"{url} no longer exists on Amazon")
+        return {"url": url, "mrp": "100", "sale_price": "90", "quantity": "500", "uom": "ml"}
+
+    def search_products(self, queries):
+        self.searches.extend(queries)
+        return [[] for _ in queries]
+
+    def close(self):
+        pass
+
+
+def _run(tmp_path, fake_scrapers, page):
+    ids = ProductIdMap(str(tmp_path / "id_map.json"))
+    ids.set("S1", "amazon", "B00KNXO3KS", 0.9)
+    scraper = KnownProductScraper(page)
+    matcher = ProductMatcher(platforms=["amazon"], config=fake_scrapers(scraper), id_map=ids, prewarm=False)
+    df = pd.DataFrame({"SPIN ID": ["S1"], "Item Name": ["Amul Taaza Toned Milk"], "UOM": ["500 ml"]})
+    return matcher, scraper, matcher.process_frame(df)
+
+
+def test_known_product_is_fetched_without_searching(tmp_path, fake_scrapers):
+    matcher, scraper, result = _run(tmp_path, fake_scrapers, "ok")
+
+    assert result.loc[0, "amazon_url"] == "https://www.amazon.in/dp/B00KNXO3KS"
+    assert result.loc[0, "amazon_match_confidence"] == "0.9"
+    assert not scraper.searches and matcher.id_map.direct_lookups == 1
+
+
+@pytest.mark.parametrize("page", ["timeout", "error"])
+def test_failed_fetch_keeps_the_known_id(tmp_path, fake_scrapers, page):
+    matcher, scraper, result = _run(tmp_path, fake_scrapers, page)
+
+    # This run falls back to searching; the id is tried again next run
+    assert scraper.searches
+    assert matcher.id_map.get("S1", "amazon") == "B00KNXO3KS"
+    assert matcher.id_map.direct_lookups == 0
+
+
+def test_delisted_product_is_forgotten(tmp_path, fake_scrapers):
+    matcher, scraper, result = _run(tmp_path, fake_scrapers, "gone")
+
+    assert scraper.searches
+    assert matcher.id_map.get("S1", "amazon") is None
+    assert result.loc[0, "amazon_url"] == ""
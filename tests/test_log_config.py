@@ -0,0 +1,89 @@
+import json
+import logging
+import queue
+import sys
+import threading
+
+from log_config import (
+    JsonFormatter, StructuredQueueHandler, TextFormatter, log_context, setup_logging, shutdown_logging,
+)
+
+
+def test_records_are_written_as_json_with_context(tmp_path):
+    log_file = tmp_path / "run.log"
+    setup_logging(log_file=str(log_file), console=False)
+    logger = logging.getLogger("ProductMatcher.test")
+    try:
+        def worker():
+            with log_context(sku="42", platform="zepto", stage="fetch"):
+                logger.info("found %s", "it")
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        logger.info("outside")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    finally:
+        shutdown_logging()
+
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert records[0]["message"] == "found it"
+    assert (records[0]["sku"], records[0]["platform"], records[0]["stage"]) == ("42", "zepto", "fetch")
+    assert "sku" not in records[1]
+    assert records[2]["message"] == "failed"
+    assert "ValueError: boom" in records[2]["exc"]
+
+
+def test_module_levels_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOG_LEVELS", "scrapers=DEBUG,selenium=ERROR")
+    setup_logging(log_file=str(tmp_path / "run.log"), console=False)
+    try:
+        assert logging.getLogger("scrapers").level == logging.DEBUG
+        assert logging.getLogger("selenium").level == logging.ERROR
+        assert logging.getLogger("urllib3").level == logging.WARNING
+    finally:
+        shutdown_logging()
+
+
+def _record(msg, *args, exc_info=None):
+    return logging.LogRecord("ProductMatcher", logging.ERROR, __file__, 1, msg, args, exc_info)
+
+
+def test_queue_handler_keeps_the_traceback_apart_from_the_message():
+    try:
+        raise KeyError("sku")
+    except KeyError:
+        record = _record("lookup failed for %s", "S1", exc_info=sys.exc_info())
+
+    prepared = StructuredQueueHandler(queue.SimpleQueue()).prepare(record)
+    entry = json.loads(JsonFormatter().format(prepared))
+
+    assert (prepared.msg, prepared.args, prepared.exc_info) == ("lookup failed for S1", None, None)
+    assert entry["message"] == "lookup failed for S1"
+    assert "KeyError: 'sku'" in entry["exc"] and "KeyError" not in entry["message"]
+    # The logging thread's record is left untouched
+    assert record.args == ("S1",) and record.exc_info is not None
+    assert set(entry) == {"time", "level", "logger", "thread", "message", "exc"}
+
+
+def test_text_lines_end_with_the_context_fields():
+    record = _record("fetched")
+    record.sku, record.platform, record.stage = "S1", "amazon", None
+
+    assert TextFormatter().format(record).endswith("ProductMatcher - ERROR - fetched [sku=S1 platform=amazon]")
+
+
+def test_log_file_rotates_at_max_bytes(tmp_path):
+    log_file = tmp_path / "run.log"
+    setup_logging(log_file=str(log_file), console=False, max_bytes=2000, backup_count=2)
+    try:
+        for i in range(100):
+            logging.getLogger("ProductMatcher.test").info("record %d", i)
+    finally:
+        shutdown_logging()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["run.log", "run.log.1", "run.log.2"]
+    assert all(json.loads(line)["message"].startswith("record") for line in log_file.read_text().splitlines())
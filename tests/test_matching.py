@@ -0,0 +1,46 @@
+from matching import best_candidate, match_confidence, parse_quantities, CONFIDENCE_THRESHOLD, MIN_CONFIDENCE
+
+NAME = "Patanjali Kesh Kanti Advance Herbal Hair Expert Oil 100 ml"
+
+
+def test_quantities_normalize_to_base_units():
+    assert parse_quantities("Tata Salt 1 kg") == [(1000.0, "g")]
+    assert parse_quantities("Dettol 0.5 ltr + 200ml") == [(500.0, "ml"), (200.0, "ml")]
+
+
+def test_close_listing_passes_threshold():
+    assert match_confidence(NAME, "100ml", "Patanjali Kesh Kanti Advanced Herbal Hair Oil 100 ml") >= CONFIDENCE_THRESHOLD
+    assert match_confidence("Tata Salt", "1kg", "Tata Salt Iodised 1000 g") == 1.0
+
+
+def test_wrong_size_and_wrong_brand_score_lower():
+    exact = match_confidence(NAME, "100ml", "Patanjali Kesh Kanti Herbal Hair Expert Oil 100 ml")
+    other_size = match_confidence(NAME, "100ml", "Patanjali Kesh Kanti Herbal Hair Expert Oil 200 ml")
+    other_brand = match_confidence(NAME, "100ml", "Parachute Coconut Hair Oil 100 ml")
+
+    assert exact > other_size > other_brand
+    assert other_brand < MIN_CONFIDENCE
+
+
+def test_sizes_without_quantity_ignore_uom():
+    assert match_confidence("Crocs Womens Splash Slides Black", "1Piece", "Crocs Women Splash Slide - Black") == 1.0
+
+
+def test_best_candidate_picks_highest():
+    candidates = [
+        {"name": "Patanjali Aloe Vera Gel 150 ml", "url": "a"},
+        {"name": "Patanjali Kesh Kanti Hair Expert Oil 100 ml", "url": "b"},
+        {"name": "", "url": "c"},
+    ]
+    candidate, confidence = best_candidate(NAME, "100ml", candidates)
+
+    assert candidate["url"] == "b"
+    assert confidence >= CONFIDENCE_THRESHOLD
+    assert best_candidate(NAME, "100ml", []) == (None, 0.0)
+
+
+def test_colour_variants_are_told_apart():
+    black = match_confidence("Crocs Mens Crocband Flip Flop Black", "8UK", "Crocs Men's Crocband Flip Flop, Black")
+    white = match_confidence("Crocs Mens Crocband Flip Flop Black", "8UK", "Crocs Men's Crocband Flip Flop, White")
+
+    assert white < CONFIDENCE_THRESHOLD <= black
@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+
+from MAIN2 import ProductMatcher
+
+LOCATIONS = ["400001", "560001"]
+ROWS = [
+    ("S1", "Amul Taaza Toned Milk", "500 ml"),
+    ("S2", "Tata Salt Iodised", "1 kg"),
+    ("S3", "Dabur Amla Hair Oil", "100 ml"),
+]
+
+
+class CountingScraper:
+    """Finds every SKU; counts searches and product pages per location"""
+
+    def __init__(self, platform, location_dependent, cards=False, failing=()):
+        self.platform = platform
+        self.location_dependent = location_dependent
+        self.cards = cards
+        self.failing = set(failing)
+        self.location = None
+        self.searches = []
+        self.pages = []
+
+    def for_location(self, location):
+        if not self.location_dependent or location is None:
+            return self
+        view = CountingScraper(self.platform, True, self.cards, self.failing)
+        view.location, view.searches, view.pages = location, self.searches, self.pages
+        return view
+
+    def search_products(self, queries):
+        self.searches.extend((self.location, query) for _, _, query in queries)
+        return [[{
+            "name": name,
+            "url": f"https://example.com/{name.split()[0].lower()}",
+            "details": self._details(f"https://example.com/{name.split()[0].lower()}", "card") if self.cards else None,
+        }] for name, uom, query in queries]
+
+    def _details(self, url, price):
+        return {"url": url, "mrp": "100", "sale_price": price, "quantity": "1", "uom": "pc"}
+
+    def extract_product_details(self, url):
+        self.pages.append((self.location, url))
+        if (self.location, url) in self.failing:
+            raise TimeoutError("product page timed out")
+        return self._details(url, f"{self.location}-price")
+
+    def extract_product_id(self, url):
+        return None
+
+    def close(self):
+        pass
+
+
+def _run(fake_scrapers, scraper):
+    matcher = ProductMatcher(platforms=[scraper.platform], locations=LOCATIONS, prewarm=False,
+                             config=fake_scrapers(scraper))
+    df = pd.DataFrame(ROWS, columns=["SPIN ID", "Item Name", "UOM"])
+    return matcher.process_frame(df).set_index(["SPIN ID", "Location"])
+
+
+def test_each_sku_is_searched_once_and_priced_in_every_location(fake_scrapers):
+    scraper = CountingScraper("blinkit", location_dependent=True)
+    result = _run(fake_scrapers, scraper)
+
+    # 3 searches + 3 x 2 product pages, instead of a full search and fetch per location (12)
+    assert len(scraper.searches) == 3 and {location for location, _ in scraper.searches} == {LOCATIONS[0]}
+    assert sorted(scraper.pages) == sorted((location, f"https://example.com/{name.split()[0].lower()}")
+                                           for location in LOCATIONS for _, name, _ in ROWS)
+    assert len(result) == 6
+    assert result.loc[("S2", "560001"), "blinkit_sale_price"] == "560001-price"
+
+
+def test_failed_fetch_in_one_location_is_left_out(fake_scrapers):
+    scraper = CountingScraper("blinkit", location_dependent=True, failing={("560001", "https://example.com/tata")})
+    result = _run(fake_scrapers, scraper)
+
+    assert result.loc[("S2", "400001"), "blinkit_sale_price"] == "400001-price"
+    assert result.loc[("S2", "560001"), ["blinkit_url", "blinkit_sale_price"]].tolist() == ["", ""]
+    assert result.loc[("S1", "560001"), "blinkit_sale_price"] == "560001-price"
+
+
+@pytest.mark.parametrize("cards, pages", [(True, 0), (False, 3)])
+def test_location_independent_platform_answers_once_for_every_location(fake_scrapers, cards, pages):
+    scraper = CountingScraper("amazon", location_dependent=False, cards=cards)
+    result = _run(fake_scrapers, scraper)
+
+    assert len(scraper.searches) == 3 and len(scraper.pages) == pages
+    prices = result["amazon_sale_price"].unstack()
+    assert (prices[LOCATIONS[0]] == prices[LOCATIONS[1]]).all()
+    assert set(prices[LOCATIONS[0]]) == {"card" if cards else "None-price"}
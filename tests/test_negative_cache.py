@@ -0,0 +1,97 @@
+import pandas as pd
+import pytest
+import requests
+from bs4 import BeautifulSoup
+
+from MAIN2 import ProductMatcher
+from negative_cache import DAY, NegativeCache, normalize_query
+from scrapers.amazon_scraper import AmazonScraper
+
+QUERY = "Amul Taaza Toned Milk 500 ml"
+
+
+def _recheck_after(cache, now):
+    """Days until the miss is searched again, probing with the injected clock"""
+    days = 0
+    while cache.is_known_missing("S1", "blinkit", QUERY, now=now + days * DAY):
+        days += 1
+    return days
+
+
+def test_recheck_waits_double_per_miss_up_to_the_cap(tmp_path):
+    cache = NegativeCache(str(tmp_path / "misses.json"), base_ttl=DAY, max_ttl=8 * DAY)
+    now = 1_000_000.0
+
+    waits = []
+    for _ in range(6):
+        cache.record_miss("S1", "blinkit", QUERY, now=now)
+        waits.append(_recheck_after(cache, now))
+        now += waits[-1] * DAY
+
+    assert waits == [1, 2, 4, 8, 8, 8]
+    # Other platforms and SKUs are not affected
+    assert not cache.is_known_missing("S1", "zepto", QUERY, now=now - DAY)
+    assert not cache.is_known_missing("S2", "blinkit", QUERY, now=now - DAY)
+
+
+def test_hit_resets_the_schedule(tmp_path):
+    cache = NegativeCache(str(tmp_path / "misses.json"))
+    for day in range(3):
+        cache.record_miss("S1", "blinkit", QUERY, now=day * 10 * DAY)
+    cache.record_hit("S1", "blinkit", QUERY)
+
+    assert not cache.is_known_missing("S1", "blinkit", QUERY, now=30 * DAY)
+    cache.record_miss("S1", "blinkit", QUERY, now=30 * DAY)
+    assert _recheck_after(cache, 30 * DAY) == 1
+
+
+def test_equivalent_queries_share_an_entry():
+    assert normalize_query("Amul  Taaza, Toned-Milk (500 ml)") == "amul taaza toned milk 500 ml"
+    cache = NegativeCache(":unused:")
+    cache.record_miss("S1", "zepto", "amul taaza toned-milk 500 ML", now=0)
+
+    assert cache.is_known_missing("S1", "zepto", QUERY, now=1)
+    assert cache.skipped == 1
+
+
+def test_cache_round_trips_through_its_file(tmp_path):
+    path = tmp_path / "cache" / "misses.json"
+    cache = NegativeCache(str(path), base_ttl=DAY)
+    cache.record_miss("S1", "blinkit", QUERY, now=0)
+    cache.record_miss("S1", "blinkit", QUERY, now=DAY)
+    cache.save()
+
+    reloaded = NegativeCache(str(path), base_ttl=DAY)
+    assert len(reloaded) == 1
+    assert reloaded.is_known_missing("S1", "blinkit", QUERY, now=2.5 * DAY)
+    assert not reloaded.is_known_missing("S1", "blinkit", QUERY, now=3 * DAY)
+    assert not (tmp_path / "cache" / "misses.json.tmp").exists()
+    # A corrupt file starts an empty cache instead of failing the run
+    path.write_text("{not json")
+    assert len(NegativeCache(str(path))) == 0
+
+
+
+def _unreachable(url):
+    raise requests.ConnectionError("connection reset")
+
+
+def _page(text):
+    return lambda url: BeautifulSoup(f"<html><body><p>{text}</p></body></html>", "html.parser")
+
+
+@pytest.mark.parametrize("get_soup, cached", [
+    (_unreachable, False),
+    # Neither result blocks nor Amazon's no-results message: the selectors no longer fit the page
+    (_page("Something went wrong"), False),
+    (_page("No results for tata salt iodised 1 kg."), True),
+])
+def test_only_clean_misses_are_cached(tmp_path, monkeypatch, fake_scrapers, get_soup, cached):
+    scraper = AmazonScraper()
+    monkeypatch.setattr(scraper, "get_soup", get_soup)
+    cache = NegativeCache(str(tmp_path / "misses.json"))
+    matcher = ProductMatcher(platforms=["amazon"], prewarm=False, config=fake_scrapers(scraper), negative_cache=cache)
+
+    matcher.process_frame(pd.DataFrame([["S1", "Tata Salt Iodised", "1 kg"]], columns=["SPIN ID", "Item Name", "UOM"]))
+
+    assert cache.is_known_missing("S1", "amazon", "Tata Salt Iodised 1 kg") == cached
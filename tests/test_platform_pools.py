@@ -0,0 +1,48 @@
+import threading
+
+import pandas as pd
+
+from MAIN2 import ProductMatcher
+
+ROWS = [[f"S{i}", name, "1 pc"] for i, name in enumerate(["Tata Salt", "Amul Butter", "Dabur Honey", "Maggi Noodles"])]
+
+
+class GatedScraper:
+    """Finds nothing; waits for `gate` before each search and sets `done` once it has searched every row"""
+
+    def __init__(self, platform, gate=None, done=None):
+        self.platform = platform
+        self.gate = gate
+        self.done = done
+        self.searched = []
+        self.waited_out = []
+
+    def for_location(self, location):
+        return self
+
+    def search_products(self, entries):
+        if self.gate is not None:
+            self.waited_out.append(not self.gate.wait(timeout=5))
+        self.searched.extend(entries)
+        if self.done is not None and len(self.searched) == len(ROWS):
+            self.done.set()
+        return [[] for _ in entries]
+
+    def close(self):
+        pass
+
+
+def test_slow_platform_does_not_hold_the_fast_platforms_workers(fake_scrapers):
+    fast_done = threading.Event()
+    fast = GatedScraper("blinkit", done=fast_done)
+    slow = GatedScraper("amazon", gate=fast_done)
+    scrapers = {"amazon": slow, "blinkit": fast}
+    config = fake_scrapers(scrapers, "max_workers=2", "batch_size=1",
+                           *(f"platforms.{platform}.concurrency=2" for platform in scrapers))
+    matcher = ProductMatcher(platforms=["amazon", "blinkit"], prewarm=False, cluster_variants=False, config=config)
+
+    matcher.process_frame(pd.DataFrame(ROWS, columns=["SPIN ID", "Item Name", "UOM"]))
+
+    # Both slow batches in flight did not stop the fast platform from searching every row
+    assert len(fast.searched) == len(slow.searched) == len(ROWS)
+    assert not any(slow.waited_out)
@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+
+from query_plan import build_query_plans, normalize_uom, plan_summary
+
+SAMPLE_INPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sample_input.csv")
+
+
+def _plans(rows):
+    return build_query_plans(pd.DataFrame(rows, columns=["Item Name", "UOM"]))
+
+
+def test_uom_normalization():
+    quantity, unit, query = normalize_uom(pd.Series(["100ml", "1 Kg", "500gms", "1Piece", "6pack", "7UK", None]))
+
+    assert list(quantity) == ["100", "1", "500", "1", "6", "7", ""]
+    assert list(unit) == ["ml", "kg", "g", "pcs", "pcs", "uk", ""]
+    assert list(query) == ["100 ml", "1 kg", "500 g", "", "6 pcs", "", ""]
+
+
+def test_tiers_go_from_exact_to_brand_and_type():
+    plan = _plans([["Patanjali Kesh Kanti Advance Herbal Hair Expert Oil 100 ml", "100ml"]]).iloc[0]
+
+    assert plan["brand"] == "patanjali"
+    assert plan["product_type"] == "oil"
+    assert plan["amazon_queries"] == (
+        "patanjali kesh kanti advance herbal hair expert oil 100 ml",
+        "patanjali oil 100 ml",
+        "patanjali oil",
+    )
+    # Blinkit starts from its shortened query
+    assert plan["blinkit_queries"] == ("patanjali oil 100 ml", "patanjali oil")
+
+
+def test_identical_tiers_are_collapsed():
+    plan = _plans([["Crocs Womens Splash Slides Black", "1Piece"]]).iloc[0]
+
+    assert plan["zepto_queries"] == ("crocs womens splash slides black", "crocs slides")
+
+
+def test_unknown_type_falls_back_to_leading_terms():
+    plan = _plans([["Flite Slippers FL0366L Navy Pink", "7UK"]]).iloc[0]
+
+    assert plan["brand_type"] == "flite slippers"
+    plan = _plans([["Mad Over Print Super Sis", "1Medium"]]).iloc[0]
+    assert plan["brand_type"] == "mad over print"
+
+
+def test_sample_input_dedupes_searches():
+    df = pd.read_csv(SAMPLE_INPUT)
+    summary = plan_summary(build_query_plans(df), ["amazon", "blinkit"])
+
+    assert summary["amazon"]["rows"] == len(df)
+    assert summary["blinkit"]["distinct_plans"] < summary["amazon"]["distinct_plans"] <= len(df)
@@ -0,0 +1,139 @@
+import os
+
+import pytest
+import requests
+
+from scrapers import backends
+from scrapers.backends import BrowserBackend, BrowserPage
+from scrapers.blinkit_scraper import BlinkatScraper
+from scrapers.replay import RECORD, REPLAY, Archive, ReplayMissError, activate, deactivate
+from scrapers.session_manager import session_manager
+from scrapers.session_state import session_store
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FixturePage(BrowserPage):
+    """Serves the saved Blinkit pages as if a browser had loaded them"""
+
+    loads = 0
+
+    def __init__(self):
+        self.url = ""
+
+    def goto(self, url, timeout=30):
+        FixturePage.loads += 1
+        self.url = url
+
+    def wait_for(self, selectors, timeout=10):
+        return True
+
+    def click(self, selectors, timeout=5):
+        return True
+
+    def type_text(self, selectors, text, timeout=5):
+        return True
+
+    def fill(self, selectors, text, submit=True, timeout=5):
+        return False
+
+    def evaluate(self, script, arg=None):
+        return self.url
+
+    def content(self):
+        return _fixture("blinkit_product.html" if "/prn/" in self.url else "blinkit_search.html")
+
+    def storage_state(self):
+        return {"cookies": [], "origins": []}
+
+    def wait_for_state(self, states, timeout=10):
+        return next(name for name in ("ready", "results", "product") if name in states)
+
+    def close(self):
+        pass
+
+
+class FixtureBackend(BrowserBackend):
+    name = "fixture"
+
+    def new_page(self, storage_state=None):
+        return FixturePage()
+
+
+@pytest.fixture
+def archive_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(backends, "_create_backend", lambda *args: FixtureBackend())
+    monkeypatch.setattr(session_store, "directory", str(tmp_path / "sessions"))
+    yield tmp_path / "run.har.gz"
+    deactivate()
+
+
+def _scrape():
+    scraper = BlinkatScraper()
+    candidates = scraper.search_products([("Amul Taaza Toned Milk", "500ml", "amul milk 500 ml")])
+    return candidates, scraper.extract_product_details(candidates[0][0]["url"])
+
+
+def test_recorded_browser_run_replays_without_a_browser(archive_env):
+    archive = activate(Archive(str(archive_env), RECORD))
+    recorded = _scrape()
+    archive.save()
+    deactivate()
+    loads = FixturePage.loads
+
+    replay = activate(Archive(str(archive_env), REPLAY))
+    assert _scrape() == recorded
+    assert recorded[0][0] and recorded[1]
+    # Every page came from the archive
+    assert FixturePage.loads == loads
+    assert replay.stats()["misses"] == 0
+    with pytest.raises(ReplayMissError):
+        replay.replay_call({"scope": "", "url": "https://blinkit.com/other", "query": "", "method": "content", "args": "[]"})
+
+
+def test_run_after_failed_bootstrap_replays(archive_env, monkeypatch):
+    monkeypatch.setattr(session_store, "_states", {})
+    monkeypatch.setattr(session_store, "_failed_at", {})
+    monkeypatch.setattr(BlinkatScraper, "_bootstrap_session", lambda self: None)
+    archive = activate(Archive(str(archive_env), RECORD))
+    recorded = _scrape()
+    archive.save()
+    deactivate()
+
+    replay = activate(Archive(str(archive_env), REPLAY))
+    assert _scrape() == recorded
+    assert recorded[0][0] and recorded[1]
+    assert replay.stats()["misses"] == 0
+
+
+def test_http_responses_replay_from_archive(tmp_path, monkeypatch):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    response._content = "<html>₹ 120</html>".encode("utf-8")
+
+    class FakeSession:
+        def get(self, url, **kwargs):
+            return response
+
+    monkeypatch.setattr(session_manager, "get_session", lambda: FakeSession())
+    archive = activate(Archive(str(tmp_path / "http.har.gz"), RECORD))
+    try:
+        session_manager.get("https://www.amazon.in/s?k=milk")
+        archive.save()
+    finally:
+        deactivate()
+
+    activate(Archive(str(tmp_path / "http.har.gz"), REPLAY))
+    try:
+        replayed = session_manager.get("https://www.amazon.in/s?k=milk")
+        assert session_manager.offline
+    finally:
+        deactivate()
+    assert replayed.status_code == 200
+    assert replayed.text == "<html>₹ 120</html>"
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+from result_store import filter_frame, read_results
+from utils import load_data, save_data
+
+RESULTS = pd.DataFrame({
+    "Sl No": ["1", "2", "3"],
+    "SPIN ID": ["S1", "S2", "S3"],
+    "Item Name": ["Amul Taaza Toned Milk", "Tata Salt Iodised", "Crocs Classic Clog"],
+    "UOM": ["500 ml", "1 kg", "1 pc"],
+    "L1": ["Dairy", "Staples", "Footwear"],
+    "amazon_url": ["https://www.amazon.in/Amul-Taaza/dp/B00KNXO3KS/ref=sr_1_1?qid=1", "", "N/A"],
+    "amazon_mrp": ["30", "N/A", ""],
+    "amazon_sale_price": ["28", "N/A", "1999"],
+    "amazon_quantity": ["500", "1", "N/A"],
+    "amazon_uom": ["ml", "kg", "N/A"],
+    "amazon_match_confidence": ["0.91", "", "0.7"],
+})
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow"])
+def test_typed_results_round_trip(tmp_path, extension):
+    path = tmp_path / f"result{extension}"
+    save_data(RESULTS, str(path))
+
+    table = pq.read_table(path) if extension == ".parquet" else pa.ipc.open_file(str(path)).read_all()
+    assert table.schema.field("amazon_sale_price").type == pa.float64()
+    assert pa.types.is_dictionary(table.schema.field("L1").type)
+    assert table.schema.field("Sl No").type == pa.int64()
+
+    df = load_data(str(path))
+    assert df["amazon_sale_price"].tolist()[::2] == [28.0, 1999.0] and pd.isna(df.loc[1, "amazon_sale_price"])
+    assert df["amazon_mrp"].isna().tolist() == [False, True, True]
+    assert df["amazon_uom"].dtype == "category" and pd.isna(df.loc[2, "amazon_uom"])
+    assert df["Sl No"].tolist() == [1, 2, 3]
+    assert df["amazon_canonical_url"].tolist()[0] == "https://www.amazon.in/dp/B00KNXO3KS"
+    assert df["amazon_canonical_url"].isna().tolist() == [False, True, True]
+
+
+@pytest.mark.parametrize("extension", [".csv", ".parquet", ".arrow"])
+def test_filters_apply_to_every_input_format(tmp_path, extension):
+    path = str(tmp_path / f"result{extension}")
+    save_data(RESULTS, path)
+
+    cheap = load_data(path, columns=["SPIN ID"], filters=[("amazon_sale_price", "<", 100)])
+    either = load_data(path, filters=[[("L1", "=", "Staples")], [("amazon_match_confidence", ">=", 0.9)]])
+
+    assert cheap.columns.tolist() == ["SPIN ID"] and cheap["SPIN ID"].tolist() == ["S1"]
+    assert sorted(either["SPIN ID"]) == ["S1", "S2"]
+    assert load_data(path, filters=[("SPIN ID", "not in", ["S1", "S3"])])["SPIN ID"].tolist() == ["S2"]
+
+
+def test_unsupported_filter_operators_are_rejected():
+    with pytest.raises(ValueError, match="Unsupported filter operator"):
+        filter_frame(RESULTS, [("L1", "like", "Dai%")])
+
+
+def test_partitioned_dataset_reads_with_partition_filters(tmp_path):
+    path = tmp_path / "results.parquet"
+    typed = pa.Table.from_pandas(RESULTS.assign(amazon_sale_price=[28.0, None, 1999.0]), preserve_index=False)
+    pq.write_to_dataset(typed, str(path), partition_cols=["L1"])
+
+    df = read_results(str(path), columns=["SPIN ID", "amazon_sale_price"], filters=[("L1", "in", ["Dairy", "Staples"])])
+
+    assert sorted(df["SPIN ID"]) == ["S1", "S2"]
+    assert df.set_index("SPIN ID")["amazon_sale_price"].isna().to_dict() == {"S1": False, "S2": True}
@@ -0,0 +1,135 @@
+import random
+
+import pandas as pd
+
+from MAIN2 import ProductMatcher
+from alerts import STOCK_OUT, AlertEngine, PriceSnapshot
+from analyzer import ProductAnalyzer
+from scheduler import DAY, DEFERRED, ChangeStats, plan_checks, simulate
+
+
+def _details(price):
+    return {None: {'sale_price': str(price)}}
+
+
+def test_change_rate_follows_observed_changes():
+    stats = ChangeStats(':memory:')
+    for day in range(10):
+        assert stats.observe("S1", "amazon", _details(100 + day), now=day * DAY) == (day > 0)
+        stats.observe("S2", "amazon", _details(100), now=day * DAY)
+    # A failed fetch is not a price change
+    assert not stats.observe("S2", "amazon", {}, now=10 * DAY)
+
+    assert stats.change_rate("S1", "amazon") > 0.5 > stats.change_rate("S2", "amazon")
+    assert len(stats) == 2 and len(stats.history()) == 20
+
+
+def test_history_keeps_the_latest_observations_per_item():
+    stats = ChangeStats(':memory:', history_limit=3)
+    for day in range(5):
+        stats.observe("S1", "amazon", _details(100 + day), now=day * DAY)
+    stats.observe("S2", "amazon", _details(100), now=0)
+
+    assert [(spin_id, observed_at / DAY) for spin_id, _, observed_at, _ in stats.history()] == [
+        ("S2", 0), ("S1", 2), ("S1", 3), ("S1", 4),
+    ]
+    # Trimming the history leaves the change statistics alone
+    assert stats.change_rate("S1", "amazon") > stats.change_rate("S2", "amazon")
+
+
+def test_database_is_only_created_by_the_first_observation(tmp_path):
+    path = tmp_path / "cache" / "change_stats.sqlite"
+    stats = ChangeStats(str(path))
+
+    assert len(stats) == 0 and stats.probabilities([("S1", "amazon")]) == {("S1", "amazon"): 1.0}
+    stats.save()
+    assert not (tmp_path / "cache").exists()
+
+    stats.observe("S1", "amazon", _details(100), now=0)
+    stats.close()
+    assert len(ChangeStats(str(path))) == 1
+
+
+def test_plan_checks_spends_the_budget_on_likely_changes():
+    stats = ChangeStats(':memory:')
+    for day in range(10):
+        stats.observe("steady", "amazon", _details(100), now=day * DAY)
+        stats.observe("volatile", "blinkit", _details(100 + day), now=day * DAY)
+    keys = [("steady", "amazon"), ("volatile", "blinkit"), ("new", "amazon")]
+
+    # Never-seen SKUs first, then the one that changes often; blinkit costs two requests
+    assert plan_checks(stats, keys, 3, now=11 * DAY) == [("new", "amazon"), ("volatile", "blinkit")]
+    assert plan_checks(stats, keys, 1, now=11 * DAY) == [("new", "amazon")]
+
+
+def test_change_rate_policy_beats_round_robin_in_simulation():
+    rng = random.Random(1)
+    rates = {f"S{i}": 0.6 if i < 10 else 0.02 for i in range(50)}
+    prices = dict.fromkeys(rates, 100)
+    history = []
+    for day in range(40):
+        for spin_id, rate in rates.items():
+            if rng.random() < rate:
+                prices[spin_id] += 1
+            history.append((spin_id, "amazon", day * DAY, {'': str(prices[spin_id])}))
+
+    results = simulate(history, budget=10)
+
+    assert results['everything']['requests'] == 40 * 50
+    assert results['change_rate']['requests'] <= 40 * 10
+    assert results['change_rate']['changes_caught'] > results['round_robin']['changes_caught']
+    assert results['change_rate']['share_of_changes'] > 0.5
+
+
+class CardScraper:
+    """Finds every SKU with its details on the search result card"""
+
+    platform = "amazon"
+    location_dependent = False
+
+    def for_location(self, location):
+        return self
+
+    def search_products(self, entries):
+        return [[{"name": name, "url": f"https://www.amazon.in/dp/{name.split()[0].upper()}",
+                  "details": {"url": f"https://www.amazon.in/dp/{name.split()[0].upper()}", "mrp": "50",
+                              "sale_price": "45", "quantity": "1", "uom": "kg"}}]
+                for name, uom, query in entries]
+
+    def extract_product_id(self, url):
+        return None
+
+    def close(self):
+        pass
+
+
+def test_deferred_skus_are_marked_and_not_read_as_unavailable(tmp_path, fake_scrapers):
+    snapshot = PriceSnapshot(str(tmp_path / "snapshot.json"))
+    for spin_id in ("S1", "S2"):
+        snapshot.put(spin_id, "amazon", None, {"sale_price": 45.0, "undercut": False, "seen_at": 0})
+    alerts = AlertEngine(str(tmp_path / "alerts.jsonl"), snapshot)
+    matcher = ProductMatcher(platforms=["amazon"], prewarm=False, config=fake_scrapers(CardScraper()), alerts=alerts,
+                             change_stats=ChangeStats(':memory:'), retry_delay=0)
+    df = pd.DataFrame([["S1", "Tata Salt", "1 kg"], ["S2", "Aashirvaad Atta", "1 kg"]],
+                      columns=["SPIN ID", "Item Name", "UOM"])
+
+    assert matcher.schedule(df, budget=1) == 1
+    result = matcher.process_frame(df).set_index("SPIN ID")
+
+    assert result.loc["S1", ["amazon_status", "amazon_sale_price"]].tolist() == ["", "45"]
+    assert result.loc["S2", ["amazon_status", "amazon_url"]].tolist() == [DEFERRED, ""]
+    assert alerts.counts[STOCK_OUT] == 0 and snapshot.get("S2", "amazon")["sale_price"] == 45.0
+    assert ProductAnalyzer(result).generate_availability_stats()["amazon"] == {
+        "available": 1, "not_available": 0, "deferred": 1, "percentage": 100.0,
+    }
+
+
+def test_configured_budget_applies_without_an_explicit_schedule(fake_scrapers):
+    config = fake_scrapers(CardScraper(), "daily_request_budget=1")
+    matcher = ProductMatcher(platforms=["amazon"], prewarm=False, config=config, change_stats=ChangeStats(':memory:'))
+    df = pd.DataFrame([["S1", "Tata Salt", "1 kg"], ["S2", "Aashirvaad Atta", "1 kg"]],
+                      columns=["SPIN ID", "Item Name", "UOM"])
+
+    result = matcher.process_frame(df)
+
+    assert result["amazon_status"].tolist() == ["", DEFERRED]
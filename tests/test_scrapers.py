@@ -0,0 +1,300 @@
+import os
+import time
+from urllib.parse import unquote
+
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+
+from MAIN2 import ProductMatcher
+from config import load_config
+from scrapers.amazon_scraper import AmazonScraper
+from scrapers.base_scraper import CaptchaError, ProductNotFoundError
+from scrapers.blinkit_scraper import BlinkatScraper
+from scrapers.zepto_scraper import ZeptoScraper
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Throughput budgets per extraction on the saved pages (about 1.5 and 2.5 ms
+# today). They leave several times that as headroom, so they only trip when a
+# change makes parsing markedly slower; PARSE_BUDGET_SCALE=2 relaxes them on
+# slow machines.
+BUDGET_SCALE = float(os.environ.get("PARSE_BUDGET_SCALE", "1"))
+PRODUCT_PAGE_BUDGET_MS = 8.0 * BUDGET_SCALE
+SEARCH_PAGE_BUDGET_MS = 12.0 * BUDGET_SCALE
+ITERATIONS = 100
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def _parse_amazon_product(scraper, html, url):
+    return scraper._parse_product_page(BeautifulSoup(html, "html.parser"), url)
+
+
+def _parse_amazon_search(scraper, html):
+    return scraper._parse_search_results(BeautifulSoup(html, "html.parser"))
+
+
+def _parse_product(scraper, html, url):
+    return scraper._parse_product_page(html, url)
+
+
+def _parse_search(scraper, html):
+    return scraper._parse_search_results(html)
+
+
+# (scraper class, fixture, url, parser, expected fields)
+PRODUCT_PAGES = {
+    "amazon": (
+        AmazonScraper, "amazon_product.html", "https://www.amazon.in/dp/B00KNXO3KS", _parse_amazon_product,
+        {"mrp": "95", "sale_price": "87", "quantity": "100", "uom": "ml"},
+    ),
+    "blinkit": (
+        BlinkatScraper, "blinkit_product.html", "https://blinkit.com/prn/product/prid/392331", _parse_product,
+        {"mrp": "95", "sale_price": "86", "quantity": "100", "uom": "ml"},
+    ),
+    "zepto": (
+        ZeptoScraper, "zepto_product.html", "https://www.zeptonow.com/pn/x/pvid/6f2e1c0a", _parse_product,
+        {"mrp": "95", "sale_price": "85", "quantity": "100", "uom": "ml"},
+    ),
+}
+
+# (scraper class, fixture, parser, expected (name, url) pairs in page order)
+SEARCH_PAGES = {
+    "amazon": (
+        AmazonScraper, "amazon_search.html", _parse_amazon_search, [
+            ("Patanjali Kesh Kanti Advanced Herbal Hair Oil, 100 ml", "https://www.amazon.in/dp/B00KNXO3KS"),
+            ("Patanjali Kesh Kanti Natural Hair Oil 120 ml", "https://www.amazon.in/dp/B07C5QYZ1H"),
+        ],
+    ),
+    "blinkit": (
+        BlinkatScraper, "blinkit_search.html", _parse_search, [
+            ("Patanjali Kesh Kanti Advanced Herbal Hair Oil", "https://blinkit.com/prn/product/prid/392331"),
+            ("Patanjali Kesh Kanti Natural Hair Oil", "https://blinkit.com/prn/product/prid/10321"),
+            ("Parachute Pure Coconut Oil", "https://blinkit.com/prn/product/prid/4412"),
+        ],
+    ),
+    "zepto": (
+        ZeptoScraper, "zepto_search.html", _parse_search, [
+            ("Patanjali Kesh Kanti Advanced Herbal Hair Oil",
+             "https://www.zeptonow.com/pn/product/pvid/6f2e1c0a-5b7d-4c8e-9a3b-2d1f0e9c8b7a"),
+            ("Dabur Amla Hair Oil", "https://www.zeptonow.com/pn/product/pvid/0a9b8c7d-6e5f-4a3b-2c1d-0e9f8a7b6c5d"),
+        ],
+    ),
+}
+
+
+def _ms_per_call(func, *args):
+    func(*args)  # warm up selector compilation
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        func(*args)
+    return (time.perf_counter() - start) * 1000 / ITERATIONS
+
+
+@pytest.mark.parametrize("platform", sorted(PRODUCT_PAGES))
+def test_product_page_fields(platform):
+    scraper_class, fixture, url, parse, expected = PRODUCT_PAGES[platform]
+    details = parse(scraper_class(), _fixture(fixture), url)
+
+    assert details == {"url": url, **expected}
+
+
+@pytest.mark.parametrize("platform", sorted(SEARCH_PAGES))
+def test_search_page_candidates(platform):
+    scraper_class, fixture, parse, expected = SEARCH_PAGES[platform]
+    products = parse(scraper_class(), _fixture(fixture))
+
+    assert [(product["name"], product["url"]) for product in products] == expected
+
+
+def test_amazon_captcha_page_is_detected():
+    soup = BeautifulSoup(_fixture("amazon_captcha.html"), "html.parser")
+
+    with pytest.raises(CaptchaError):
+        AmazonScraper()._check_captcha(soup, "https://www.amazon.in/s?k=oil")
+    AmazonScraper()._check_captcha(BeautifulSoup(_fixture("amazon_search.html"), "html.parser"), "")
+
+
+def test_amazon_404_page_means_the_product_is_gone():
+    soup = BeautifulSoup("<html><head><title>Amazon.in: Page Not Found</title></head></html>", "html.parser")
+
+    with pytest.raises(ProductNotFoundError):
+        AmazonScraper()._check_not_found(soup, "https://www.amazon.in/dp/B000000000")
+    AmazonScraper()._check_not_found(BeautifulSoup(_fixture("amazon_product.html"), "html.parser"), "")
+
+
+def test_amazon_search_cards_carry_details_when_they_show_an_mrp():
+    products = _parse_amazon_search(AmazonScraper(), _fixture("amazon_search.html"))
+
+    # The sponsored first result is skipped
+    assert [product["asin"] for product in products] == ["B00KNXO3KS", "B07C5QYZ1H"]
+    # A discounted card shows everything the product page would
+    page = _parse_amazon_product(AmazonScraper(), _fixture("amazon_product.html"), products[0]["url"])
+    assert products[0]["details"] == page
+    # Without a struck-through MRP the product page is still needed
+    assert products[1]["details"] is None
+
+
+def test_amazon_page_of_only_sponsored_results_has_no_candidates():
+    scraper = AmazonScraper()
+    soup = BeautifulSoup(_fixture("amazon_search.html"), "html.parser")
+    for block in soup.select(scraper.RESULT_SELECTOR):
+        if not scraper._is_sponsored(block):
+            block.decompose()
+
+    assert soup.select(scraper.RESULT_SELECTOR) and scraper._parse_search_results(soup) == []
+
+
+def test_amazon_match_from_a_search_card_needs_no_product_page(tmp_path, monkeypatch):
+    fetched = []
+
+    def get_soup(self, url):
+        fetched.append(url)
+        return BeautifulSoup(_fixture("amazon_search.html" if "/s?k=" in url else "amazon_product.html"), "html.parser")
+
+    monkeypatch.setattr(AmazonScraper, "get_soup", get_soup)
+    monkeypatch.chdir(tmp_path)
+    config = load_config(overrides=["platforms.amazon.min_delay=0", "platforms.amazon.max_delay=0"], environ={})
+    matcher = ProductMatcher(platforms=["amazon"], config=config)
+    df = pd.DataFrame({"SPIN ID": ["S1"], "Item Name": ["Patanjali Kesh Kanti Advanced Herbal Hair Oil"],
+                       "UOM": ["100 ml"]})
+
+    result = matcher.process_frame(df)
+
+    assert len(fetched) == 1 and "/s?k=" in fetched[0]
+    assert result.loc[0, ["amazon_url", "amazon_mrp", "amazon_sale_price"]].tolist() == [
+        "https://www.amazon.in/dp/B00KNXO3KS", "95", "87",
+    ]
+    assert matcher.product_pages == {"amazon": 0} and matcher.card_details == {"amazon": 1}
+
+
+@pytest.mark.parametrize("platform", sorted(PRODUCT_PAGES))
+def test_product_page_throughput(platform):
+    scraper_class, fixture, url, parse, _ = PRODUCT_PAGES[platform]
+    ms = _ms_per_call(parse, scraper_class(), _fixture(fixture), url)
+
+    assert ms < PRODUCT_PAGE_BUDGET_MS, f"{platform}: {ms:.2f} ms per product page ({1000 / ms:.0f} pages/s)"
+
+
+@pytest.mark.parametrize("platform", sorted(SEARCH_PAGES))
+def test_search_page_throughput(platform):
+    scraper_class, fixture, parse, _ = SEARCH_PAGES[platform]
+    ms = _ms_per_call(parse, scraper_class(), _fixture(fixture))
+
+    assert ms < SEARCH_PAGE_BUDGET_MS, f"{platform}: {ms:.2f} ms per search page ({1000 / ms:.0f} pages/s)"
+
+
+class FlakyPage:
+    """Zepto page whose first navigations fail, as on a slow connection"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.loads = 0
+        self.url = ""
+        self.closed = False
+
+    def goto(self, url, timeout=30):
+        self.loads += 1
+        if self.loads <= self.failures:
+            raise TimeoutError("navigation timed out")
+        self.url = url
+
+    def wait_for_state(self, states, timeout=10):
+        return "product" if "/pn/" in self.url else "results"
+
+    def content(self):
+        return _fixture("zepto_product.html" if "/pn/" in self.url else "zepto_search.html")
+
+    def close(self):
+        self.closed = True
+
+
+def _zepto_with_pages(monkeypatch, *pages):
+    from scrapers import base_scraper
+
+    monkeypatch.setattr(base_scraper.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(base_scraper.session_store, "get", lambda *args: None)
+    scraper = ZeptoScraper().configure(load_config(overrides=["platforms.zepto.load_retries=2"], environ={}).platforms["zepto"])
+    opened = iter(pages)
+
+    def new_page(storage_state=None):
+        page = next(opened)
+        if isinstance(page, Exception):
+            raise page
+        return page
+
+    monkeypatch.setattr(scraper.backend, "new_page", new_page)
+    return scraper
+
+
+def test_zepto_page_loads_are_retried_up_to_load_retries(monkeypatch):
+    retried, failing = FlakyPage(failures=1), FlakyPage(failures=2)
+    scraper = _zepto_with_pages(monkeypatch, retried, failing)
+
+    assert scraper.extract_product_details(PRODUCT_PAGES["zepto"][2])["sale_price"] == "85"
+    assert scraper.extract_product_details(PRODUCT_PAGES["zepto"][2]) is None
+    assert (retried.loads, failing.loads) == (2, 2)
+    assert retried.closed and failing.closed
+
+
+def test_zepto_page_that_cannot_be_opened_fails_its_searches(monkeypatch):
+    scraper = _zepto_with_pages(monkeypatch, RuntimeError("browser gone"), RuntimeError("browser gone"))
+
+    results = scraper.search_products([("Dabur Amla Hair Oil", "100 ml", None)] * 2)
+    assert results == [[], []] and all(candidates.failed for candidates in results)
+    assert scraper.extract_product_details(PRODUCT_PAGES["zepto"][2]) is None
+
+
+class SpaSearchPage:
+    """Zepto SPA page: typed queries swap the cards in place, navigations load a search URL"""
+
+    def __init__(self, scraper, pages):
+        self.scraper = scraper
+        self.pages = pages
+        self.html = ""
+        self.navigations = []
+
+    def goto(self, url, timeout=30):
+        self.navigations.append(url)
+        self.html = self.pages[unquote(url.split("q=")[1])]
+
+    def fill(self, selectors, text):
+        self.html = self.pages[text]
+        return True
+
+    def signature(self, selector):
+        return "|".join(product["url"] for product in self.scraper._parse_search_results(self.html)[:5])
+
+    def wait_for_state(self, states, timeout=10):
+        changed_from = states["results"].get("changed_from")
+        # Like the page probe: a typed query is answered only once the cards differ from the last ones
+        if changed_from and self.signature(changed_from["selector"]) == changed_from["value"]:
+            return None
+        return "results"
+
+    def content(self):
+        return self.html
+
+    def close(self):
+        pass
+
+
+def test_batched_search_reads_typed_results_and_reloads_when_the_cards_stay_the_same(monkeypatch):
+    search = _fixture("zepto_search.html")
+    fewer = BeautifulSoup(search, "html.parser")
+    fewer.select_one(".search-item-card").decompose()
+    queries = {"dabur amla": search, "dabur hair oil": str(fewer), "amla oil": search, "amla hair oil": search}
+    scraper = _zepto_with_pages(monkeypatch)
+    page = SpaSearchPage(scraper, queries)
+    monkeypatch.setattr(scraper, "_new_page", lambda: page)
+
+    results = scraper.search_products([("Dabur Amla Hair Oil", "100 ml", query) for query in queries])
+
+    assert [len(products) for products in results] == [2, 1, 2, 2]
+    assert not any(getattr(products, "unparsed", False) for products in results)
+    # The first query loads the page; only the query showing the same cards as the one before is reloaded
+    assert [unquote(url.split("q=")[1]) for url in page.navigations] == ["dabur amla", "amla hair oil"]
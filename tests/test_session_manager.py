@@ -0,0 +1,69 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scrapers.session_manager import SessionManager
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"<html>ok</html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_each_thread_reuses_its_own_session():
+    manager = SessionManager()
+    session = manager.get_session()
+    others = []
+    thread = threading.Thread(target=lambda: others.append(manager.get_session()))
+    thread.start()
+    thread.join()
+
+    assert manager.get_session() is session
+    assert others[0] is not session
+    assert manager.stats()["sessions"] == 2
+    manager.close()
+    assert manager.get_session() is not session
+
+
+def test_sessions_retry_throttling_and_server_errors():
+    manager = SessionManager(pool_connections=3, pool_maxsize=5)
+    manager.configure(max_retries=4, backoff_factor=1.5)
+    adapter = manager.get_session().get_adapter("https://www.amazon.in/")
+    retry = adapter.max_retries
+
+    assert (retry.total, retry.backoff_factor) == (4, 1.5)
+    assert {429, 503} <= set(retry.status_forcelist)
+    assert "POST" not in retry.allowed_methods and retry.respect_retry_after_header
+    assert (adapter._pool_connections, adapter._pool_maxsize) == (3, 5)
+
+
+def test_stats_count_reused_keep_alive_connections(server):
+    manager = SessionManager()
+    for _ in range(3):
+        assert manager.get(f"{server}/s?k=milk", timeout=5).status_code == 200
+
+    stats = manager.stats()
+    assert stats["requests"] == 3
+    assert (stats["new_connections"], stats["reused_connections"]) == (1, 2)
+    assert stats["reuse_ratio"] == pytest.approx(2 / 3)
+    manager.close()
@@ -0,0 +1,108 @@
+import pytest
+
+from scrapers import session_state
+from scrapers.session_state import BOOTSTRAP_RETRY_AFTER, SESSION_MAX_AGE, SessionStore
+from scrapers.zepto_scraper import ZeptoScraper
+
+STATE = {"cookies": [{"name": "loc", "value": "400001", "domain": ".zeptonow.com", "expires": -1}], "origins": []}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Settable stand-in for time.time in session_state"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(session_state.time, "time", lambda: now[0])
+    return now
+
+
+def _bootstrapper(*results):
+    calls = []
+    results = iter(results)
+
+    def bootstrap():
+        calls.append(1)
+        return next(results)
+
+    return bootstrap, calls
+
+
+def test_state_is_reused_until_it_is_too_old(tmp_path, clock):
+    store = SessionStore(str(tmp_path))
+    bootstrap, calls = _bootstrapper(STATE, STATE)
+
+    state = store.get("zepto", "Mumbai", bootstrap)
+    assert state["cookies"] == STATE["cookies"] and state["location"] == "Mumbai"
+    clock[0] += SESSION_MAX_AGE - 60
+    # A new process loads the saved file instead of bootstrapping
+    assert SessionStore(str(tmp_path)).get("zepto", "Mumbai", bootstrap)["saved_at"] == state["saved_at"]
+    assert len(calls) == 1
+
+    clock[0] += 120
+    assert store.get("zepto", "Mumbai", bootstrap)["saved_at"] == clock[0]
+    assert len(calls) == 2
+
+
+def test_expired_cookies_or_invalidation_force_a_new_bootstrap(tmp_path, clock):
+    store = SessionStore(str(tmp_path))
+    expiring = {"cookies": [{**STATE["cookies"][0], "expires": clock[0] + 60}], "origins": []}
+    assert store.is_valid({**expiring, "saved_at": clock[0]})
+    assert not store.is_valid({**expiring, "saved_at": clock[0]}, now=clock[0] + 61)
+    assert store.is_valid({"cookies": [], "origins": [], "saved_at": clock[0]})
+
+    store.save("blinkit", STATE, "Pune")
+    store.invalidate("blinkit", "Pune")
+    assert store.load("blinkit", "Pune") is None
+    assert not (tmp_path / "blinkit-pune.json").exists()
+
+
+def test_failed_bootstrap_is_retried_after_five_minutes(tmp_path, clock):
+    store = SessionStore(str(tmp_path))
+    bootstrap, calls = _bootstrapper(None, STATE)
+
+    assert store.get("blinkit", "Pune", bootstrap) is None
+    clock[0] += BOOTSTRAP_RETRY_AFTER - 1
+    assert store.get("blinkit", "Pune", bootstrap) is None
+    assert len(calls) == 1
+
+    clock[0] += 2
+    assert store.get("blinkit", "Pune", bootstrap)["cookies"] == STATE["cookies"]
+    assert len(calls) == 2
+
+
+def test_offline_store_hands_out_a_placeholder_without_bootstrapping(tmp_path):
+    store = SessionStore(str(tmp_path))
+    store.offline = True
+    bootstrap, calls = _bootstrapper()
+
+    assert store.get("zepto", "Mumbai", bootstrap) == {
+        "cookies": [], "origins": [], "platform": "zepto", "location": "Mumbai",
+    }
+    assert not calls and not list(tmp_path.iterdir())
+
+
+class HomePage:
+    def __init__(self, state):
+        self.state = state
+
+    def goto(self, url, timeout=30):
+        pass
+
+    def wait_for_state(self, states, timeout=10):
+        return self.state
+
+    def storage_state(self):
+        return STATE
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("home, location_set", [("ready", False), ("location", True)])
+def test_zepto_only_sets_the_location_when_the_home_page_asks(monkeypatch, home, location_set):
+    scraper = ZeptoScraper()
+    monkeypatch.setattr(scraper.backend, "new_page", lambda storage_state=None: HomePage(home))
+    attempts = []
+    monkeypatch.setattr(scraper, "_set_location", lambda page, location: attempts.append(location) or True)
+
+    assert scraper._bootstrap_session() == STATE
+    assert bool(attempts) == location_set